@@ -4,13 +4,12 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 
-from app.core.config import settings
 from app.core.security import AuthContext, get_auth_context
-from app.services.supabase_rest import SupabaseRest
+from app.services.supabase_rest import get_anon_client
 
 
 async def require_admin(auth: AuthContext = Depends(get_auth_context)) -> AuthContext:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
     rows = await sb.select(
         "profiles",
         bearer_token=auth.access_token,
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Gauge values for `<name>_circuit_state`.
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open trial request.
+
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half_open once `cooldown_seconds` have passed, letting one request
+    through; its outcome closes or re-opens the circuit. A threshold of 0
+    disables the breaker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int,
+        cooldown_seconds: float,
+        metric_prefix: str,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._metric_prefix = metric_prefix
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN)
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._trial_in_flight = False
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def release(self) -> None:
+        # The admitted request ended without a verdict (e.g. a cancelled
+        # hedge); let the next caller take the half-open trial instead.
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        if self.failure_threshold <= 0:
+            return
+        self._trial_in_flight = False
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != OPEN:
+                metrics.incr(
+                    f"{self._metric_prefix}_circuit_opened_total", endpoint=self.name
+                )
+            self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("circuit %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        metrics.set_gauge(
+            f"{self._metric_prefix}_circuit_state",
+            _STATE_VALUES[state],
+            endpoint=self.name,
+        )
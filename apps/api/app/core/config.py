@@ -20,6 +20,12 @@ class Settings(BaseSettings):
     # App
     app_env: str = Field(default="development", alias="APP_ENV")
     frontend_url: AnyUrl = Field(alias="FRONTEND_URL")
+    # auto: orjson when installed, stdlib json otherwise.
+    json_codec: str = Field(default="auto", alias="JSON_CODEC")
+    # Total budget per API request; Supabase timeouts shrink to what is left (0 disables).
+    request_deadline_seconds: float = Field(
+        default=25.0, alias="REQUEST_DEADLINE_SECONDS"
+    )
 
     # Supabase
     supabase_url: AnyUrl = Field(alias="SUPABASE_URL")
@@ -28,6 +34,34 @@ class Settings(BaseSettings):
     # Deprecated: Supabase moved to asymmetric signing keys (JWKS). We delegate auth verification
     # to Supabase Auth API instead of verifying JWTs locally.
     supabase_jwt_secret: str | None = Field(default=None, alias="SUPABASE_JWT_SECRET")
+    supabase_http_timeout_seconds: float = Field(
+        default=30.0, alias="SUPABASE_HTTP_TIMEOUT_SECONDS"
+    )
+    supabase_http_max_connections: int = Field(
+        default=100, alias="SUPABASE_HTTP_MAX_CONNECTIONS"
+    )
+    supabase_http_max_keepalive: int = Field(
+        default=20, alias="SUPABASE_HTTP_MAX_KEEPALIVE"
+    )
+    # JSON object of per-endpoint timeouts in seconds, keyed by table name or
+    # "rpc/<function>", e.g. {"rpc/cohort_trend_summary": 10, "ai_reports": 5}.
+    supabase_table_timeouts: dict[str, float] = Field(
+        default_factory=dict, alias="SUPABASE_TABLE_TIMEOUTS"
+    )
+    # Extra attempts for idempotent GETs on transport errors and 502/503/504.
+    supabase_get_retry_attempts: int = Field(
+        default=2, alias="SUPABASE_GET_RETRY_ATTEMPTS"
+    )
+    # Send a second GET once the first has run longer than the endpoint's
+    # observed p95 latency; whichever answers first wins.
+    supabase_hedge_enabled: bool = Field(default=False, alias="SUPABASE_HEDGE_ENABLED")
+    # Consecutive transport errors/5xx per endpoint before failing fast (0 disables).
+    supabase_circuit_failure_threshold: int = Field(
+        default=5, alias="SUPABASE_CIRCUIT_FAILURE_THRESHOLD"
+    )
+    supabase_circuit_cooldown_seconds: float = Field(
+        default=15.0, alias="SUPABASE_CIRCUIT_COOLDOWN_SECONDS"
+    )
 
     # OpenAI
     openai_api_key: str = Field(alias="OPENAI_API_KEY")
@@ -66,6 +100,25 @@ class Settings(BaseSettings):
         default=30, alias="PRO_REPORT_RETENTION_DAYS"
     )
     analyze_per_minute_limit: int = Field(default=6, alias="ANALYZE_PER_MINUTE_LIMIT")
+    # Per-process read caches (0 disables). Writes invalidate explicitly; the TTL
+    # bounds staleness for writes handled by another instance.
+    profile_cache_ttl_seconds: int = Field(
+        default=30, alias="PROFILE_CACHE_TTL_SECONDS"
+    )
+    subscription_cache_ttl_seconds: int = Field(
+        default=15, alias="SUBSCRIPTION_CACHE_TTL_SECONDS"
+    )
+    recovery_summary_cache_ttl_seconds: int = Field(
+        default=30, alias="RECOVERY_SUMMARY_CACHE_TTL_SECONDS"
+    )
+    # Probe optional schema patches (activity_logs.meta, usage_events.request_id,
+    # recovery tables) at startup and on this cadence.
+    schema_capability_probe_enabled: bool = Field(
+        default=True, alias="SCHEMA_CAPABILITY_PROBE_ENABLED"
+    )
+    schema_capability_refresh_seconds: int = Field(
+        default=300, alias="SCHEMA_CAPABILITY_REFRESH_SECONDS"
+    )
     recovery_v1_enabled: bool = Field(default=False, alias="RECOVERY_V1_ENABLED")
     auto_lapse_enabled: bool = Field(default=False, alias="AUTO_LAPSE_ENABLED")
     recovery_nudge_enabled: bool = Field(default=False, alias="RECOVERY_NUDGE_ENABLED")
@@ -89,7 +142,61 @@ class Settings(BaseSettings):
     recovery_nudge_batch_size: int = Field(
         default=500, alias="RECOVERY_NUDGE_BATCH_SIZE"
     )
+    # Longest wait of GET /recovery/nudge/subscribe before it answers "no nudge".
+    recovery_nudge_long_poll_seconds: float = Field(
+        default=20.0, alias="RECOVERY_NUDGE_LONG_POLL_SECONDS"
+    )
+    # Per-user cron work in flight at once, and the wall-clock budget for a run.
+    # Keep the deadline under REQUEST_DEADLINE_SECONDS, which also bounds crons
+    # triggered over HTTP.
+    recovery_cron_concurrency: int = Field(default=8, alias="RECOVERY_CRON_CONCURRENCY")
+    recovery_cron_deadline_seconds: float = Field(
+        default=20.0, alias="RECOVERY_CRON_DEADLINE_SECONDS"
+    )
+    # How long a passing schema preflight is reused by later cron runs (0 = probe
+    # every run).
+    recovery_cron_preflight_ttl_seconds: float = Field(
+        default=300.0, alias="RECOVERY_CRON_PREFLIGHT_TTL_SECONDS"
+    )
+    # Embedded scheduler: runs the recovery crons in-process on one leader
+    # instance (see app.services.cron_scheduler) instead of external HTTP calls.
+    recovery_scheduler_enabled: bool = Field(
+        default=False, alias="RECOVERY_SCHEDULER_ENABLED"
+    )
+    recovery_scheduler_auto_lapse_interval_seconds: float = Field(
+        default=300.0, alias="RECOVERY_SCHEDULER_AUTO_LAPSE_INTERVAL_SECONDS"
+    )
+    recovery_scheduler_nudge_interval_seconds: float = Field(
+        default=300.0, alias="RECOVERY_SCHEDULER_NUDGE_INTERVAL_SECONDS"
+    )
+    # Scheduled backfill of activity_log_daily_metrics (the trigger covers new
+    # saves); runs on the embedded scheduler.
+    activity_metrics_backfill_enabled: bool = Field(
+        default=False, alias="ACTIVITY_METRICS_BACKFILL_ENABLED"
+    )
+    activity_metrics_backfill_interval_seconds: float = Field(
+        default=600.0, alias="ACTIVITY_METRICS_BACKFILL_INTERVAL_SECONDS"
+    )
+    activity_metrics_backfill_batch_size: int = Field(
+        default=1000, alias="ACTIVITY_METRICS_BACKFILL_BATCH_SIZE"
+    )
     cohort_window_days: int = Field(default=14, alias="COHORT_WINDOW_DAYS")
+    # Per-process cohort summary cache: served fresh for the TTL (0 disables),
+    # then served stale while one background refresh runs.
+    cohort_cache_ttl_seconds: int = Field(default=300, alias="COHORT_CACHE_TTL_SECONDS")
+    cohort_cache_stale_seconds: int = Field(
+        default=1800, alias="COHORT_CACHE_STALE_SECONDS"
+    )
+    # Optional cohort_trend_snapshots table, refreshed by the embedded scheduler.
+    cohort_snapshot_enabled: bool = Field(
+        default=False, alias="COHORT_SNAPSHOT_ENABLED"
+    )
+    cohort_snapshot_max_age_seconds: int = Field(
+        default=3600, alias="COHORT_SNAPSHOT_MAX_AGE_SECONDS"
+    )
+    cohort_snapshot_refresh_interval_seconds: float = Field(
+        default=900.0, alias="COHORT_SNAPSHOT_REFRESH_INTERVAL_SECONDS"
+    )
     cohort_min_sample_size: int = Field(default=50, alias="COHORT_MIN_SAMPLE_SIZE")
     cohort_preview_sample_size: int = Field(
         default=20, alias="COHORT_PREVIEW_SAMPLE_SIZE"
@@ -135,6 +242,36 @@ class Settings(BaseSettings):
         if is_prod and self.stripe_smoke_fake:
             raise ValueError("STRIPE_SMOKE_FAKE must be disabled in production.")
 
+        if self.supabase_http_timeout_seconds <= 0:
+            raise ValueError("SUPABASE_HTTP_TIMEOUT_SECONDS must be > 0")
+        if self.supabase_http_max_connections < 1:
+            raise ValueError("SUPABASE_HTTP_MAX_CONNECTIONS must be >= 1")
+        if not (
+            0 <= self.supabase_http_max_keepalive <= self.supabase_http_max_connections
+        ):
+            raise ValueError(
+                "SUPABASE_HTTP_MAX_KEEPALIVE must be 0..SUPABASE_HTTP_MAX_CONNECTIONS"
+            )
+        if any(v <= 0 for v in self.supabase_table_timeouts.values()):
+            raise ValueError("SUPABASE_TABLE_TIMEOUTS values must be > 0")
+        if self.request_deadline_seconds < 0:
+            raise ValueError("REQUEST_DEADLINE_SECONDS must be >= 0")
+        if not (0 <= self.supabase_get_retry_attempts <= 5):
+            raise ValueError("SUPABASE_GET_RETRY_ATTEMPTS must be 0..5")
+        if self.supabase_circuit_failure_threshold < 0:
+            raise ValueError("SUPABASE_CIRCUIT_FAILURE_THRESHOLD must be >= 0")
+        if self.supabase_circuit_cooldown_seconds <= 0:
+            raise ValueError("SUPABASE_CIRCUIT_COOLDOWN_SECONDS must be > 0")
+        if (self.json_codec or "").strip().lower() not in {"auto", "orjson", "stdlib"}:
+            raise ValueError("JSON_CODEC must be one of: auto, orjson, stdlib")
+        if not (0 <= self.profile_cache_ttl_seconds <= 300):
+            raise ValueError("PROFILE_CACHE_TTL_SECONDS must be 0..300")
+        if not (0 <= self.recovery_summary_cache_ttl_seconds <= 300):
+            raise ValueError("RECOVERY_SUMMARY_CACHE_TTL_SECONDS must be 0..300")
+        if not (0 <= self.subscription_cache_ttl_seconds <= 300):
+            raise ValueError("SUBSCRIPTION_CACHE_TTL_SECONDS must be 0..300")
+        if not (30 <= self.schema_capability_refresh_seconds <= 86400):
+            raise ValueError("SCHEMA_CAPABILITY_REFRESH_SECONDS must be 30..86400")
         if not (0 <= self.cohort_threshold_experiment_rollout_pct <= 100):
             raise ValueError("COHORT_THRESHOLD_EXPERIMENT_ROLLOUT_PCT must be 0..100")
         if self.cohort_preview_sample_size > self.cohort_min_sample_size:
@@ -177,6 +314,32 @@ class Settings(BaseSettings):
             raise ValueError("RECOVERY_AUTO_LAPSE_BATCH_SIZE must be 1..2000")
         if not (1 <= self.recovery_nudge_batch_size <= 2000):
             raise ValueError("RECOVERY_NUDGE_BATCH_SIZE must be 1..2000")
+        if not (0 <= self.recovery_nudge_long_poll_seconds <= 60):
+            raise ValueError("RECOVERY_NUDGE_LONG_POLL_SECONDS must be 0..60")
+        if not (1 <= self.recovery_cron_concurrency <= 64):
+            raise ValueError("RECOVERY_CRON_CONCURRENCY must be 1..64")
+        if self.recovery_cron_deadline_seconds < 0:
+            raise ValueError("RECOVERY_CRON_DEADLINE_SECONDS must be >= 0")
+        if self.recovery_cron_preflight_ttl_seconds < 0:
+            raise ValueError("RECOVERY_CRON_PREFLIGHT_TTL_SECONDS must be >= 0")
+        if self.recovery_scheduler_auto_lapse_interval_seconds < 30:
+            raise ValueError(
+                "RECOVERY_SCHEDULER_AUTO_LAPSE_INTERVAL_SECONDS must be >= 30"
+            )
+        if self.recovery_scheduler_nudge_interval_seconds < 30:
+            raise ValueError("RECOVERY_SCHEDULER_NUDGE_INTERVAL_SECONDS must be >= 30")
+        if self.activity_metrics_backfill_interval_seconds < 60:
+            raise ValueError("ACTIVITY_METRICS_BACKFILL_INTERVAL_SECONDS must be >= 60")
+        if not (1 <= self.activity_metrics_backfill_batch_size <= 10000):
+            raise ValueError("ACTIVITY_METRICS_BACKFILL_BATCH_SIZE must be 1..10000")
+        if not (0 <= self.cohort_cache_ttl_seconds <= 3600):
+            raise ValueError("COHORT_CACHE_TTL_SECONDS must be 0..3600")
+        if not (0 <= self.cohort_cache_stale_seconds <= 86400):
+            raise ValueError("COHORT_CACHE_STALE_SECONDS must be 0..86400")
+        if self.cohort_snapshot_max_age_seconds < 0:
+            raise ValueError("COHORT_SNAPSHOT_MAX_AGE_SECONDS must be >= 0")
+        if self.cohort_snapshot_refresh_interval_seconds < 60:
+            raise ValueError("COHORT_SNAPSHOT_REFRESH_INTERVAL_SECONDS must be >= 60")
 
         return self
 
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# Absolute time.monotonic() deadline for the current request. Set by the HTTP
+# middleware in app.main; downstream I/O sizes its timeouts from remaining().
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """Seconds left before the request deadline, or None when unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def budget(default: float) -> float:
+    """Timeout for one operation: `default`, capped by the request deadline."""
+    left = remaining()
+    if left is None:
+        return default
+    return max(0.0, min(default, left))
+
+
+@contextmanager
+def request_deadline(seconds: float | None, *, fresh: bool = False) -> Iterator[None]:
+    """Bound I/O in the block to `seconds` from now (None or <= 0: unbounded).
+
+    Nested scopes can only tighten the budget. `fresh` replaces the inherited
+    deadline instead, for work that outlives the handler, like a streamed body.
+    """
+    if seconds is None or seconds <= 0:
+        if not fresh:
+            yield
+            return
+        deadline: float | None = None
+    else:
+        deadline = time.monotonic() + seconds
+        current = None if fresh else _deadline.get()
+        if current is not None:
+            deadline = min(current, deadline)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Generic, Sequence, TypeVar
+
+from app.core import deadline, metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Outcomes recorded by the pool itself rather than by the worker.
+FAILED = "failed"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+@dataclass
+class FanOutResult(Generic[T]):
+    # Outcome per input item, in input order (None when the worker returned None).
+    outcomes: list[str | None]
+    errors: list[tuple[T, Exception]] = field(default_factory=list)
+
+    def counts(self) -> Counter[str]:
+        # Built in input order so dict(counts) is stable across runs regardless
+        # of which worker finished first.
+        return Counter(outcome for outcome in self.outcomes if outcome is not None)
+
+
+async def fan_out(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[str | None]],
+    *,
+    job: str,
+    concurrency: int,
+    deadline_seconds: float | None = None,
+) -> FanOutResult[T]:
+    """Run `worker` over `items` with at most `concurrency` in flight.
+
+    The worker returns an outcome label (or None). An exception is isolated
+    to its item and recorded as FAILED; items not started before the
+    deadline are recorded as DEADLINE_EXCEEDED. The deadline also caps
+    Supabase timeouts inside the workers (see app.core.deadline).
+    Progress is published as cron_fanout_* metrics labelled by `job`.
+    """
+    outcomes: list[str | None] = [None] * len(items)
+    errors: list[tuple[int, Exception]] = []
+    pending = iter(enumerate(items))
+    remaining = len(items)
+    in_flight = 0
+    started = time.perf_counter()
+    metrics.set_gauge("cron_fanout_remaining", remaining, job=job)
+
+    async def _run_worker() -> None:
+        nonlocal remaining, in_flight
+        for index, item in pending:
+            left = deadline.remaining()
+            if left is not None and left <= 0:
+                outcomes[index] = DEADLINE_EXCEEDED
+            else:
+                in_flight += 1
+                metrics.set_gauge("cron_fanout_in_flight", in_flight, job=job)
+                try:
+                    outcomes[index] = await worker(item)
+                except Exception as exc:
+                    outcomes[index] = FAILED
+                    errors.append((index, exc))
+                    logger.warning("%s fan-out item %s failed: %s", job, index, exc)
+                finally:
+                    in_flight -= 1
+                    metrics.set_gauge("cron_fanout_in_flight", in_flight, job=job)
+            remaining -= 1
+            metrics.set_gauge("cron_fanout_remaining", remaining, job=job)
+            metrics.incr(
+                "cron_fanout_items_total", job=job, outcome=outcomes[index] or "none"
+            )
+
+    with deadline.request_deadline(deadline_seconds):
+        await asyncio.gather(
+            *(_run_worker() for _ in range(min(max(1, concurrency), len(items))))
+        )
+    metrics.observe("cron_fanout_seconds", time.perf_counter() - started, job=job)
+    errors.sort(key=lambda pair: pair[0])
+    return FanOutResult(
+        outcomes=outcomes,
+        errors=[(items[index], exc) for index, exc in errors],
+    )
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any, Protocol
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+try:  # Optional: orjson is ~3-10x faster for our report/entries payloads.
+    import orjson
+except ImportError:  # pragma: no cover - exercised only when orjson is absent
+    orjson = None  # type: ignore[assignment]
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib type regardless of backend.
+JSONDecodeError = json.JSONDecodeError
+
+
+class JsonCodec(Protocol):
+    name: str
+
+    def dumps(self, obj: Any, *, sort_keys: bool = False) -> bytes: ...
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any: ...
+
+
+# The backends agree on str-keyed dicts of strings, bools, None, 64-bit ints
+# and ordinary floats. They differ on float exponent spelling (1e-07 vs
+# 1e-7), NaN/Infinity (orjson writes null), non-str keys and ints beyond 64
+# bits (orjson raises). Do not hash codec output into anything persisted.
+
+
+def _stdlib_default(obj: Any) -> Any:
+    # Mirror orjson's native handling of dates and UUIDs.
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class StdlibJsonCodec:
+    name = "stdlib"
+
+    def dumps(self, obj: Any, *, sort_keys: bool = False) -> bytes:
+        return json.dumps(
+            obj,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=sort_keys,
+            default=_stdlib_default,
+        ).encode("utf-8")
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def dumps(self, obj: Any, *, sort_keys: bool = False) -> bytes:
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        return orjson.dumps(obj, option=option)
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        return orjson.loads(data)
+
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    normalized = (name or "auto").strip().lower()
+    if normalized == "stdlib":
+        return StdlibJsonCodec()
+    if normalized == "orjson" and orjson is None:
+        raise RuntimeError("JSON_CODEC=orjson but orjson is not installed")
+    if orjson is not None:
+        return OrjsonCodec()
+    return StdlibJsonCodec()
+
+
+_codec: JsonCodec = get_codec(settings.json_codec)
+
+
+def codec_name() -> str:
+    return _codec.name
+
+
+def dumps(obj: Any, *, sort_keys: bool = False) -> bytes:
+    return _codec.dumps(obj, sort_keys=sort_keys)
+
+
+def dumps_str(obj: Any, *, sort_keys: bool = False) -> str:
+    return _codec.dumps(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    return _codec.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through the configured codec."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+# In-process metrics only (per worker). Exposed via GET /api/admin/metrics;
+# scrape every instance if you run more than one.
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class _Timing:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+_counters: dict[tuple[str, _LabelKey], float] = {}
+_gauges: dict[tuple[str, _LabelKey], float] = {}
+_timings: dict[tuple[str, _LabelKey], _Timing] = {}
+
+
+def _key(name: str, labels: dict[str, Any]) -> tuple[str, _LabelKey]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render(key: tuple[str, _LabelKey]) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    key = _key(name, labels)
+    _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels: Any) -> None:
+    _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    key = _key(name, labels)
+    timing = _timings.get(key)
+    if timing is None:
+        timing = _timings[key] = _Timing()
+    timing.count += 1
+    timing.total += value
+    timing.max = max(timing.max, value)
+
+
+def counter_value(name: str, **labels: Any) -> float:
+    return _counters.get(_key(name, labels), 0)
+
+
+def gauge_value(name: str, **labels: Any) -> float | None:
+    return _gauges.get(_key(name, labels))
+
+
+def snapshot() -> dict[str, Any]:
+    return {
+        "counters": {_render(k): v for k, v in sorted(_counters.items())},
+        "gauges": {_render(k): v for k, v in sorted(_gauges.items())},
+        "timings": {
+            _render(k): {
+                "count": t.count,
+                "sum": round(t.total, 6),
+                "avg": round(t.total / t.count, 6) if t.count else 0.0,
+                "max": round(t.max, 6),
+            }
+            for k, t in sorted(_timings.items())
+        },
+    }
+
+
+def reset() -> None:
+    _counters.clear()
+    _gauges.clear()
+    _timings.clear()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.core import metrics
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task[Any]
+    waiters: int = 1
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    Only calls that overlap in time are merged; nothing is cached after the
+    leader finishes. Followers receive a deep copy so callers can mutate the
+    rows they get back.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        **labels: Any,
+    ) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None and not flight.task.done():
+            flight.waiters += 1
+            metrics.incr(f"{self.name}_coalesced_total", **labels)
+            result = await asyncio.shield(flight.task)
+            return copy.deepcopy(result)
+
+        task = asyncio.ensure_future(fn())
+        flight = _Flight(task=task)
+        self._flights[key] = flight
+        metrics.incr(f"{self.name}_leader_total", **labels)
+
+        def _forget(done: asyncio.Task[Any]) -> None:
+            if self._flights.get(key) is flight:
+                self._flights.pop(key, None)
+            if not done.cancelled():
+                done.exception()  # mark retrieved if every waiter went away
+
+        task.add_done_callback(_forget)
+        # shield: a cancelled leader must not cancel the followers' request.
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if flight.waiters > 1 else result
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+MISSING: Any = object()
+
+
+class TTLCache(Generic[V]):
+    """Small per-process TTL cache (monotonic clock, bounded size).
+
+    Like the other in-memory helpers in app.core, this is per worker; keep
+    TTLs short and invalidate explicitly on writes.
+    """
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int = 4096) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, V]] = {}
+
+    def get(self, key: Hashable, default: Any = MISSING) -> V | Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: V, *, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._evict(time.monotonic())
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        expired = [k for k, (exp, _) in self._entries.items() if exp <= now]
+        for k in expired:
+            self._entries.pop(k, None)
+        if len(self._entries) >= self.max_entries:
+            # Drop the oldest insertion (dicts keep insertion order).
+            self._entries.pop(next(iter(self._entries)), None)
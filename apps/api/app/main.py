@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from urllib.parse import urlparse
 from uuid import uuid4
 
@@ -11,6 +12,8 @@ import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 
 from app.core.config import settings
+from app.core.deadline import request_deadline
+from app.core.json_codec import FastJSONResponse
 from app.routes.admin import router as admin_router
 from app.routes.analytics import router as analytics_router
 from app.routes.analyze import router as analyze_router
@@ -19,12 +22,18 @@ from app.routes.insights import router as insights_router
 from app.routes.me import router as me_router
 from app.routes.preferences import router as preferences_router
 from app.routes.parse import router as parse_router
-from app.routes.recovery import router as recovery_router
+from app.routes.recovery import router as recovery_router, scheduled_jobs
 from app.routes.reports import router as reports_router
 from app.routes.suggest import router as suggest_router
 from app.routes.reflect import router as reflect_router
 from app.routes.stripe_routes import router as stripe_router
 from app.routes.trends import router as trends_router
+from app.services import (
+    activity_metrics,
+    cohort_cache,
+    cron_scheduler,
+    schema_capabilities,
+)
 from app.services.error_log import log_system_error
 from app.services.supabase_auth import get_current_user
 from app.services.supabase_rest import SupabaseRestError, close_http
@@ -32,11 +41,31 @@ from app.services.supabase_rest import SupabaseRestError, close_http
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    background: list[asyncio.Task] = []
+    if settings.schema_capability_probe_enabled:
+        # Non-blocking: requests use the optimistic path until the first probe lands.
+        background.append(asyncio.create_task(schema_capabilities.run_refresh_loop()))
+    if settings.recovery_scheduler_enabled:
+        jobs = (
+            scheduled_jobs()
+            + cohort_cache.scheduled_jobs()
+            + activity_metrics.scheduled_jobs()
+        )
+        background.append(asyncio.create_task(cron_scheduler.run_scheduler(jobs)))
     yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
     await close_http()
 
 
-app = FastAPI(title="RutineIQ API", version="0.1.0", lifespan=lifespan)
+app = FastAPI(
+    title="RutineIQ API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 
 def _init_sentry() -> None:
@@ -105,6 +134,22 @@ app.add_middleware(
 )
 
 
+# The LLM routes spend most of the budget in the OpenAI call, which has its
+# own timeout and retries; a shared deadline would then fail the report and
+# usage writes after the tokens were paid for.
+_DEADLINE_EXEMPT_PATHS = frozenset({"/api/analyze", "/api/suggest", "/api/reflect"})
+
+
+@app.middleware("http")
+async def apply_request_deadline(request: Request, call_next):
+    # Supabase calls made while handling this request size their timeouts
+    # from what is left of the budget instead of each waiting the full timeout.
+    if request.url.path in _DEADLINE_EXEMPT_PATHS:
+        return await call_next(request)
+    with request_deadline(settings.request_deadline_seconds):
+        return await call_next(request)
+
+
 @app.middleware("http")
 async def attach_correlation_id(request: Request, call_next):
     incoming = (request.headers.get("x-correlation-id") or "").strip()
@@ -166,7 +211,28 @@ async def supabase_rest_error_handler(request: Request, exc: SupabaseRestError):
     )
 
     detail: dict[str, str | None]
-    if is_rls_recursion:
+    headers = {"x-correlation-id": getattr(request.state, "correlation_id", "")}
+    if exc.code == "CIRCUIT_OPEN":
+        retry_after = (exc.details or {}).get("retry_after_seconds") or 1
+        detail = {
+            "message": "Supabase 응답이 불안정해 잠시 요청을 중단했습니다.",
+            "hint": "잠시 후 다시 시도하세요.",
+            "code": exc.code,
+        }
+        headers["retry-after"] = str(max(1, round(retry_after)))
+        # Fail fast: logging would add a write per rejected request to a
+        # backend that is already struggling.
+        return JSONResponse(
+            status_code=503, content={"detail": detail}, headers=headers
+        )
+    if exc.code == "DEADLINE_EXCEEDED":
+        detail = {
+            "message": "요청 처리 시간이 초과되었습니다.",
+            "hint": "잠시 후 다시 시도하세요.",
+            "code": exc.code,
+        }
+        status_code = 504
+    elif is_rls_recursion:
         detail = {
             "message": "Supabase RLS 정책 문제로 데이터 요청이 실패했습니다.",
             "hint": "Supabase SQL Editor에서 supabase/patches/2026-02-10_fix_rls_policy_recursion.sql 을 실행한 뒤 다시 시도하세요.",
@@ -205,7 +271,7 @@ async def supabase_rest_error_handler(request: Request, exc: SupabaseRestError):
     return JSONResponse(
         status_code=status_code,
         content={"detail": detail},
-        headers={"x-correlation-id": getattr(request.state, "correlation_id", "")},
+        headers=headers,
     )
 
 
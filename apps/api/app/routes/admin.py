@@ -6,15 +6,17 @@ from typing import Any
 import stripe
 from fastapi import APIRouter, HTTPException, status
 
+from app.core import metrics
 from app.core.admin import AdminDep
 from app.core.config import settings
+from app.services import schema_capabilities
 from app.services.error_log import log_system_error
 from app.services.stripe_service import (
     init_stripe,
     stripe_is_configured,
     upsert_subscription_row,
 )
-from app.services.supabase_rest import SupabaseRest
+from app.services.supabase_rest import get_service_client
 
 router = APIRouter()
 
@@ -35,7 +37,7 @@ def _effective_plan(sub_row: dict[str, Any] | None) -> str:
 
 @router.get("/admin/users")
 async def admin_users(_: AdminDep) -> dict:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_service_role_key)
+    sb = get_service_client()
 
     profiles = await sb.select(
         "profiles",
@@ -106,7 +108,7 @@ async def admin_users(_: AdminDep) -> dict:
 
 @router.get("/admin/users/{user_id}")
 async def admin_user_detail(user_id: str, _: AdminDep) -> dict:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_service_role_key)
+    sb = get_service_client()
 
     prof = await sb.select(
         "profiles",
@@ -217,7 +219,7 @@ async def admin_sync_subscription(user_id: str, _: AdminDep) -> dict:
             detail="Stripe is not configured",
         )
 
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_service_role_key)
+    sb = get_service_client()
     subs = await sb.select(
         "subscriptions",
         bearer_token=settings.supabase_service_role_key,
@@ -253,7 +255,7 @@ async def admin_sync_subscription(user_id: str, _: AdminDep) -> dict:
 
 @router.get("/admin/errors")
 async def admin_errors(_: AdminDep) -> dict:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_service_role_key)
+    sb = get_service_client()
     rows = await sb.select(
         "system_errors",
         bearer_token=settings.supabase_service_role_key,
@@ -264,3 +266,12 @@ async def admin_errors(_: AdminDep) -> dict:
         },
     )
     return {"errors": rows}
+
+
+@router.get("/admin/metrics")
+async def admin_metrics(_: AdminDep) -> dict:
+    # Per-process counters (single-flight coalescing, etc.).
+    return {
+        "metrics": metrics.snapshot(),
+        "schema_capabilities": schema_capabilities.snapshot(),
+    }
@@ -27,9 +27,17 @@ from app.services.plan import (
     get_subscription_info,
     retention_days_for_plan,
 )
+from app.services import schema_capabilities
+from app.services.log_entries import without_entry_ids
 from app.services.privacy import sanitize_for_llm
+from app.services.profile import get_profile_row
 from app.services.retention import cleanup_expired_reports
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.services.supabase_rest import (
+    SupabaseRest,
+    SupabaseRestError,
+    get_anon_client,
+    get_service_client,
+)
 from app.services.usage import (
     count_daily_analyze_calls,
     estimate_cost_usd,
@@ -385,6 +393,45 @@ def _parse_ts(value: Any) -> datetime | None:
         return None
 
 
+async def _load_log_analysis_updated_at(
+    sb: SupabaseRest, *, bearer_token: str, user_id: str, date_iso: str
+) -> Any:
+    """When the log's analysis input last changed.
+
+    activity_logs.analysis_updated_at ignores writes that only touch entry
+    ids or repeat the same content; updated_at is the fallback before that
+    column's patch.
+    """
+    capability = schema_capabilities.ACTIVITY_LOGS_ANALYSIS_UPDATED_AT
+    include_analysis = schema_capabilities.has(capability)
+    params = {
+        "select": "updated_at",
+        "user_id": f"eq.{user_id}",
+        "date": f"eq.{date_iso}",
+        "limit": 1,
+    }
+    try:
+        rows = await sb.select(
+            "activity_logs",
+            bearer_token=bearer_token,
+            params={
+                **params,
+                "select": "updated_at,analysis_updated_at"
+                if include_analysis
+                else "updated_at",
+            },
+        )
+    except SupabaseRestError as exc:
+        if not include_analysis or not schema_capabilities.is_missing_column_error(exc):
+            raise
+        schema_capabilities.mark(capability, False)
+        rows = await sb.select(
+            "activity_logs", bearer_token=bearer_token, params=params
+        )
+    row = rows[0] if rows else {}
+    return row.get("analysis_updated_at") or row.get("updated_at")
+
+
 def _is_report_stale(*, report_updated_at: Any, log_updated_at: Any) -> bool:
     r_ts = _parse_ts(report_updated_at)
     l_ts = _parse_ts(log_updated_at)
@@ -1565,10 +1612,8 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
         window_seconds=60,
     )
 
-    sb_rls = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    sb_service = SupabaseRest(
-        str(settings.supabase_url), settings.supabase_service_role_key
-    )
+    sb_rls = get_anon_client()
+    sb_service = get_service_client()
 
     # Profile is optional for first analysis; unknown fields are handled in prompt-level personalization.
     previous_report = await sb_rls.select(
@@ -1581,19 +1626,11 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
             "order": "date.desc",
         },
     )
-    profile_rows = await sb_rls.select(
-        "profiles",
-        bearer_token=auth.access_token,
-        params={
-            "select": "age_group,gender,job_family,work_mode,goal_keyword,goal_minutes_per_day",
-            "id": f"eq.{auth.user_id}",
-            "limit": 1,
-        },
-    )
-    missing_profile_fields = _missing_required_profile_fields(
-        profile_rows[0] if profile_rows else None
+    profile_row = await get_profile_row(
+        user_id=auth.user_id, access_token=auth.access_token
     )
-    profile_context = _profile_prompt_context(profile_rows[0] if profile_rows else None)
+    missing_profile_fields = _missing_required_profile_fields(profile_row)
+    profile_context = _profile_prompt_context(profile_row)
     profile_required_coverage = _profile_required_fields_coverage(profile_context)
 
     # Cache: if report already exists and not forcing, return it without consuming usage.
@@ -1610,17 +1647,12 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
     if existing and not body.force:
         row = existing[0]
         row_locale = _extract_locale_from_model(row.get("model")) or "en"
-        log_meta = await sb_rls.select(
-            "activity_logs",
+        log_updated_at = await _load_log_analysis_updated_at(
+            sb_rls,
             bearer_token=auth.access_token,
-            params={
-                "select": "updated_at",
-                "user_id": f"eq.{auth.user_id}",
-                "date": f"eq.{body.date.isoformat()}",
-                "limit": 1,
-            },
+            user_id=auth.user_id,
+            date_iso=body.date.isoformat(),
         )
-        log_updated_at = log_meta[0].get("updated_at") if log_meta else None
         stale = _is_report_stale(
             report_updated_at=row.get("updated_at"),
             log_updated_at=log_updated_at,
@@ -1661,20 +1693,25 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
         )
 
     # Load activity log for the target date (may be empty).
+    include_meta = schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META)
+    log_fields = "date,entries,note,meta" if include_meta else "date,entries,note"
     try:
         logs = await sb_rls.select(
             "activity_logs",
             bearer_token=auth.access_token,
             params={
-                "select": "date,entries,note,meta",
+                "select": log_fields,
                 "user_id": f"eq.{auth.user_id}",
                 "date": f"eq.{body.date.isoformat()}",
                 "limit": 1,
             },
         )
     except SupabaseRestError as exc:
-        if not _is_missing_meta_column(exc):
+        if not include_meta or not _is_missing_meta_column(exc):
             raise
+        schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
+        include_meta = False
+        log_fields = "date,entries,note"
         logs = await sb_rls.select(
             "activity_logs",
             bearer_token=auth.access_token,
@@ -1692,6 +1729,7 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
     )
     if not isinstance(activity_log.get("meta"), dict):
         activity_log["meta"] = {}
+    activity_log["entries"] = without_entry_ids(activity_log.get("entries"))
     sanitized_activity_log = sanitize_for_llm(activity_log)
 
     try:
@@ -1699,7 +1737,7 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
             "activity_logs",
             bearer_token=auth.access_token,
             params={
-                "select": "date,entries,note,meta",
+                "select": log_fields,
                 "user_id": f"eq.{auth.user_id}",
                 "date": f"lte.{body.date.isoformat()}",
                 "order": "date.desc",
@@ -1707,8 +1745,9 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
             },
         )
     except SupabaseRestError as exc:
-        if not _is_missing_meta_column(exc):
+        if not include_meta or not _is_missing_meta_column(exc):
             raise
+        schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
         recent_rows = await sb_rls.select(
             "activity_logs",
             bearer_token=auth.access_token,
@@ -1723,6 +1762,8 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
     for row in recent_rows:
         if isinstance(row, dict) and not isinstance(row.get("meta"), dict):
             row["meta"] = {}
+        if isinstance(row, dict):
+            row["entries"] = without_entry_ids(row.get("entries"))
     recent_trends = _compute_recent_trends(recent_logs=sanitize_for_llm(recent_rows))
 
     # Load yesterday's report to compare "plan vs actual"
@@ -1746,6 +1787,8 @@ async def analyze_day(body: AnalyzeRequest, request: Request, auth: AuthDep) ->
     if request_key:
         idempotency_key = f"analyze:{auth.user_id}:{target_locale}:{request_key}"
     else:
+        # Stays on stdlib json: the keys must not change with JSON_CODEC or
+        # across deploys, and the codec backends differ on some values.
         fingerprint_source = json.dumps(
             {
                 "date": body.date.isoformat(),
@@ -6,11 +6,13 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException, Query, status
 
-from app.core.config import settings
-from app.core.security import AuthDep
+from app.core.security import AuthContext, AuthDep
 from app.schemas.insights import (
     ConsistencyPayload,
     GoalPrefs,
+    InsightsBucket,
+    InsightsGranularity,
+    InsightsRollupResponse,
     InsightsWeeklyResponse,
     StreakPayload,
     WeeklyTrendPayload,
@@ -18,8 +20,11 @@ from app.schemas.insights import (
     WeeklySeriesPoint,
     WeeklySummaryPayload,
 )
+from app.services import schema_capabilities
+from app.services.profile import get_profile_row
+from app.services.log_calendar import load_log_calendar
 from app.services.streaks import compute_streaks, extract_log_dates
-from app.services.supabase_rest import SupabaseRest
+from app.services.supabase_rest import SupabaseRest, SupabaseRestError, get_anon_client
 
 router = APIRouter()
 
@@ -99,6 +104,105 @@ def _weekly_pattern(
     return "stable"
 
 
+def _goal_prefs(profile: dict[str, Any]) -> GoalPrefs | None:
+    goal_keyword = profile.get("goal_keyword")
+    goal_minutes_raw = profile.get("goal_minutes_per_day")
+    goal_minutes = int(goal_minutes_raw) if isinstance(goal_minutes_raw, int) else None
+    if (
+        isinstance(goal_keyword, str)
+        and goal_keyword.strip()
+        and isinstance(goal_minutes, int)
+        and goal_minutes > 0
+    ):
+        return GoalPrefs(keyword=goal_keyword.strip(), minutes_per_day=goal_minutes)
+    return None
+
+
+def _bucket_start(day: Date, granularity: InsightsGranularity) -> Date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day
+
+
+def _next_bucket_start(start: Date, granularity: InsightsGranularity) -> Date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity in ("month", "quarter"):
+        months = start.month - 1 + (1 if granularity == "month" else 3)
+        return start.replace(year=start.year + months // 12, month=months % 12 + 1)
+    return start + timedelta(days=1)
+
+
+async def _load_insight_days(
+    sb: SupabaseRest,
+    *,
+    auth: AuthContext,
+    from_date: Date,
+    to_date: Date,
+    goal_keyword: str | None,
+) -> list[tuple[Date, int, int]]:
+    """(date, blocks, deep_minutes) for each logged day in the range.
+
+    The activity_insight_days RPC computes the per-day values next to the
+    data; without it the entries are loaded and reduced here.
+    """
+    capability = schema_capabilities.ACTIVITY_INSIGHT_DAYS
+    rows: list[dict[str, Any]] | None = None
+    if schema_capabilities.has(capability):
+        try:
+            rows = await sb.rpc(
+                "activity_insight_days",
+                bearer_token=auth.access_token,
+                params={
+                    "p_user_id": auth.user_id,
+                    "p_from": from_date.isoformat(),
+                    "p_to": to_date.isoformat(),
+                    "p_goal_keyword": goal_keyword,
+                },
+            )
+        except SupabaseRestError as exc:
+            if not schema_capabilities.is_missing_function_error(exc):
+                raise
+            schema_capabilities.mark(capability, False)
+
+    if rows is None:
+        raw_rows = await sb.select(
+            "activity_logs",
+            bearer_token=auth.access_token,
+            params={
+                "select": "date,entries",
+                "and": f"(user_id.eq.{auth.user_id},date.gte.{from_date.isoformat()},date.lte.{to_date.isoformat()})",
+                "order": "date.asc",
+                "limit": 5000,
+            },
+        )
+        rows = []
+        for row in raw_rows:
+            entries = _coerce_entries(row.get("entries"))
+            rows.append(
+                {
+                    "date": row.get("date"),
+                    "blocks": len(entries),
+                    "deep_minutes": _deep_minutes(entries, goal_keyword),
+                }
+            )
+
+    out: list[tuple[Date, int, int]] = []
+    for row in rows:
+        try:
+            day = Date.fromisoformat(str(row.get("date")))
+        except ValueError:
+            continue
+        out.append(
+            (day, int(row.get("blocks") or 0), int(row.get("deep_minutes") or 0))
+        )
+    return out
+
+
 @router.get("/insights/weekly", response_model=InsightsWeeklyResponse)
 async def get_weekly_insights(
     auth: AuthDep,
@@ -117,54 +221,48 @@ async def get_weekly_insights(
             detail="Date window cannot exceed 31 days",
         )
 
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client(coalesce_selects=True)
 
-    profile_rows = await sb.select(
-        "profiles",
-        bearer_token=auth.access_token,
-        params={
-            "select": "goal_keyword,goal_minutes_per_day",
-            "id": f"eq.{auth.user_id}",
-            "limit": 1,
-        },
-    )
-    profile = profile_rows[0] if profile_rows else {}
-    goal_keyword = profile.get("goal_keyword")
-    goal_minutes_raw = profile.get("goal_minutes_per_day")
-    goal_minutes = int(goal_minutes_raw) if isinstance(goal_minutes_raw, int) else None
-    goal = (
-        GoalPrefs(keyword=goal_keyword.strip(), minutes_per_day=goal_minutes)
-        if isinstance(goal_keyword, str)
-        and goal_keyword.strip()
-        and isinstance(goal_minutes, int)
-        and goal_minutes > 0
-        else None
+    profile = (
+        await get_profile_row(user_id=auth.user_id, access_token=auth.access_token)
+        or {}
     )
+    goal = _goal_prefs(profile)
 
     # For cumulative consistency score (days logged / days since first log).
-    until_rows = await sb.select(
-        "activity_logs",
-        bearer_token=auth.access_token,
-        params={
-            "select": "date",
-            "user_id": f"eq.{auth.user_id}",
-            "date": f"lte.{to_date.isoformat()}",
-            "order": "date.asc",
-            "limit": 5000,
-        },
-    )
-    days_logged_total = len(until_rows)
-    streak_current, streak_longest = compute_streaks(
-        log_dates=extract_log_dates(until_rows),
-        anchor_date=to_date,
+    calendar = await load_log_calendar(
+        sb, bearer_token=auth.access_token, user_id=auth.user_id
     )
-    if days_logged_total:
-        earliest_raw = until_rows[0].get("date")
-        try:
-            earliest = Date.fromisoformat(str(earliest_raw))
-        except ValueError:
-            earliest = to_date
-        days_total = max(1, (to_date - earliest).days + 1)
+    if calendar is not None:
+        days_logged_total = calendar.days_logged(until=to_date)
+        streak_current, streak_longest = calendar.streaks(anchor_date=to_date)
+        earliest_logged = calendar.first_logged() if days_logged_total else None
+    else:
+        until_rows = await sb.select(
+            "activity_logs",
+            bearer_token=auth.access_token,
+            params={
+                "select": "date",
+                "user_id": f"eq.{auth.user_id}",
+                "date": f"lte.{to_date.isoformat()}",
+                "order": "date.asc",
+                "limit": 5000,
+            },
+        )
+        days_logged_total = len(until_rows)
+        streak_current, streak_longest = compute_streaks(
+            log_dates=extract_log_dates(until_rows),
+            anchor_date=to_date,
+        )
+        earliest_logged = None
+        if days_logged_total:
+            earliest_raw = until_rows[0].get("date")
+            try:
+                earliest_logged = Date.fromisoformat(str(earliest_raw))
+            except ValueError:
+                earliest_logged = to_date
+    if days_logged_total and earliest_logged is not None:
+        days_total = max(1, (to_date - earliest_logged).days + 1)
     else:
         days_total = window_days
     score = int(round((days_logged_total / days_total) * 100)) if days_total > 0 else 0
@@ -258,3 +356,74 @@ async def get_weekly_insights(
         streak=StreakPayload(current=streak_current, longest=streak_longest),
         trend=trend,
     )
+
+
+@router.get("/insights/rollup", response_model=InsightsRollupResponse)
+async def get_insights_rollup(
+    auth: AuthDep,
+    from_date: Date = Query(..., alias="from"),
+    to_date: Date = Query(..., alias="to"),
+    granularity: InsightsGranularity = Query(default="week"),
+) -> InsightsRollupResponse:
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="'to' must be greater than or equal to 'from'",
+        )
+    window_days = (to_date - from_date).days + 1
+    if window_days > 366:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Date window cannot exceed 366 days",
+        )
+
+    profile = (
+        await get_profile_row(user_id=auth.user_id, access_token=auth.access_token)
+        or {}
+    )
+    goal = _goal_prefs(profile)
+    days = await _load_insight_days(
+        get_anon_client(coalesce_selects=True),
+        auth=auth,
+        from_date=from_date,
+        to_date=to_date,
+        goal_keyword=goal.keyword if goal else None,
+    )
+
+    # Bucket bounds are clipped to the requested range.
+    buckets: dict[Date, InsightsBucket] = {}
+    start = _bucket_start(from_date, granularity)
+    while start <= to_date:
+        next_start = _next_bucket_start(start, granularity)
+        bucket_start = max(start, from_date)
+        bucket_end = min(next_start - timedelta(days=1), to_date)
+        buckets[start] = InsightsBucket(
+            start=bucket_start,
+            end=bucket_end,
+            days_logged=0,
+            days_total=(bucket_end - bucket_start).days + 1,
+            blocks=0,
+            deep_minutes=0,
+        )
+        start = next_start
+
+    for day, blocks, deep_mins in days:
+        bucket = buckets.get(_bucket_start(day, granularity))
+        if bucket is None or not from_date <= day <= to_date:
+            continue
+        bucket.days_logged += 1
+        bucket.blocks += blocks
+        bucket.deep_minutes += deep_mins
+
+    ordered = list(buckets.values())
+    return InsightsRollupResponse(
+        from_date=from_date,
+        to_date=to_date,
+        granularity=granularity,
+        days_logged=sum(b.days_logged for b in ordered),
+        days_total=window_days,
+        total_blocks=sum(b.blocks for b in ordered),
+        deep_minutes=sum(b.deep_minutes for b in ordered),
+        goal=goal,
+        buckets=ordered,
+    )
@@ -1,36 +1,59 @@
 from __future__ import annotations
 
 from datetime import date as Date
+from typing import Any, AsyncIterator
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
+from app.core import deadline, metrics
 from app.core.config import settings
+from app.core.json_codec import dumps
 from app.core.security import AuthDep
-from app.schemas.logs import ActivityLogRow, UpsertLogRequest
+from app.schemas.logs import (
+    ActivityLogRow,
+    BulkUpsertLogsRequest,
+    BulkUpsertLogsResponse,
+    PatchLogEntriesRequest,
+    SyncAppliedLog,
+    SyncLogConflict,
+    SyncLogsRequest,
+    SyncLogsResponse,
+    UpsertLogRequest,
+)
 from app.services.error_log import log_system_error
-from app.services.streaks import compute_streaks, extract_log_dates
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.services import schema_capabilities
+from app.services.log_calendar import load_log_calendar
+from app.services.log_entries import (
+    EntryNotFound,
+    apply_entry_changes,
+    etag_matches,
+    log_etag,
+    with_entry_ids,
+)
+from app.services.profile import invalidate_profile_cache
+from app.services.streaks import (
+    StreakState,
+    advance_streak,
+    compute_streaks,
+    extract_log_dates,
+)
+from app.services.supabase_rest import SupabaseRest, SupabaseRestError, get_anon_client
 
 router = APIRouter()
 
+# Rows per POST in /logs/bulk and per page in /logs/export.
+_BULK_CHUNK_SIZE = 100
+_EXPORT_PAGE_SIZE = 200
+_EXPORT_FIELDS = ("date", "entries", "note", "meta")
+
 
 def _is_missing_meta_column(exc: SupabaseRestError) -> bool:
     msg = str(exc).lower()
     return exc.code == "42703" or ("column" in msg and "meta" in msg)
 
 
-def _is_conflict_error(exc: SupabaseRestError) -> bool:
-    msg = str(exc).lower()
-    details = str(exc.details).lower() if exc.details is not None else ""
-    return (
-        exc.status_code == 409
-        or exc.code == "23505"
-        or "duplicate key" in msg
-        or "duplicate key" in details
-        or "conflict" in msg
-    )
-
-
 async def _select_existing_log_row(
     sb: SupabaseRest,
     *,
@@ -57,6 +80,7 @@ async def _select_existing_log_row(
         )
     except SupabaseRestError as exc:
         if include_meta and _is_missing_meta_column(exc):
+            schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
             return await _select_existing_log_row(
                 sb,
                 bearer_token=bearer_token,
@@ -74,108 +98,307 @@ async def _select_existing_log_row(
     return row
 
 
+def _log_row(body: UpsertLogRequest, *, user_id: str, include_meta: bool) -> dict:
+    date_iso = body.date.isoformat()
+    row: dict[str, Any] = {
+        "user_id": user_id,
+        "date": date_iso,
+        "entries": with_entry_ids(
+            [e.model_dump() for e in body.entries], date_iso=date_iso
+        ),
+        "note": body.note,
+    }
+    if include_meta:
+        row["meta"] = body.meta.model_dump(exclude_none=True) if body.meta else {}
+    return row
+
+
+def _client_row(row: dict[str, Any]) -> dict[str, Any]:
+    """A stored row as clients see it: entry ids filled, meta a dict."""
+    item = dict(row)
+    item["entries"] = with_entry_ids(
+        item.get("entries") or [], date_iso=str(item.get("date"))
+    )
+    if not isinstance(item.get("meta"), dict):
+        item["meta"] = {}
+    return item
+
+
 async def _save_log_row(
     sb: SupabaseRest,
     *,
     bearer_token: str,
-    user_id: str,
-    date_iso: str,
     row_with_meta: dict,
     base_row: dict,
 ) -> dict:
-    """Create or update an activity log using PATCH-first, INSERT-fallback pattern.
+    """Create or update the day's activity log in one upsert.
 
-    PATCH (HTTP PATCH) updates an existing row and never returns 409.
-    If no row exists (PATCH returns 0 rows), INSERT creates it.
-    A race-condition SELECT guards against concurrent-insert edge cases.
+    POST with on_conflict=user_id,date merges into the existing row through
+    the activity_logs_user_date_unique constraint, so concurrent first saves
+    of a day cannot race into a duplicate-key error.
     """
-    filter_params = {"user_id": f"eq.{user_id}", "date": f"eq.{date_iso}"}
-    include_meta = True
-    active_row: dict = row_with_meta
-
-    # ── Step 1: UPDATE existing row (PATCH never 409s on existing rows) ───────
+    include_meta = schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META)
     try:
-        updated = await sb.patch(
+        saved = await sb.upsert_one(
             "activity_logs",
             bearer_token=bearer_token,
-            params=filter_params,
-            payload=active_row,
+            row=row_with_meta if include_meta else base_row,
+            on_conflict="user_id,date",
         )
-        if updated:
-            result = dict(updated[0])
-            if not isinstance(result.get("meta"), dict):
-                result["meta"] = {}
-            return result
-        # 0 rows updated → no existing row; fall through to INSERT
     except SupabaseRestError as exc:
-        if _is_missing_meta_column(exc):
+        if not (include_meta and _is_missing_meta_column(exc)):
+            raise
+        schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
+        saved = await sb.upsert_one(
+            "activity_logs",
+            bearer_token=bearer_token,
+            row=base_row,
+            on_conflict="user_id,date",
+        )
+
+    if not isinstance(saved, dict) or not saved:
+        return {}
+    result = dict(saved)
+    if not isinstance(result.get("meta"), dict):
+        result["meta"] = {}
+    return result
+
+
+async def _save_log_rows(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    user_id: str,
+    logs: list[UpsertLogRequest],
+) -> int:
+    """Upsert many days in chunks of _BULK_CHUNK_SIZE rows per request.
+
+    Chunks commit independently; a failed chunk raises after the earlier ones
+    are saved, and re-sending the whole batch is safe.
+    """
+    include_meta = schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META)
+    saved = 0
+    for start in range(0, len(logs), _BULK_CHUNK_SIZE):
+        chunk = logs[start : start + _BULK_CHUNK_SIZE]
+        try:
+            await sb.upsert_many(
+                "activity_logs",
+                bearer_token=bearer_token,
+                rows=[
+                    _log_row(item, user_id=user_id, include_meta=include_meta)
+                    for item in chunk
+                ],
+                on_conflict="user_id,date",
+                returning=False,
+            )
+        except SupabaseRestError as exc:
+            if not (include_meta and _is_missing_meta_column(exc)):
+                raise
+            schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
             include_meta = False
-            active_row = base_row
-            updated = await sb.patch(
+            await sb.upsert_many(
                 "activity_logs",
                 bearer_token=bearer_token,
-                params=filter_params,
-                payload=active_row,
+                rows=[
+                    _log_row(item, user_id=user_id, include_meta=False)
+                    for item in chunk
+                ],
+                on_conflict="user_id,date",
+                returning=False,
             )
-            if updated:
-                result = dict(updated[0])
-                result.setdefault("meta", {})
-                return result
-            # Still 0 rows → fall through to INSERT
-        else:
-            raise
+        saved += len(chunk)
+    return saved
 
-    # ── Step 2: INSERT (row didn't exist yet) ─────────────────────────────────
+
+async def _load_streak_state(
+    sb: SupabaseRest, *, bearer_token: str, user_id: str
+) -> StreakState | None:
+    """The profile's streak state, or None before the streak_last_date patch."""
+    if not schema_capabilities.has(schema_capabilities.PROFILES_STREAK_LAST_DATE):
+        return None
     try:
-        inserted = await sb.insert_one(
-            "activity_logs",
+        rows = await sb.select(
+            "profiles",
             bearer_token=bearer_token,
-            row=active_row,
+            params={
+                "select": "current_streak,longest_streak,streak_last_date",
+                "id": f"eq.{user_id}",
+                "limit": 1,
+            },
         )
-        if isinstance(inserted, dict) and inserted:
-            if not isinstance(inserted.get("meta"), dict):
-                inserted["meta"] = {}
-            return inserted
     except SupabaseRestError as exc:
-        if _is_conflict_error(exc):
-            # Race condition: another request inserted the row between PATCH and INSERT.
-            existing = await _select_existing_log_row(
-                sb,
+        if not schema_capabilities.is_missing_column_error(exc):
+            raise
+        schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, False)
+        return None
+    row = rows[0] if rows else {}
+    last_dates = extract_log_dates([{"date": row.get("streak_last_date")}])
+    return StreakState(
+        current=int(row.get("current_streak") or 0),
+        longest=int(row.get("longest_streak") or 0),
+        last_date=last_dates[0] if last_dates else None,
+    )
+
+
+async def _update_streaks(
+    sb: SupabaseRest, *, bearer_token: str, user_id: str, saved_date: Date
+) -> None:
+    state = await _load_streak_state(sb, bearer_token=bearer_token, user_id=user_id)
+    if state is not None:
+        advanced = advance_streak(state, saved_date)
+        if advanced == state:
+            metrics.incr("streak_updates_total", mode="unchanged")
+            return
+        if advanced is not None and state.last_date is not None:
+            # Conditional on the anchor we read: a concurrent save or a delete
+            # that moved it makes this match nothing, and we recompute.
+            updated = await sb.patch(
+                "profiles",
                 bearer_token=bearer_token,
-                user_id=user_id,
-                date_iso=date_iso,
-                include_meta=include_meta,
+                params={
+                    "id": f"eq.{user_id}",
+                    "streak_last_date": f"eq.{state.last_date.isoformat()}",
+                },
+                payload={
+                    "current_streak": advanced.current,
+                    "longest_streak": advanced.longest,
+                    "streak_last_date": saved_date.isoformat(),
+                },
             )
-            if existing is not None:
-                return existing
-        raise
+            if updated:
+                metrics.incr("streak_updates_total", mode="incremental")
+                invalidate_profile_cache(user_id)
+                return
+
+    await _recompute_streaks(
+        sb,
+        bearer_token=bearer_token,
+        user_id=user_id,
+        saved_date=saved_date,
+        track_anchor=state is not None,
+    )
+
+
+async def _recompute_streaks(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    user_id: str,
+    saved_date: Date,
+    track_anchor: bool,
+) -> None:
+    metrics.incr("streak_updates_total", mode="recompute")
+    calendar = await load_log_calendar(sb, bearer_token=bearer_token, user_id=user_id)
+    if calendar is not None:
+        current_streak, longest_streak = calendar.streaks(anchor_date=saved_date)
+        latest = calendar.last_logged()
+    else:
+        streak_rows = await sb.select(
+            "activity_logs",
+            bearer_token=bearer_token,
+            params={
+                "select": "date",
+                "user_id": f"eq.{user_id}",
+                "order": "date.desc",
+                "limit": 5000,
+            },
+        )
+        log_dates = extract_log_dates(streak_rows)
+        current_streak, longest_streak = compute_streaks(
+            log_dates=[day for day in log_dates if day <= saved_date],
+            anchor_date=saved_date,
+        )
+        latest = max(log_dates, default=None)
+    row: dict = {
+        "id": user_id,
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+    }
+    if track_anchor:
+        # A back-dated save leaves no valid anchor; the next save recomputes.
+        row["streak_last_date"] = (
+            saved_date.isoformat() if latest == saved_date else None
+        )
+    await sb.upsert_one(
+        "profiles",
+        bearer_token=bearer_token,
+        on_conflict="id",
+        row=row,
+    )
+    invalidate_profile_cache(user_id)
 
-    return {}
+
+async def _latest_log_date(
+    sb: SupabaseRest, *, bearer_token: str, user_id: str
+) -> Date | None:
+    calendar = await load_log_calendar(sb, bearer_token=bearer_token, user_id=user_id)
+    if calendar is not None:
+        return calendar.last_logged()
+    rows = await sb.select(
+        "activity_logs",
+        bearer_token=bearer_token,
+        params={
+            "select": "date",
+            "user_id": f"eq.{user_id}",
+            "order": "date.desc",
+            "limit": 1,
+        },
+    )
+    log_dates = extract_log_dates(rows)
+    return max(log_dates, default=None)
+
+
+async def _recompute_batch_streaks(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    user_id: str,
+    saved_date: Date | None,
+    route: str,
+    meta: dict[str, Any],
+) -> None:
+    # Filled-in gaps can join or extend runs anywhere in a batch, so the
+    # incremental anchor update does not apply; recompute once for the batch.
+    # Best-effort like the single save: the logs are already committed.
+    try:
+        if saved_date is None:
+            # Deletes only: anchor at the latest day still logged, where the
+            # last single save would have left it. With no logs left any
+            # anchor gives 0/0 and clears streak_last_date.
+            saved_date = (
+                await _latest_log_date(sb, bearer_token=bearer_token, user_id=user_id)
+                or Date.today()
+            )
+        state = await _load_streak_state(sb, bearer_token=bearer_token, user_id=user_id)
+        await _recompute_streaks(
+            sb,
+            bearer_token=bearer_token,
+            user_id=user_id,
+            saved_date=saved_date,
+            track_anchor=state is not None,
+        )
+    except SupabaseRestError as exc:
+        await log_system_error(
+            route=route,
+            message="streak/profile side-effect failed (non-blocking)",
+            user_id=user_id,
+            err=exc,
+            meta={"code": exc.code, "status_code": exc.status_code, **meta},
+        )
 
 
 @router.post("/logs", response_model=ActivityLogRow)
-async def upsert_log(body: UpsertLogRequest, auth: AuthDep) -> ActivityLogRow:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+async def upsert_log(
+    body: UpsertLogRequest, auth: AuthDep, response: Response
+) -> ActivityLogRow:
+    sb = get_anon_client()
     date_iso = body.date.isoformat()
 
-    base_row = {
-        "user_id": auth.user_id,
-        "date": date_iso,
-        "entries": [e.model_dump() for e in body.entries],
-        "note": body.note,
-    }
-    row_with_meta = {
-        **base_row,
-        "meta": body.meta.model_dump(exclude_none=True) if body.meta else {},
-    }
-
     row = await _save_log_row(
         sb,
         bearer_token=auth.access_token,
-        user_id=auth.user_id,
-        date_iso=date_iso,
-        row_with_meta=row_with_meta,
-        base_row=base_row,
+        row_with_meta=_log_row(body, user_id=auth.user_id, include_meta=True),
+        base_row=_log_row(body, user_id=auth.user_id, include_meta=False),
     )
 
     if not row:
@@ -187,30 +410,11 @@ async def upsert_log(body: UpsertLogRequest, auth: AuthDep) -> ActivityLogRow:
     # Keep streak fields persisted on profile for fast dashboard access.
     # This must be best-effort: never fail the main /logs save on auxiliary errors.
     try:
-        streak_rows = await sb.select(
-            "activity_logs",
+        await _update_streaks(
+            sb,
             bearer_token=auth.access_token,
-            params={
-                "select": "date",
-                "user_id": f"eq.{auth.user_id}",
-                "date": f"lte.{date_iso}",
-                "order": "date.asc",
-                "limit": 5000,
-            },
-        )
-        current_streak, longest_streak = compute_streaks(
-            log_dates=extract_log_dates(streak_rows),
-            anchor_date=body.date,
-        )
-        await sb.upsert_one(
-            "profiles",
-            bearer_token=auth.access_token,
-            on_conflict="id",
-            row={
-                "id": auth.user_id,
-                "current_streak": current_streak,
-                "longest_streak": longest_streak,
-            },
+            user_id=auth.user_id,
+            saved_date=body.date,
         )
     except SupabaseRestError as exc:
         await log_system_error(
@@ -225,43 +429,341 @@ async def upsert_log(body: UpsertLogRequest, auth: AuthDep) -> ActivityLogRow:
             },
         )
 
+    etag = log_etag(row.get("updated_at"))
+    if etag:
+        response.headers["ETag"] = etag
     return ActivityLogRow.model_validate(row)
 
 
 @router.get("/logs")
 async def get_log(
     auth: AuthDep,
+    response: Response,
     date: Date = Query(..., description="YYYY-MM-DD"),
 ) -> dict:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    params = {
-        "select": "id,user_id,date,entries,note,meta,created_at,updated_at",
-        "user_id": f"eq.{auth.user_id}",
-        "date": f"eq.{date.isoformat()}",
-        "limit": 1,
+    sb = get_anon_client()
+    row = await _select_existing_log_row(
+        sb,
+        bearer_token=auth.access_token,
+        user_id=auth.user_id,
+        date_iso=date.isoformat(),
+        include_meta=schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META),
+    )
+    if row is None:
+        return {"date": date.isoformat(), "entries": [], "note": None, "meta": {}}
+    row["entries"] = with_entry_ids(row.get("entries") or [], date_iso=date.isoformat())
+    etag = log_etag(row.get("updated_at"))
+    if etag:
+        response.headers["ETag"] = etag
+    return row
+
+
+@router.patch("/logs/{log_date}/entries", response_model=ActivityLogRow)
+async def patch_log_entries(
+    log_date: Date,
+    body: PatchLogEntriesRequest,
+    auth: AuthDep,
+    response: Response,
+    if_match: str | None = Header(default=None, alias="If-Match"),
+) -> ActivityLogRow:
+    """Add, update or remove single entries of a saved day.
+
+    Requires the ETag from GET/POST /logs in If-Match. The write is
+    conditional on the row's updated_at, so a concurrent save turns into 412
+    instead of being overwritten.
+    """
+    if not if_match:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match header with the log's ETag is required",
+        )
+    sb = get_anon_client()
+    date_iso = log_date.isoformat()
+    current = await _select_existing_log_row(
+        sb,
+        bearer_token=auth.access_token,
+        user_id=auth.user_id,
+        date_iso=date_iso,
+        include_meta=schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META),
+    )
+    if current is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Log not found"
+        )
+    etag = log_etag(current.get("updated_at"))
+    if not etag_matches(if_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Log changed since it was read; reload and retry",
+            headers={"ETag": etag} if etag else None,
+        )
+
+    entries = with_entry_ids(current.get("entries") or [], date_iso=date_iso)
+    try:
+        merged = apply_entry_changes(
+            entries,
+            add=[e.model_dump() for e in body.add],
+            update=[(u.id, u.set) for u in body.update],
+            remove=body.remove,
+        )
+    except EntryNotFound as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"message": "Entry not found", "entry_id": exc.entry_id},
+        ) from exc
+    note = body.note if "note" in body.model_fields_set else current.get("note")
+    try:
+        validated = UpsertLogRequest.model_validate(
+            {"date": log_date, "entries": merged, "note": note}
+        )
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.errors(
+                include_url=False, include_context=False, include_input=False
+            ),
+        ) from exc
+
+    payload = {
+        "entries": [e.model_dump() for e in validated.entries],
+        "note": validated.note,
     }
+    if payload["entries"] == entries and payload["note"] == current.get("note"):
+        metrics.incr("log_entry_patches_total", result="noop")
+        if etag:
+            response.headers["ETag"] = etag
+        return ActivityLogRow.model_validate({**current, "entries": entries})
+
+    updated = await sb.patch(
+        "activity_logs",
+        bearer_token=auth.access_token,
+        params={
+            "user_id": f"eq.{auth.user_id}",
+            "date": f"eq.{date_iso}",
+            "updated_at": f"eq.{current.get('updated_at')}",
+        },
+        payload=payload,
+    )
+    if not updated:
+        metrics.incr("log_entry_patches_total", result="conflict")
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Log changed since it was read; reload and retry",
+        )
+    metrics.incr("log_entry_patches_total", result="written")
+    row = dict(updated[0])
+    if not isinstance(row.get("meta"), dict):
+        row["meta"] = {}
+    new_etag = log_etag(row.get("updated_at"))
+    if new_etag:
+        response.headers["ETag"] = new_etag
+    return ActivityLogRow.model_validate(row)
+
+
+@router.post("/logs/bulk", response_model=BulkUpsertLogsResponse)
+async def bulk_upsert_logs(
+    body: BulkUpsertLogsRequest, auth: AuthDep
+) -> BulkUpsertLogsResponse:
+    sb = get_anon_client()
+    saved = await _save_log_rows(
+        sb, bearer_token=auth.access_token, user_id=auth.user_id, logs=body.logs
+    )
+    dates = [item.date for item in body.logs]
+    from_date, to_date = min(dates), max(dates)
+    await _recompute_batch_streaks(
+        sb,
+        bearer_token=auth.access_token,
+        user_id=auth.user_id,
+        saved_date=to_date,
+        route="/api/logs/bulk",
+        meta={"saved": saved},
+    )
+    return BulkUpsertLogsResponse(saved=saved, from_date=from_date, to_date=to_date)
+
+
+def _sync_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Log sync is not available yet; save logs with POST /api/logs",
+    )
+
+
+@router.post("/logs/sync", response_model=SyncLogsResponse)
+async def sync_logs(body: SyncLogsRequest, auth: AuthDep) -> SyncLogsResponse:
+    """Apply a batch of offline edits and return what changed on the server.
+
+    The sync_activity_logs RPC applies the batch in one transaction. A
+    mutation is written only if the day's updated_at still equals its
+    base_version; the others come back as conflicts with the server row.
+    There is no per-request fallback: without the RPC the batch would not be
+    atomic, so clients get 503 and keep using POST /logs.
+    """
+    capability = schema_capabilities.SYNC_ACTIVITY_LOGS
+    if not schema_capabilities.has(capability):
+        raise _sync_unavailable()
+    sb = get_anon_client()
+    mutations = []
+    for item in body.mutations:
+        row = _log_row(item, user_id=auth.user_id, include_meta=True)
+        mutations.append(
+            {
+                "date": row["date"],
+                "base_version": (
+                    item.base_version.isoformat() if item.base_version else None
+                ),
+                "deleted": item.deleted,
+                "entries": row["entries"],
+                "note": row["note"],
+                "meta": row["meta"],
+            }
+        )
     try:
-        rows = await sb.select(
-            "activity_logs",
+        rows = await sb.rpc(
+            "sync_activity_logs",
             bearer_token=auth.access_token,
-            params=params,
+            params={
+                "p_user_id": auth.user_id,
+                "p_mutations": mutations,
+                "p_since": body.since.isoformat() if body.since else None,
+            },
         )
     except SupabaseRestError as exc:
-        if not _is_missing_meta_column(exc):
+        if not schema_capabilities.is_missing_function_error(exc):
             raise
+        schema_capabilities.mark(capability, False)
+        raise _sync_unavailable() from exc
+
+    result = rows[0] if rows else {}
+    applied = [SyncAppliedLog.model_validate(a) for a in result.get("applied") or []]
+    conflicts = [
+        SyncLogConflict(
+            date=c["date"],
+            server=_client_row(c["server"])
+            if isinstance(c.get("server"), dict)
+            else None,
+        )
+        for c in result.get("conflicts") or []
+    ]
+    written = [a for a in applied if a.written]
+    saved = [a.date for a in written if not a.deleted]
+    metrics.incr("log_sync_mutations_total", len(written), result="written")
+    metrics.incr(
+        "log_sync_mutations_total", len(applied) - len(written), result="unchanged"
+    )
+    metrics.incr("log_sync_mutations_total", len(conflicts), result="conflict")
+
+    if written:
+        await _recompute_batch_streaks(
+            sb,
+            bearer_token=auth.access_token,
+            user_id=auth.user_id,
+            saved_date=max(saved) if saved else None,
+            route="/api/logs/sync",
+            meta={"written": len(written)},
+        )
+
+    return SyncLogsResponse(
+        applied=applied,
+        conflicts=conflicts,
+        changes=[_client_row(r) for r in result.get("changes") or []],
+        deleted=result.get("deleted") or [],
+        cursor=str(result.get("cursor") or ""),
+    )
+
+
+async def _select_export_page(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    user_id: str,
+    from_date: Date,
+    to_date: Date,
+    after: str | None,
+) -> list[dict]:
+    """Up to _EXPORT_PAGE_SIZE logs in date order, strictly after `after`."""
+    include_meta = schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META)
+    lower = f"date.gt.{after}" if after else f"date.gte.{from_date.isoformat()}"
+    try:
         rows = await sb.select(
             "activity_logs",
-            bearer_token=auth.access_token,
+            bearer_token=bearer_token,
             params={
-                "select": "id,user_id,date,entries,note,created_at,updated_at",
-                "user_id": f"eq.{auth.user_id}",
-                "date": f"eq.{date.isoformat()}",
-                "limit": 1,
+                "select": (
+                    "date,entries,note,meta" if include_meta else "date,entries,note"
+                ),
+                "and": f"(user_id.eq.{user_id},{lower},date.lte.{to_date.isoformat()})",
+                "order": "date.asc",
+                "limit": _EXPORT_PAGE_SIZE,
             },
         )
-    if not rows:
-        return {"date": date.isoformat(), "entries": [], "note": None, "meta": {}}
-    row = dict(rows[0])
-    if not isinstance(row.get("meta"), dict):
-        row["meta"] = {}
-    return row
+    except SupabaseRestError as exc:
+        if not (include_meta and _is_missing_meta_column(exc)):
+            raise
+        schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
+        return await _select_export_page(
+            sb,
+            bearer_token=bearer_token,
+            user_id=user_id,
+            from_date=from_date,
+            to_date=to_date,
+            after=after,
+        )
+    # Exactly the POST /logs body fields, which forbid extras.
+    return [
+        {key: item.get(key) for key in _EXPORT_FIELDS}
+        for item in map(_client_row, rows)
+    ]
+
+
+@router.get("/logs/export")
+async def export_logs(
+    auth: AuthDep,
+    from_date: Date = Query(..., alias="from"),
+    to_date: Date = Query(..., alias="to"),
+) -> StreamingResponse:
+    """Stream the range as NDJSON, one log per line, in date order.
+
+    Lines have the POST /logs body shape, so an export can be fed back to
+    /logs/bulk. Pages are keyed on the last date sent, so memory stays at one
+    page whatever the range, and the request deadline bounds only the first.
+    """
+    if to_date < from_date:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="'to' must be greater than or equal to 'from'",
+        )
+    sb = get_anon_client()
+
+    async def _page(after: str | None) -> list[dict]:
+        return await _select_export_page(
+            sb,
+            bearer_token=auth.access_token,
+            user_id=auth.user_id,
+            from_date=from_date,
+            to_date=to_date,
+            after=after,
+        )
+
+    # Read the first page before answering so auth or schema errors still get
+    # a proper status instead of a truncated 200.
+    first = await _page(None)
+
+    async def _ndjson() -> AsyncIterator[bytes]:
+        page = first
+        while page:
+            yield b"".join(dumps(row) + b"\n" for row in page)
+            if len(page) < _EXPORT_PAGE_SIZE:
+                return
+            # The body streams after the handler returned; each page gets its
+            # own budget instead of the request's, which may be spent by now.
+            with deadline.request_deadline(
+                settings.request_deadline_seconds, fresh=True
+            ):
+                page = await _page(str(page[-1].get("date")))
+
+    filename = f"logs-{from_date.isoformat()}-{to_date.isoformat()}.ndjson"
+    return StreamingResponse(
+        _ndjson(),
+        media_type="application/x-ndjson",
+        headers={"content-disposition": f'attachment; filename="{filename}"'},
+    )
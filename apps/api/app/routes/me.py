@@ -6,7 +6,6 @@ from typing import cast
 from fastapi import APIRouter
 
 from app.core.security import AuthDep
-from app.core.config import settings
 from app.schemas.me import (
     ActivationNextStep,
     ActivationResponse,
@@ -18,7 +17,8 @@ from app.services.plan import (
     get_subscription_info,
     retention_days_for_plan,
 )
-from app.services.supabase_rest import SupabaseRest
+from app.services.profile import get_profile_row
+from app.services.supabase_rest import get_anon_client
 from app.services.usage import count_daily_analyze_calls
 
 router = APIRouter()
@@ -74,15 +74,9 @@ def _profile_complete(row: dict | None) -> bool:
 
 @router.get("/me/activation", response_model=ActivationResponse)
 async def get_my_activation(auth: AuthDep) -> ActivationResponse:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    profile_rows = await sb.select(
-        "profiles",
-        bearer_token=auth.access_token,
-        params={
-            "select": "id,age_group,gender,job_family,work_mode",
-            "id": f"eq.{auth.user_id}",
-            "limit": 1,
-        },
+    sb = get_anon_client(coalesce_selects=True)
+    profile_row = await get_profile_row(
+        user_id=auth.user_id, access_token=auth.access_token
     )
     logs_rows = await sb.select(
         "activity_logs",
@@ -105,7 +99,7 @@ async def get_my_activation(auth: AuthDep) -> ActivationResponse:
         },
     )
 
-    profile_complete = _profile_complete(profile_rows[0] if profile_rows else None)
+    profile_complete = _profile_complete(profile_row)
     has_any_log = bool(logs_rows)
     has_any_report = bool(report_rows)
     activation_complete = profile_complete and has_any_log and has_any_report
@@ -8,10 +8,13 @@ from fastapi import APIRouter, HTTPException, status
 from app.core.config import settings
 from app.core.security import AuthDep
 from app.schemas.preferences import DEFAULT_COMPARE_BY, ProfilePreferences
+from app.services.plan import invalidate_subscription_cache
+from app.services.profile import get_profile_row, invalidate_profile_cache
 from app.services.supabase_rest import (
-    SupabaseRest,
     SupabaseRestError,
+    get_anon_client,
     get_http,
+    get_service_client,
 )
 
 router = APIRouter()
@@ -79,18 +82,9 @@ def _to_preferences(row: dict) -> ProfilePreferences:
 
 @router.get("/preferences/profile", response_model=ProfilePreferences)
 async def get_profile_preferences(auth: AuthDep) -> ProfilePreferences:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    rows = await sb.select(
-        "profiles",
-        bearer_token=auth.access_token,
-        params={
-            "select": "id,age_group,gender,job_family,work_mode,trend_opt_in,trend_compare_by,goal_keyword,goal_minutes_per_day",
-            "id": f"eq.{auth.user_id}",
-            "limit": 1,
-        },
-    )
-    if rows:
-        return _to_preferences(rows[0])
+    row = await get_profile_row(user_id=auth.user_id, access_token=auth.access_token)
+    if row:
+        return _to_preferences(row)
     return ProfilePreferences()
 
 
@@ -111,7 +105,7 @@ async def upsert_profile_preferences(
         "goal_minutes_per_day": body.goal_minutes_per_day,
     }
 
-    sb_rls = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb_rls = get_anon_client()
     try:
         row = await sb_rls.upsert_one(
             "profiles",
@@ -123,15 +117,14 @@ async def upsert_profile_preferences(
         # Fallback for environments where profile insert/update RLS is temporarily inconsistent.
         if not _is_rls_write_failure(exc):
             raise
-        sb_service = SupabaseRest(
-            str(settings.supabase_url), settings.supabase_service_role_key
-        )
+        sb_service = get_service_client()
         row = await sb_service.upsert_one(
             "profiles",
             bearer_token=settings.supabase_service_role_key,
             on_conflict="id",
             row=row_data,
         )
+    invalidate_profile_cache(auth.user_id)
     if not row:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -142,7 +135,7 @@ async def upsert_profile_preferences(
 
 @router.delete("/preferences/data")
 async def delete_my_data(auth: AuthDep) -> dict[str, bool]:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
     # Core user data tables only; profile/auth records stay intact.
     await sb.delete(
         "ai_reports",
@@ -166,7 +159,7 @@ async def delete_my_account(auth: AuthDep) -> dict[str, bool]:
             detail="Account deletion is temporarily unavailable",
         )
 
-    sb_service = SupabaseRest(str(settings.supabase_url), service_token)
+    sb_service = get_service_client()
     user_id = auth.user_id
 
     # ── Step 1: Wipe all user data with service role (bypasses RLS) ───────────
@@ -187,6 +180,8 @@ async def delete_my_account(auth: AuthDep) -> dict[str, bool]:
             )
         except Exception:
             pass  # Cascade from auth-user deletion is the fallback
+    invalidate_profile_cache(user_id)
+    invalidate_subscription_cache(user_id)
 
     # ── Step 2: Delete auth user via GoTrue Admin API ─────────────────────────
     admin_url = (
@@ -1,25 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import math
 import re
 import secrets
+import time
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from statistics import median
-from typing import Any
+from typing import Any, AsyncIterator, Literal, NoReturn
 from uuid import uuid4
 
 import sentry_sdk
 from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
+from app.core import deadline
 from app.core.config import settings
+from app.core.fanout import DEADLINE_EXCEEDED, FAILED, fan_out
 from app.core.idempotency import (
     claim_idempotency_key,
     clear_idempotency_key,
     mark_idempotency_done,
 )
-from app.core.security import AuthDep
+from app.core.security import AuthContext, AuthDep
+from app.core.ttl_cache import TTLCache
 from app.schemas.recovery import (
     CheckinSubmittedEventMeta,
     LapseDetectedEventMeta,
@@ -34,6 +39,7 @@ from app.schemas.recovery import (
     RecoveryCompleteRequest,
     RecoveryCompleteResponse,
     RecoveryCompletedEventMeta,
+    RecoveryCronHealthResponse,
     RecoveryLapseRequest,
     RecoveryModeOpenedEventMeta,
     RecoveryModeOpenedRequest,
@@ -46,15 +52,28 @@ from app.schemas.recovery import (
     RecoverySessionResponse,
     RecoverySummaryResponse,
 )
+from app.services import schema_capabilities
+from app.services.cron_scheduler import ScheduledJob
 from app.services.error_log import log_system_error
+from app.services.nudge_bus import get_nudge_bus
 from app.services.recovery_engine import (
+    LocalHourClock,
     compute_lapse_start,
     decide_auto_lapse,
     decide_nudge,
     to_utc,
 )
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
-from app.services.usage import insert_usage_event
+from app.services.supabase_rest import (
+    SupabaseRest,
+    SupabaseRestError,
+    get_anon_client,
+    get_service_client,
+)
+from app.services.usage import (
+    build_usage_event_row,
+    insert_usage_event,
+    insert_usage_events,
+)
 
 router = APIRouter()
 
@@ -68,6 +87,10 @@ _NUDGE_MESSAGE_BY_LOCALE: dict[str, str] = {
     "es": "No necesitas reiniciar perfecto. Empieza con una accion minima de 2 minutos.",
 }
 
+_USER_STATE_COLUMNS = "user_id,last_engaged_at,lapse_threshold_hours,last_auto_lapse_at,last_nudge_at,locale,timezone,quiet_hours_start,quiet_hours_end,updated_at"
+# user_id=in.(...) lookups per request; keeps the query string well under
+# common proxy URL limits (~37 bytes per UUID).
+_USER_STATE_LOOKUP_CHUNK = 200
 _RECOVERY_REQUIRED_TABLES: tuple[str, ...] = (
     "recovery_sessions",
     "user_recovery_state",
@@ -172,11 +195,6 @@ def _is_unique_open_conflict(exc: SupabaseRestError) -> bool:
     return exc.code == "23505" and "recovery_sessions_one_open_per_user" in msg
 
 
-def _is_unique_nudge_conflict(exc: SupabaseRestError) -> bool:
-    msg = str(exc).lower()
-    return exc.code == "23505" and "recovery_nudges_user_session_channel_uniq" in msg
-
-
 def _is_table_missing_error(exc: SupabaseRestError) -> bool:
     blob = " ".join(
         [
@@ -237,6 +255,73 @@ async def _log_cron_preflight_error(
         pass
 
 
+# Outcome of the last cron preflight, shared by both crons and
+# /recovery/cron/health. Only a passing result short-circuits later runs.
+_cron_preflight: dict[str, Any] = {}
+
+
+def clear_cron_preflight_cache() -> None:
+    _cron_preflight.clear()
+
+
+def _record_cron_preflight(ok: bool, detail: dict[str, Any] | None = None) -> None:
+    _cron_preflight.update(
+        ok=ok,
+        detail=detail,
+        checked_at=_utc_now(),
+        checked_monotonic=time.monotonic(),
+    )
+
+
+def _cron_preflight_age() -> float | None:
+    if not _cron_preflight:
+        return None
+    return time.monotonic() - float(_cron_preflight["checked_monotonic"])
+
+
+def _cron_preflight_fresh() -> bool:
+    ttl = float(settings.recovery_cron_preflight_ttl_seconds)
+    age = _cron_preflight_age()
+    return bool(_cron_preflight.get("ok")) and age is not None and age < ttl
+
+
+async def _fail_cron_preflight(
+    *,
+    route: str,
+    correlation_id: str,
+    detail: dict[str, Any],
+    err: BaseException,
+) -> NoReturn:
+    _record_cron_preflight(False, detail)
+    await _log_cron_preflight_error(
+        route=route,
+        correlation_id=correlation_id,
+        detail=detail,
+        err=err,
+    )
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+    )
+
+
+async def _probe_recovery_table(
+    sb: SupabaseRest, *, bearer_token: str, table: str
+) -> SupabaseRestError | None:
+    try:
+        await sb.select(
+            table,
+            bearer_token=bearer_token,
+            params={
+                "select": _RECOVERY_PREFLIGHT_SELECT_COLUMN.get(table, "id"),
+                "limit": 1,
+            },
+        )
+    except SupabaseRestError as exc:
+        return exc
+    return None
+
+
 async def _ensure_cron_runtime_ready(
     *,
     route: str,
@@ -244,94 +329,84 @@ async def _ensure_cron_runtime_ready(
 ) -> str:
     service_token = (settings.supabase_service_role_key or "").strip()
     if not service_token:
-        detail: dict[str, Any] = {
-            "error": "recovery_cron_preflight_failed",
-            "reason": "service_role_key_missing",
-            "action": "Set SUPABASE_SERVICE_ROLE_KEY before running recovery cron endpoints.",
-        }
-        err = RuntimeError("SUPABASE_SERVICE_ROLE_KEY is not configured")
-        await _log_cron_preflight_error(
+        await _fail_cron_preflight(
             route=route,
             correlation_id=correlation_id,
-            detail=detail,
-            err=err,
+            detail={
+                "error": "recovery_cron_preflight_failed",
+                "reason": "service_role_key_missing",
+                "action": "Set SUPABASE_SERVICE_ROLE_KEY before running recovery cron endpoints.",
+            },
+            err=RuntimeError("SUPABASE_SERVICE_ROLE_KEY is not configured"),
         )
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=detail,
+    if _cron_preflight_fresh():
+        return service_token
+
+    sb = get_service_client()
+    # Tables already known to be missing fail fast without probing; the
+    # registry forgets them after a refresh interval so a migration is noticed.
+    missing_tables = [
+        table
+        for table in _RECOVERY_REQUIRED_TABLES
+        if schema_capabilities.is_known_missing(
+            schema_capabilities.table_capability(table)
         )
+    ]
+    tables_to_probe = () if missing_tables else _RECOVERY_REQUIRED_TABLES
+    probe_errors = await asyncio.gather(
+        *(
+            _probe_recovery_table(sb, bearer_token=service_token, table=table)
+            for table in tables_to_probe
+        )
+    )
 
-    sb = SupabaseRest(str(settings.supabase_url), service_token)
-    missing_tables: list[str] = []
-
-    for table in _RECOVERY_REQUIRED_TABLES:
-        try:
-            await sb.select(
-                table,
-                bearer_token=service_token,
-                params={
-                    "select": _RECOVERY_PREFLIGHT_SELECT_COLUMN.get(table, "id"),
-                    "limit": 1,
-                },
-            )
-        except SupabaseRestError as exc:
-            if _is_table_missing_error(exc):
-                missing_tables.append(table)
-                continue
-            if _is_permission_or_rls_error(exc):
-                detail = {
+    for table, exc in zip(tables_to_probe, probe_errors):
+        if exc is None:
+            schema_capabilities.mark(schema_capabilities.table_capability(table), True)
+            continue
+        if _is_table_missing_error(exc):
+            schema_capabilities.mark(schema_capabilities.table_capability(table), False)
+            missing_tables.append(table)
+            continue
+        if _is_permission_or_rls_error(exc):
+            await _fail_cron_preflight(
+                route=route,
+                correlation_id=correlation_id,
+                detail={
                     "error": "recovery_cron_preflight_failed",
                     "reason": "permission_or_rls",
                     "table": table,
                     "action": "Verify SUPABASE_SERVICE_ROLE_KEY permissions and RLS/policy configuration.",
-                }
-                await _log_cron_preflight_error(
-                    route=route,
-                    correlation_id=correlation_id,
-                    detail=detail,
-                    err=exc,
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=detail,
-                )
-            detail = {
+                },
+                err=exc,
+            )
+        await _fail_cron_preflight(
+            route=route,
+            correlation_id=correlation_id,
+            detail={
                 "error": "recovery_cron_preflight_failed",
                 "reason": "preflight_query_failed",
                 "table": table,
                 "action": "Inspect API/Supabase logs for details and verify recovery schema health.",
-            }
-            await _log_cron_preflight_error(
-                route=route,
-                correlation_id=correlation_id,
-                detail=detail,
-                err=exc,
-            )
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=detail,
-            )
+            },
+            err=exc,
+        )
 
     if missing_tables:
-        detail = {
-            "error": "recovery_cron_preflight_failed",
-            "reason": "missing_tables",
-            "missing_tables": missing_tables,
-            "action": "Apply migrations in order: "
-            + ", ".join(_RECOVERY_MIGRATION_FILES),
-        }
-        err = RuntimeError(f"Missing recovery tables: {', '.join(missing_tables)}")
-        await _log_cron_preflight_error(
+        await _fail_cron_preflight(
             route=route,
             correlation_id=correlation_id,
-            detail=detail,
-            err=err,
-        )
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=detail,
+            detail={
+                "error": "recovery_cron_preflight_failed",
+                "reason": "missing_tables",
+                "missing_tables": missing_tables,
+                "action": "Apply migrations in order: "
+                + ", ".join(_RECOVERY_MIGRATION_FILES),
+            },
+            err=RuntimeError(f"Missing recovery tables: {', '.join(missing_tables)}"),
         )
 
+    _record_cron_preflight(True)
     return service_token
 
 
@@ -448,6 +523,82 @@ async def _track_metric(
     )
 
 
+def _event_usage_row(
+    *,
+    user_id: str,
+    event_type: str,
+    event_meta: dict[str, Any],
+    event_model: Any,
+    correlation_id: str,
+    request_id: str | None = None,
+) -> dict[str, Any]:
+    validated = event_model.model_validate(event_meta)
+    return build_usage_event_row(
+        user_id=user_id,
+        event_date=_utc_now().date(),
+        event_type=event_type,
+        model="recovery-v1",
+        tokens_prompt=None,
+        tokens_completion=None,
+        tokens_total=None,
+        cost_usd=None,
+        meta={
+            **validated.model_dump(mode="json", exclude_none=True),
+            "correlation_id": correlation_id,
+        },
+        request_id=request_id,
+    )
+
+
+def _metric_usage_row(
+    *,
+    user_id: str,
+    metric_name: str,
+    correlation_id: str,
+    reason: str | None = None,
+    session_id: str | None = None,
+) -> dict[str, Any]:
+    return build_usage_event_row(
+        user_id=user_id,
+        event_date=_utc_now().date(),
+        event_type=metric_name,
+        model="recovery-metrics",
+        tokens_prompt=None,
+        tokens_completion=None,
+        tokens_total=None,
+        cost_usd=None,
+        meta={
+            "correlation_id": correlation_id,
+            "reason": reason,
+            "session_id": session_id,
+        },
+        request_id=_metric_request_id(
+            metric_name, user_id, correlation_id, reason or ""
+        ),
+    )
+
+
+def _nudge_suppressed_rows(
+    *, user_id: str, session_id: str, reason: str, correlation_id: str
+) -> list[dict[str, Any]]:
+    return [
+        _event_usage_row(
+            user_id=user_id,
+            event_type="nudge_suppressed",
+            event_meta={"lapse_id": session_id, "reason": reason},
+            event_model=NudgeSuppressedEventMeta,
+            correlation_id=correlation_id,
+        ),
+        _metric_usage_row(
+            user_id=user_id,
+            metric_name="nudge_suppressed_count",
+            correlation_id=correlation_id,
+            reason=reason,
+            session_id=session_id,
+        ),
+    ]
+
+
 async def _get_open_session(
     sb: SupabaseRest, *, auth: AuthDep
 ) -> dict[str, Any] | None:
@@ -491,7 +642,7 @@ async def _get_user_state(
         "user_recovery_state",
         bearer_token=bearer_token,
         params={
-            "select": "user_id,last_engaged_at,lapse_threshold_hours,last_auto_lapse_at,last_nudge_at,locale,timezone,quiet_hours_start,quiet_hours_end,updated_at",
+            "select": _USER_STATE_COLUMNS,
             "user_id": f"eq.{user_id}",
             "limit": 1,
         },
@@ -499,6 +650,129 @@ async def _get_user_state(
     return rows[0] if rows else None
 
 
+async def _get_user_states(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    user_ids: list[str],
+) -> dict[str, dict[str, Any]]:
+    unique_ids = list(dict.fromkeys(user_ids))
+    chunks = [
+        unique_ids[i : i + _USER_STATE_LOOKUP_CHUNK]
+        for i in range(0, len(unique_ids), _USER_STATE_LOOKUP_CHUNK)
+    ]
+    states: dict[str, dict[str, Any]] = {}
+
+    async def _lookup(chunk: list[str]) -> None:
+        rows = await sb.select(
+            "user_recovery_state",
+            bearer_token=bearer_token,
+            params={
+                "select": _USER_STATE_COLUMNS,
+                "user_id": f"in.({','.join(chunk)})",
+            },
+        )
+        for row in rows:
+            user_id = _as_str(row.get("user_id"))
+            if user_id:
+                states[user_id] = row
+
+    result = await fan_out(
+        chunks,
+        _lookup,
+        job="nudge_state_lookup",
+        concurrency=settings.recovery_cron_concurrency,
+        deadline_seconds=settings.recovery_cron_deadline_seconds,
+    )
+    # A partial lookup would read as "missing_state" for the skipped users.
+    if result.errors:
+        raise result.errors[0][1]
+    if DEADLINE_EXCEEDED in result.counts():
+        raise SupabaseRestError(
+            status_code=504,
+            code="DEADLINE_EXCEEDED",
+            message="Recovery cron deadline exceeded during state lookup",
+        )
+    return states
+
+
+def _user_state_merge_row(
+    *,
+    user_id: str,
+    locale: str | None = None,
+    timezone_name: str | None = None,
+    last_engaged_at: datetime | None = None,
+    last_auto_lapse_at: datetime | None = None,
+    last_nudge_at: datetime | None = None,
+) -> dict[str, Any]:
+    def _iso(value: datetime | None) -> str | None:
+        return to_utc(value).isoformat() if value is not None else None
+
+    return {
+        "user_id": user_id,
+        "locale": locale or None,
+        "timezone": timezone_name or None,
+        "last_engaged_at": _iso(last_engaged_at),
+        "last_auto_lapse_at": _iso(last_auto_lapse_at),
+        "last_nudge_at": _iso(last_nudge_at),
+    }
+
+
+async def _merge_user_states(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    rows: list[dict[str, Any]],
+) -> list[dict[str, Any]] | None:
+    """Merge rows from _user_state_merge_row atomically in one round trip.
+
+    Timestamps only move forward and empty locale/timezone keep the stored
+    value. Returns None when the RPC is not deployed so callers can fall back.
+    """
+    capability = schema_capabilities.USER_RECOVERY_STATE_MERGE
+    if not schema_capabilities.has(capability):
+        return None
+    try:
+        merged = await sb.rpc(
+            "upsert_user_recovery_state_batch",
+            bearer_token=bearer_token,
+            params={"p_rows": rows},
+        )
+    except SupabaseRestError as exc:
+        if not schema_capabilities.is_missing_function_error(exc):
+            raise
+        schema_capabilities.mark(capability, False)
+        return None
+    return merged
+
+
+async def _bulk_merge_user_states(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    rows: list[dict[str, Any]],
+) -> None:
+    if not rows:
+        return
+    if await _merge_user_states(sb, bearer_token=bearer_token, rows=rows) is not None:
+        return
+    # Pre-RPC fallback for the crons: their rows carry locale/timezone just
+    # read from the state table, so a plain upsert of the set columns matches
+    # the merge except under concurrent writers.
+    keys = ["user_id", "locale", "timezone"] + [
+        key
+        for key in ("last_engaged_at", "last_auto_lapse_at", "last_nudge_at")
+        if any(row.get(key) for row in rows)
+    ]
+    await sb.upsert_many(
+        "user_recovery_state",
+        bearer_token=bearer_token,
+        rows=[{key: row.get(key) for key in keys} for row in rows],
+        on_conflict="user_id",
+        returning=False,
+    )
+
+
 async def _upsert_user_state(
     sb: SupabaseRest,
     *,
@@ -510,6 +784,24 @@ async def _upsert_user_state(
     last_auto_lapse_at: datetime | None = None,
     last_nudge_at: datetime | None = None,
 ) -> dict[str, Any]:
+    merged = await _merge_user_states(
+        sb,
+        bearer_token=bearer_token,
+        rows=[
+            _user_state_merge_row(
+                user_id=user_id,
+                locale=locale,
+                timezone_name=timezone_name,
+                last_engaged_at=last_engaged_at,
+                last_auto_lapse_at=last_auto_lapse_at,
+                last_nudge_at=last_nudge_at,
+            )
+        ],
+    )
+    if merged is not None:
+        return merged[0] if merged else {}
+
+    # Pre-RPC databases: read-modify-write (not atomic under concurrency).
     current = await _get_user_state(sb, bearer_token=bearer_token, user_id=user_id)
 
     effective_last_engaged = last_engaged_at
@@ -615,7 +907,7 @@ async def create_lapse_session(
 ) -> RecoverySessionResponse:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
     raw_idem = _normalize_idempotency_key(request.headers.get("Idempotency-Key"))
     idem_key = f"recovery:lapse:{auth.user_id}:{raw_idem}" if raw_idem else None
     idem_acquired = False
@@ -677,6 +969,7 @@ async def create_lapse_session(
                         correlation_id=correlation_id,
                     )
             raise
+        _summary_cache.pop(auth.user_id)
 
         try:
             await _track_event(
@@ -745,7 +1038,7 @@ async def get_active_session(
             has_open_session=False,
             correlation_id=correlation_id,
         )
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         row = await _get_open_session(sb, auth=auth)
@@ -794,7 +1087,7 @@ async def track_mode_opened(
 ) -> dict[str, bool]:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         await _ensure_open_session(sb, auth=auth, session_id=body.session_id)
@@ -861,7 +1154,7 @@ async def submit_checkin(
 ) -> dict[str, bool]:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         await _ensure_open_session(sb, auth=auth, session_id=body.session_id)
@@ -932,7 +1225,7 @@ async def start_protocol(
 ) -> dict[str, bool]:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         await _ensure_open_session(sb, auth=auth, session_id=body.session_id)
@@ -1001,7 +1294,7 @@ async def complete_minimum_action(
 ) -> dict[str, bool]:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         await _ensure_open_session(sb, auth=auth, session_id=body.session_id)
@@ -1078,7 +1371,7 @@ async def complete_recovery(
 ) -> RecoveryCompleteResponse:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
     idem_key = f"recovery:complete:{auth.user_id}:{body.session_id}"
 
     idem_state = await claim_idempotency_key(key=idem_key, processing_ttl_seconds=120)
@@ -1148,6 +1441,7 @@ async def complete_recovery(
                 "correlation_id": correlation_id,
             },
         )
+        _summary_cache.pop(auth.user_id)
 
         protocol_type = current.get("protocol_type")
         intensity_level = _as_int(current.get("intensity_level"))
@@ -1212,6 +1506,73 @@ async def complete_recovery(
         )
 
 
+# user_id -> {window_days: (started_count, completed_count, rt_p50 or None)}.
+# Keyed by user so creating or completing a session drops every window.
+_summary_cache: TTLCache[dict[int, tuple[int, int, float | None]]] = TTLCache(
+    ttl_seconds=settings.recovery_summary_cache_ttl_seconds
+)
+
+
+def clear_summary_cache() -> None:
+    _summary_cache.clear()
+
+
+async def _load_recovery_summary(
+    sb: SupabaseRest,
+    *,
+    auth: AuthContext,
+    start_ts: datetime,
+) -> tuple[int, int, float | None]:
+    """(started, completed, median rt_min) for the user's sessions since start_ts.
+
+    The recovery_summary RPC aggregates in the database, so the payload does
+    not grow with session history; without it, fall back to reading up to
+    1000 sessions and aggregating here.
+    """
+    capability = schema_capabilities.RECOVERY_SUMMARY
+    if schema_capabilities.has(capability):
+        try:
+            rows = await sb.rpc(
+                "recovery_summary",
+                bearer_token=auth.access_token,
+                params={"p_user_id": auth.user_id, "p_since": start_ts.isoformat()},
+            )
+        except SupabaseRestError as exc:
+            if not schema_capabilities.is_missing_function_error(exc):
+                raise
+            schema_capabilities.mark(capability, False)
+        else:
+            row = rows[0] if rows else {}
+            rt_p50 = row.get("rt_p50_min")
+            return (
+                _as_int(row.get("started_count")) or 0,
+                _as_int(row.get("completed_count")) or 0,
+                float(rt_p50) if rt_p50 is not None else None,
+            )
+
+    rows = await sb.select(
+        "recovery_sessions",
+        bearer_token=auth.access_token,
+        params={
+            "select": "id,status,rt_min,created_at",
+            "user_id": f"eq.{auth.user_id}",
+            "created_at": f"gte.{start_ts.isoformat()}",
+            "order": "created_at.desc",
+            "limit": 1000,
+        },
+    )
+    rt_values: list[int] = []
+    completed_count = 0
+    for row in rows:
+        if str(row.get("status")) != "completed":
+            continue
+        completed_count += 1
+        value = _as_int(row.get("rt_min"))
+        if value is not None and value >= 0:
+            rt_values.append(value)
+    return len(rows), completed_count, float(median(rt_values)) if rt_values else None
+
+
 @router.get("/recovery/summary", response_model=RecoverySummaryResponse)
 async def get_recovery_summary(
     request: Request,
@@ -1221,39 +1582,27 @@ async def get_recovery_summary(
 ) -> RecoverySummaryResponse:
     _ensure_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
-        start_ts = _utc_now() - timedelta(days=window_days)
-        rows = await sb.select(
-            "recovery_sessions",
-            bearer_token=auth.access_token,
-            params={
-                "select": "id,status,rt_min,created_at",
-                "user_id": f"eq.{auth.user_id}",
-                "created_at": f"gte.{start_ts.isoformat()}",
-                "order": "created_at.desc",
-                "limit": 1000,
-            },
-        )
-
-        started_count = len(rows)
-        rt_values: list[int] = []
-        completed_count = 0
-        for row in rows:
-            if str(row.get("status")) != "completed":
-                continue
-            completed_count += 1
-            value = _as_int(row.get("rt_min"))
-            if value is not None and value >= 0:
-                rt_values.append(value)
+        cached = _summary_cache.get(auth.user_id, {}).get(window_days)
+        if cached is None:
+            cached = await _load_recovery_summary(
+                sb,
+                auth=auth,
+                start_ts=_utc_now() - timedelta(days=window_days),
+            )
+            by_window = dict(_summary_cache.get(auth.user_id, {}))
+            by_window[window_days] = cached
+            _summary_cache.set(auth.user_id, by_window)
+        started_count, completed_count, rt_p50 = cached
 
         completion_rate = (
             round((completed_count / started_count) * 100.0, 2)
             if started_count > 0
             else 0.0
         )
-        rt_p50_min = int(math.floor(median(rt_values))) if rt_values else None
+        rt_p50_min = int(math.floor(rt_p50)) if rt_p50 is not None else None
 
         return RecoverySummaryResponse(
             window_days=window_days,
@@ -1279,6 +1628,127 @@ async def get_recovery_summary(
         )
 
 
+_AUTO_LAPSE_STATE_COLUMNS = (
+    "user_id,last_engaged_at,lapse_threshold_hours,last_auto_lapse_at,"
+    "last_nudge_at,locale,timezone,quiet_hours_start,quiet_hours_end"
+)
+
+
+async def _auto_lapse_candidate_pages(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    engaged_before: datetime,
+    auto_lapse_before: datetime,
+    page_size: int,
+) -> AsyncIterator[list[tuple[dict[str, Any], bool]]]:
+    """Yield pages of (state row, has_open_session) for the auto-lapse cron.
+
+    With the auto_lapse_candidates RPC the open-session anti-join runs in the
+    database and pages are keyset-ordered by (last_engaged_at, user_id), so
+    only one page is held at a time. Without it, fall back to a single page
+    checked against a capped snapshot of open sessions.
+    """
+    capability = schema_capabilities.AUTO_LAPSE_CANDIDATES
+    if schema_capabilities.has(capability):
+        cursor: dict[str, Any] = {}
+        while True:
+            try:
+                page = await sb.rpc(
+                    "auto_lapse_candidates",
+                    bearer_token=bearer_token,
+                    params={
+                        "p_engaged_before": engaged_before.isoformat(),
+                        "p_auto_lapse_before": auto_lapse_before.isoformat(),
+                        "p_limit": page_size,
+                        **cursor,
+                    },
+                )
+            except SupabaseRestError as exc:
+                if cursor or not schema_capabilities.is_missing_function_error(exc):
+                    raise
+                schema_capabilities.mark(capability, False)
+                break
+            if page:
+                yield [(row, False) for row in page]
+            if len(page) < page_size:
+                return
+            cursor = {
+                "p_after_engaged_at": page[-1].get("last_engaged_at"),
+                "p_after_user_id": page[-1].get("user_id"),
+            }
+
+    states = await sb.select(
+        "user_recovery_state",
+        bearer_token=bearer_token,
+        params={
+            "select": _AUTO_LAPSE_STATE_COLUMNS,
+            "last_engaged_at": f"lte.{engaged_before.isoformat()}",
+            "or": (
+                "(last_auto_lapse_at.is.null,"
+                f"last_auto_lapse_at.lte.{auto_lapse_before.isoformat()})"
+            ),
+            "order": "last_engaged_at.asc",
+            "limit": page_size,
+        },
+    )
+    open_rows = await sb.select(
+        "recovery_sessions",
+        bearer_token=bearer_token,
+        params={
+            "select": "id,user_id,status,entry_surface,lapse_start_ts",
+            "status": "eq.open",
+            "limit": 5000,
+        },
+    )
+    open_users = {_as_str(row.get("user_id")) for row in open_rows}
+    yield [(state, _as_str(state.get("user_id")) in open_users) for state in states]
+
+
+def scheduled_jobs() -> list[ScheduledJob]:
+    """Recovery crons for the embedded scheduler, honouring the feature flags."""
+    if not settings.recovery_v1_enabled:
+        return []
+    jobs: list[ScheduledJob] = []
+    if settings.auto_lapse_enabled:
+        jobs.append(
+            ScheduledJob(
+                name="recovery_auto_lapse",
+                interval_seconds=settings.recovery_scheduler_auto_lapse_interval_seconds,
+                run=run_auto_lapse_job,
+            )
+        )
+    if settings.recovery_nudge_enabled:
+        jobs.append(
+            ScheduledJob(
+                name="recovery_nudge",
+                interval_seconds=settings.recovery_scheduler_nudge_interval_seconds,
+                run=run_nudge_job,
+            )
+        )
+    return jobs
+
+
+@router.get("/recovery/cron/health", response_model=RecoveryCronHealthResponse)
+async def get_cron_health(request: Request) -> RecoveryCronHealthResponse:
+    # Reports the cached preflight only; never touches the database.
+    _verify_cron_token(request)
+    age = _cron_preflight_age()
+    state: Literal["ok", "failed", "unknown"]
+    if age is None:
+        state = "unknown"
+    else:
+        state = "ok" if _cron_preflight["ok"] else "failed"
+    return RecoveryCronHealthResponse(
+        status=state,
+        fresh=_cron_preflight_fresh(),
+        checked_at=_cron_preflight.get("checked_at"),
+        age_seconds=round(age, 3) if age is not None else None,
+        ttl_seconds=float(settings.recovery_cron_preflight_ttl_seconds),
+        detail=_cron_preflight.get("detail"),
+    )
+
+
 @router.post("/recovery/cron/auto-lapse", response_model=RecoveryAutoLapseRunResponse)
 async def run_auto_lapse_cron(
     request: Request,
@@ -1286,13 +1756,17 @@ async def run_auto_lapse_cron(
 ) -> RecoveryAutoLapseRunResponse:
     _ensure_auto_lapse_enabled()
     _verify_cron_token(request)
-    correlation_id = _correlation_id(request, response)
+    return await run_auto_lapse_job(_correlation_id(request, response))
+
+
+async def run_auto_lapse_job(correlation_id: str) -> RecoveryAutoLapseRunResponse:
+    """One auto-lapse pass; shared by the HTTP cron and the embedded scheduler."""
     service_token = await _ensure_cron_runtime_ready(
         route="/api/recovery/cron/auto-lapse",
         correlation_id=correlation_id,
     )
 
-    sb = SupabaseRest(str(settings.supabase_url), service_token)
+    sb = get_service_client()
 
     scanned = 0
     created_count = 0
@@ -1304,46 +1778,13 @@ async def run_auto_lapse_cron(
     )
 
     try:
-        states = await sb.select(
-            "user_recovery_state",
-            bearer_token=service_token,
-            params={
-                "select": "user_id,last_engaged_at,lapse_threshold_hours,last_auto_lapse_at,last_nudge_at,locale,timezone,quiet_hours_start,quiet_hours_end",
-                "last_engaged_at": f"lte.{candidate_last_engaged_lte.isoformat()}",
-                "or": (
-                    "(last_auto_lapse_at.is.null,"
-                    f"last_auto_lapse_at.lte.{candidate_last_auto_lapse_lte.isoformat()})"
-                ),
-                "order": "last_engaged_at.asc",
-                "limit": max(1, int(settings.recovery_auto_lapse_batch_size)),
-            },
-        )
-
-        open_rows = await sb.select(
-            "recovery_sessions",
-            bearer_token=service_token,
-            params={
-                "select": "id,user_id,status,entry_surface,lapse_start_ts",
-                "status": "eq.open",
-                "limit": 5000,
-            },
-        )
-        open_by_user = {
-            _as_str(row.get("user_id")): row
-            for row in open_rows
-            if _as_str(row.get("user_id"))
-        }
-
-        for state in states:
-            user_id = _as_str(state.get("user_id"))
-            if not user_id:
-                continue
-            scanned += 1
+        state_rows: list[dict[str, Any]] = []
 
+        async def _process(candidate: tuple[str, dict[str, Any], bool]) -> str:
+            user_id, state, has_open = candidate
             last_engaged = _to_dt(state.get("last_engaged_at"))
             threshold = _threshold_hours(state)
             last_auto = _to_dt(state.get("last_auto_lapse_at"))
-            has_open = user_id in open_by_user
 
             decision = decide_auto_lapse(
                 now_utc=now,
@@ -1354,7 +1795,6 @@ async def run_auto_lapse_cron(
                 cooldown_hours=int(settings.recovery_auto_lapse_cooldown_hours),
             )
             if not decision.should_create:
-                suppressed[decision.reason] += 1
                 try:
                     await _track_metric(
                         user_id=user_id,
@@ -1365,11 +1805,10 @@ async def run_auto_lapse_cron(
                     )
                 except Exception:
                     pass
-                continue
+                return decision.reason
 
             if last_engaged is None:
-                suppressed["missing_last_engaged"] += 1
-                continue
+                return "missing_last_engaged"
 
             lapse_start = compute_lapse_start(last_engaged, threshold)
             session_id = str(uuid4())
@@ -1390,7 +1829,6 @@ async def run_auto_lapse_cron(
                 )
             except SupabaseRestError as exc:
                 if _is_unique_open_conflict(exc):
-                    suppressed["open_session_exists"] += 1
                     try:
                         await _track_metric(
                             user_id=user_id,
@@ -1401,19 +1839,18 @@ async def run_auto_lapse_cron(
                         )
                     except Exception:
                         pass
-                    continue
+                    return "open_session_exists"
                 raise
 
-            created_count += 1
-            try:
-                await _upsert_user_state(
-                    sb,
-                    bearer_token=service_token,
+            state_rows.append(
+                _user_state_merge_row(
                     user_id=user_id,
                     locale=_as_str(state.get("locale"), default="ko"),
                     timezone_name=_as_str(state.get("timezone"), default=""),
                     last_auto_lapse_at=now,
                 )
+            )
+            try:
                 await _track_event(
                     user_id=user_id,
                     access_token=service_token,
@@ -1438,17 +1875,81 @@ async def run_auto_lapse_cron(
             except Exception as track_err:  # noqa: BLE001
                 await _log_recovery_error(
                     route="/api/recovery/cron/auto-lapse",
-                    message="Failed to update auto lapse telemetry/state",
+                    message="Failed to record auto lapse telemetry",
                     user_id=user_id,
                     correlation_id=correlation_id,
                     area="auto_lapse",
                     err=track_err,
                     meta={"session_id": session_id},
                 )
+            return "created"
+
+        failed_count = 0
+        errors: list[tuple[tuple[str, dict[str, Any], bool], Exception]] = []
+        # One budget for the whole scan; pages not reached before it runs out
+        # are picked up by the next run.
+        with deadline.request_deadline(settings.recovery_cron_deadline_seconds):
+            async for page in _auto_lapse_candidate_pages(
+                sb,
+                bearer_token=service_token,
+                engaged_before=candidate_last_engaged_lte,
+                auto_lapse_before=candidate_last_auto_lapse_lte,
+                page_size=int(settings.recovery_auto_lapse_batch_size),
+            ):
+                candidates = [
+                    (_as_str(state.get("user_id")), state, has_open)
+                    for state, has_open in page
+                    if _as_str(state.get("user_id"))
+                ]
+                scanned += len(candidates)
+                result = await fan_out(
+                    candidates,
+                    _process,
+                    job="auto_lapse",
+                    concurrency=settings.recovery_cron_concurrency,
+                )
+                try:
+                    await _bulk_merge_user_states(
+                        sb, bearer_token=service_token, rows=state_rows
+                    )
+                except Exception as state_err:  # noqa: BLE001
+                    await _log_recovery_error(
+                        route="/api/recovery/cron/auto-lapse",
+                        message="Failed to update auto lapse state",
+                        user_id=None,
+                        correlation_id=correlation_id,
+                        area="auto_lapse",
+                        err=state_err,
+                        meta={"state_rows": len(state_rows)},
+                    )
+                state_rows.clear()
+                counts = result.counts()
+                created_count += counts.pop("created", 0)
+                failed_count += counts.pop(FAILED, 0)
+                suppressed.update(counts)
+                errors.extend(result.errors)
+                remaining = deadline.remaining()
+                if remaining is not None and remaining <= 0:
+                    break
+        if errors:
+            if failed_count == scanned:
+                # Nothing went through: surface it as a failed run.
+                raise errors[0][1]
+            (failed_user_id, _, _), first_err = errors[0]
+            await _log_recovery_error(
+                route="/api/recovery/cron/auto-lapse",
+                message="Auto lapse failed for some users",
+                user_id=failed_user_id,
+                correlation_id=correlation_id,
+                area="auto_lapse",
+                err=first_err,
+                meta={"failed_count": failed_count},
+            )
 
         return RecoveryAutoLapseRunResponse(
             scanned_users=scanned,
             created_count=created_count,
+            failed_count=failed_count,
             suppressed_count=sum(suppressed.values()),
             suppressed_by_reason=dict(suppressed),
             correlation_id=correlation_id,
@@ -1470,6 +1971,65 @@ async def run_auto_lapse_cron(
         )
 
 
+async def _nudge_candidates(
+    sb: SupabaseRest,
+    *,
+    bearer_token: str,
+    clock: LocalHourClock,
+    limit: int,
+) -> list[tuple[dict[str, Any], dict[str, Any] | None]]:
+    """Open sessions paired with their user's state (None when missing).
+
+    With the recovery_nudge_candidates RPC, users inside quiet hours are
+    dropped by the database using the clock's per-zone local hours, so they
+    are never fetched. Without it, every open session is returned and quiet
+    hours are only checked in decide_nudge.
+    """
+    capability = schema_capabilities.NUDGE_CANDIDATES
+    if schema_capabilities.has(capability):
+        try:
+            rows = await sb.rpc(
+                "recovery_nudge_candidates",
+                bearer_token=bearer_token,
+                params={
+                    "p_zone_hours": clock.zone_hours(),
+                    "p_locale_hours": clock.locale_hours(),
+                    "p_quiet_start": int(settings.recovery_quiet_hours_start),
+                    "p_quiet_end": int(settings.recovery_quiet_hours_end),
+                    "p_limit": limit,
+                },
+            )
+        except SupabaseRestError as exc:
+            if not schema_capabilities.is_missing_function_error(exc):
+                raise
+            schema_capabilities.mark(capability, False)
+        else:
+            return [(row, row.get("state") or None) for row in rows]
+
+    open_rows = await sb.select(
+        "recovery_sessions",
+        bearer_token=bearer_token,
+        params={
+            "select": "id,user_id,status,entry_surface,lapse_start_ts,detection_source",
+            "status": "eq.open",
+            "order": "created_at.desc",
+            "limit": limit,
+        },
+    )
+    states = await _get_user_states(
+        sb,
+        bearer_token=bearer_token,
+        user_ids=[
+            _as_str(row.get("user_id"))
+            for row in open_rows
+            if _as_str(row.get("id"))
+            and _as_str(row.get("user_id"))
+            and _to_dt(row.get("lapse_start_ts")) is not None
+        ],
+    )
+    return [(row, states.get(_as_str(row.get("user_id")))) for row in open_rows]
+
+
 @router.post("/recovery/cron/nudge", response_model=RecoveryNudgeRunResponse)
 async def run_nudge_cron(
     request: Request,
@@ -1477,13 +2037,17 @@ async def run_nudge_cron(
 ) -> RecoveryNudgeRunResponse:
     _ensure_nudge_enabled()
     _verify_cron_token(request)
-    correlation_id = _correlation_id(request, response)
+    return await run_nudge_job(_correlation_id(request, response))
+
+
+async def run_nudge_job(correlation_id: str) -> RecoveryNudgeRunResponse:
+    """One nudge pass; shared by the HTTP cron and the embedded scheduler."""
     service_token = await _ensure_cron_runtime_ready(
         route="/api/recovery/cron/nudge",
         correlation_id=correlation_id,
     )
 
-    sb = SupabaseRest(str(settings.supabase_url), service_token)
+    sb = get_service_client()
     now = _utc_now()
 
     scanned = 0
@@ -1492,18 +2056,20 @@ async def run_nudge_cron(
     suppressed = Counter[str]()
 
     try:
-        open_rows = await sb.select(
-            "recovery_sessions",
+        clock = LocalHourClock(now)
+        pairs = await _nudge_candidates(
+            sb,
             bearer_token=service_token,
-            params={
-                "select": "id,user_id,status,entry_surface,lapse_start_ts,detection_source",
-                "status": "eq.open",
-                "order": "created_at.desc",
-                "limit": max(1, int(settings.recovery_nudge_batch_size)),
-            },
+            clock=clock,
+            limit=max(1, int(settings.recovery_nudge_batch_size)),
         )
 
-        for row in open_rows:
+        # Batch pipeline: sessions and states in one or two round trips,
+        # decisions in memory, then one bulk write each for nudges, state and
+        # telemetry.
+        telemetry_rows: list[dict[str, Any]] = []
+        planned: list[tuple[str, str, datetime, dict[str, Any], dict[str, Any]]] = []
+        for row, state in pairs:
             session_id = _as_str(row.get("id"))
             user_id = _as_str(row.get("user_id"))
             if not session_id or not user_id:
@@ -1514,31 +2080,16 @@ async def run_nudge_cron(
             if lapse_start is None:
                 suppressed["missing_lapse_start"] += 1
                 continue
-
-            state = await _get_user_state(
-                sb, bearer_token=service_token, user_id=user_id
-            )
             if not state:
                 suppressed["missing_state"] += 1
-                try:
-                    await _track_event(
+                telemetry_rows.extend(
+                    _nudge_suppressed_rows(
                         user_id=user_id,
-                        access_token=service_token,
-                        event_type="nudge_suppressed",
-                        event_meta={"lapse_id": session_id, "reason": "missing_state"},
-                        event_model=NudgeSuppressedEventMeta,
-                        correlation_id=correlation_id,
-                    )
-                    await _track_metric(
-                        user_id=user_id,
-                        access_token=service_token,
-                        metric_name="nudge_suppressed_count",
-                        correlation_id=correlation_id,
-                        reason="missing_state",
                         session_id=session_id,
+                        reason="missing_state",
+                        correlation_id=correlation_id,
                     )
-                except Exception:
-                    pass
+                )
                 continue
 
             decision = decide_nudge(
@@ -1553,35 +2104,27 @@ async def run_nudge_cron(
                 locale=_as_str(state.get("locale"), default="ko"),
                 quiet_start_hour=_quiet_start(state),
                 quiet_end_hour=_quiet_end(state),
+                local_hour=clock.hour_for(
+                    timezone_name=_as_str(state.get("timezone"), default=""),
+                    locale=_as_str(state.get("locale"), default="ko"),
+                ),
             )
 
             if not decision.should_send:
                 suppressed[decision.reason] += 1
-                try:
-                    await _track_event(
-                        user_id=user_id,
-                        access_token=service_token,
-                        event_type="nudge_suppressed",
-                        event_meta={"lapse_id": session_id, "reason": decision.reason},
-                        event_model=NudgeSuppressedEventMeta,
-                        correlation_id=correlation_id,
-                    )
-                    await _track_metric(
+                telemetry_rows.extend(
+                    _nudge_suppressed_rows(
                         user_id=user_id,
-                        access_token=service_token,
-                        metric_name="nudge_suppressed_count",
-                        correlation_id=correlation_id,
-                        reason=decision.reason,
                         session_id=session_id,
+                        reason=decision.reason,
+                        correlation_id=correlation_id,
                     )
-                except Exception:
-                    pass
+                )
                 continue
 
             locale = _as_str(state.get("locale"), default="ko")
-            nudge_id = str(uuid4())
             nudge_row = {
-                "id": nudge_id,
+                "id": str(uuid4()),
                 "user_id": user_id,
                 "session_id": session_id,
                 "nudge_channel": "in_app",
@@ -1591,81 +2134,119 @@ async def run_nudge_cron(
                 "scheduled_for": now.isoformat(),
                 "correlation_id": correlation_id,
             }
-            try:
-                created = await sb.insert_one(
-                    "recovery_nudges",
-                    bearer_token=service_token,
-                    row=nudge_row,
+            planned.append((session_id, user_id, lapse_start, state, nudge_row))
+
+        # Sessions that already have a nudge are skipped by the unique
+        # constraint and simply absent from the returned rows.
+        created_rows = await sb.insert_many(
+            "recovery_nudges",
+            bearer_token=service_token,
+            rows=[nudge_row for *_, nudge_row in planned],
+            on_conflict="user_id,session_id,nudge_channel",
+        )
+        created_by_session = {
+            _as_str(created.get("session_id")): created for created in created_rows
+        }
+
+        state_rows: list[dict[str, Any]] = []
+        pushes: list[tuple[str, RecoveryNudgePayload]] = []
+        for session_id, user_id, lapse_start, state, nudge_row in planned:
+            created = created_by_session.get(session_id)
+            if created is None:
+                suppressed["already_scheduled"] += 1
+                telemetry_rows.extend(
+                    _nudge_suppressed_rows(
+                        user_id=user_id,
+                        session_id=session_id,
+                        reason="already_scheduled",
+                        correlation_id=correlation_id,
+                    )
                 )
-            except SupabaseRestError as exc:
-                if _is_unique_nudge_conflict(exc):
-                    suppressed["already_scheduled"] += 1
-                    try:
-                        await _track_event(
-                            user_id=user_id,
-                            access_token=service_token,
-                            event_type="nudge_suppressed",
-                            event_meta={
-                                "lapse_id": session_id,
-                                "reason": "already_scheduled",
-                            },
-                            event_model=NudgeSuppressedEventMeta,
-                            correlation_id=correlation_id,
-                        )
-                        await _track_metric(
-                            user_id=user_id,
-                            access_token=service_token,
-                            metric_name="nudge_suppressed_count",
-                            correlation_id=correlation_id,
-                            reason="already_scheduled",
-                            session_id=session_id,
-                        )
-                    except Exception:
-                        pass
-                    continue
-                raise
+                continue
 
             scheduled_count += 1
-            created_id = _as_str(created.get("id"), default=nudge_id)
-            try:
-                await _upsert_user_state(
-                    sb,
-                    bearer_token=service_token,
+            pushes.append(
+                (
+                    user_id,
+                    RecoveryNudgePayload(
+                        nudge_id=_as_str(created.get("id"), default=nudge_row["id"]),
+                        session_id=session_id,
+                        message=nudge_row["message"],
+                        lapse_start_ts=lapse_start,
+                        created_at=_to_dt(created.get("created_at")) or now,
+                        correlation_id=correlation_id,
+                    ),
+                )
+            )
+            state_rows.append(
+                _user_state_merge_row(
                     user_id=user_id,
-                    locale=locale,
+                    locale=_as_str(state.get("locale"), default="ko"),
                     timezone_name=_as_str(state.get("timezone"), default=""),
                     last_nudge_at=now,
                 )
-                await _track_event(
+            )
+            telemetry_rows.append(
+                _event_usage_row(
                     user_id=user_id,
-                    access_token=service_token,
                     event_type="nudge_scheduled",
                     event_meta={
                         "lapse_id": session_id,
-                        "nudge_id": created_id,
+                        "nudge_id": _as_str(created.get("id"), default=nudge_row["id"]),
                         "channel": "in_app",
                     },
                     event_model=NudgeScheduledEventMeta,
                     correlation_id=correlation_id,
                     request_id=_event_request_id("nudge_scheduled", session_id),
                 )
-                await _track_metric(
+            )
+            telemetry_rows.append(
+                _metric_usage_row(
                     user_id=user_id,
-                    access_token=service_token,
                     metric_name="nudge_sent_count",
                     correlation_id=correlation_id,
                     session_id=session_id,
                 )
-            except Exception as track_err:  # noqa: BLE001
-                await _log_recovery_error(
-                    route="/api/recovery/cron/nudge",
-                    message="Failed to update nudge telemetry/state",
-                    user_id=user_id,
-                    correlation_id=correlation_id,
-                    area="nudge",
-                    err=track_err,
-                    meta={"session_id": session_id, "nudge_id": created_id},
-                )
+            )
+
+        # Push to long-polling clients (GET /recovery/nudge/subscribe).
+        bus = get_nudge_bus()
+        for user_id, payload in pushes:
+            await bus.publish(user_id, payload.model_dump(mode="json"))
+
+        # Separate try blocks: one failed batch must not drop the other.
+        try:
+            await _bulk_merge_user_states(
+                sb, bearer_token=service_token, rows=state_rows
+            )
+        except Exception as state_err:  # noqa: BLE001
+            await _log_recovery_error(
+                route="/api/recovery/cron/nudge",
+                message="Failed to update nudge state",
+                user_id=None,
+                correlation_id=correlation_id,
+                area="nudge",
+                err=state_err,
+                meta={
+                    "scheduled_count": scheduled_count,
+                    "state_rows": len(state_rows),
+                },
+            )
+        try:
+            await insert_usage_events(telemetry_rows)
+        except Exception as track_err:  # noqa: BLE001
+            await _log_recovery_error(
+                route="/api/recovery/cron/nudge",
+                message="Failed to record nudge telemetry",
+                user_id=None,
+                correlation_id=correlation_id,
+                area="nudge",
+                err=track_err,
+                meta={
+                    "scheduled_count": scheduled_count,
+                    "telemetry_rows": len(telemetry_rows),
+                },
+            )
 
         return RecoveryNudgeRunResponse(
             scanned_sessions=scanned,
@@ -1692,16 +2273,10 @@ async def run_nudge_cron(
         )
 
 
-@router.get("/recovery/nudge", response_model=RecoveryNudgeEnvelope)
-async def get_pending_nudge(
-    request: Request,
-    response: Response,
-    auth: AuthDep,
+async def _load_pending_nudge(
+    auth: AuthContext, *, route: str, correlation_id: str
 ) -> RecoveryNudgeEnvelope:
-    correlation_id = _correlation_id(request, response)
-    if not (settings.recovery_v1_enabled and settings.recovery_nudge_enabled):
-        return RecoveryNudgeEnvelope(has_nudge=False, correlation_id=correlation_id)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         rows = await sb.select(
@@ -1740,7 +2315,7 @@ async def get_pending_nudge(
         )
     except Exception as err:  # noqa: BLE001
         await _log_recovery_error(
-            route="/api/recovery/nudge",
+            route=route,
             message="Failed to fetch pending nudge",
             user_id=auth.user_id,
             correlation_id=correlation_id,
@@ -1753,6 +2328,63 @@ async def get_pending_nudge(
         )
 
 
+@router.get("/recovery/nudge", response_model=RecoveryNudgeEnvelope)
+async def get_pending_nudge(
+    request: Request,
+    response: Response,
+    auth: AuthDep,
+) -> RecoveryNudgeEnvelope:
+    correlation_id = _correlation_id(request, response)
+    if not (settings.recovery_v1_enabled and settings.recovery_nudge_enabled):
+        return RecoveryNudgeEnvelope(has_nudge=False, correlation_id=correlation_id)
+    return await _load_pending_nudge(
+        auth, route="/api/recovery/nudge", correlation_id=correlation_id
+    )
+
+
+@router.get("/recovery/nudge/subscribe", response_model=RecoveryNudgeEnvelope)
+async def subscribe_nudge(
+    request: Request,
+    response: Response,
+    auth: AuthDep,
+    timeout_seconds: float | None = Query(default=None, ge=0, le=60),
+) -> RecoveryNudgeEnvelope:
+    """Long-poll for a nudge instead of polling GET /recovery/nudge.
+
+    Answers at once when a nudge is already pending; otherwise waits until the
+    nudge cron publishes one for this user or the timeout passes
+    (has_nudge=false), after which the client simply subscribes again.
+    """
+    correlation_id = _correlation_id(request, response)
+    if not (settings.recovery_v1_enabled and settings.recovery_nudge_enabled):
+        return RecoveryNudgeEnvelope(has_nudge=False, correlation_id=correlation_id)
+
+    wait = float(settings.recovery_nudge_long_poll_seconds)
+    if timeout_seconds is not None:
+        wait = min(wait, timeout_seconds)
+    left = deadline.remaining()
+    if left is not None:
+        # Answer before the request deadline rather than at it.
+        wait = min(wait, max(0.0, left - 1.0))
+
+    # Subscribe before reading so a nudge published in between is not missed.
+    async with get_nudge_bus().subscribe(auth.user_id) as subscription:
+        envelope = await _load_pending_nudge(
+            auth, route="/api/recovery/nudge/subscribe", correlation_id=correlation_id
+        )
+        if envelope.has_nudge:
+            return envelope
+        payload = await subscription.get(wait)
+
+    if payload is None:
+        return envelope
+    return RecoveryNudgeEnvelope(
+        has_nudge=True,
+        nudge=RecoveryNudgePayload.model_validate(payload),
+        correlation_id=correlation_id,
+    )
+
+
 @router.post("/recovery/nudge/ack")
 async def ack_nudge(
     body: RecoveryNudgeAckRequest,
@@ -1762,7 +2394,7 @@ async def ack_nudge(
 ) -> dict[str, bool]:
     _ensure_nudge_enabled()
     correlation_id = _correlation_id(request, response)
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
 
     try:
         rows = await sb.select(
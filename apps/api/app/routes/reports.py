@@ -4,9 +4,8 @@ from datetime import date as Date
 
 from fastapi import APIRouter, HTTPException, Query, status
 
-from app.core.config import settings
 from app.core.security import AuthDep
-from app.services.supabase_rest import SupabaseRest
+from app.services.supabase_rest import get_anon_client
 
 router = APIRouter()
 
@@ -15,7 +14,7 @@ router = APIRouter()
 async def get_report(
     auth: AuthDep, date: Date = Query(..., description="YYYY-MM-DD")
 ) -> dict:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb = get_anon_client()
     rows = await sb.select(
         "ai_reports",
         bearer_token=auth.access_token,
@@ -7,7 +7,7 @@ from typing import Any, Literal, NamedTuple, cast
 from fastapi import APIRouter
 
 from app.core.config import settings
-from app.core.security import AuthDep
+from app.core.security import AuthContext, AuthDep
 from app.schemas.preferences import (
     CompareDimension,
     CohortTrendEventRequest,
@@ -15,7 +15,10 @@ from app.schemas.preferences import (
     CohortTrendResponse,
     CohortThresholdVariant,
 )
-from app.services.supabase_rest import SupabaseRest
+from app.services import schema_capabilities
+from app.services.cohort_cache import get_cohort_summary
+from app.services.profile import get_profile_row
+from app.services.supabase_rest import SupabaseRest, SupabaseRestError, get_anon_client
 from app.services.usage import insert_usage_event
 
 router = APIRouter()
@@ -260,18 +263,74 @@ def _compute_my_rates(
             if nxt_focus >= 3 and gap >= 0 and gap <= 60:
                 rebound_num += 1
 
+    return _rates_from_counts(
+        focus_num=focus_num,
+        focus_den=focus_den,
+        rebound_num=rebound_num,
+        rebound_den=rebound_den,
+        recovery_days=len(recovery_days),
+        active_days=len(active_days),
+    )
+
+
+def _rates_from_counts(
+    *,
+    focus_num: int,
+    focus_den: int,
+    rebound_num: int,
+    rebound_den: int,
+    recovery_days: int,
+    active_days: int,
+) -> tuple[float | None, float | None, float | None]:
     my_focus_rate = round((focus_num * 100.0) / focus_den, 2) if focus_den else None
     my_rebound_rate = (
         round((rebound_num * 100.0) / rebound_den, 2) if rebound_den else None
     )
     my_recovery_rate = (
-        round((len(recovery_days) * 100.0) / len(active_days), 2)
-        if active_days
-        else None
+        round((recovery_days * 100.0) / active_days, 2) if active_days else None
     )
     return my_focus_rate, my_rebound_rate, my_recovery_rate
 
 
+def _rates_from_daily_metrics(
+    rows: list[dict[str, Any]],
+) -> tuple[float | None, float | None, float | None]:
+    """_compute_my_rates over activity_daily_metrics rows (pre-counted days)."""
+    active = [row for row in rows if _as_int(row.get("entry_count")) > 0]
+    return _rates_from_counts(
+        focus_num=sum(_as_int(row.get("focus_window_num")) for row in active),
+        focus_den=sum(_as_int(row.get("focus_window_den")) for row in active),
+        rebound_num=sum(_as_int(row.get("rebound_num")) for row in active),
+        rebound_den=sum(_as_int(row.get("rebound_den")) for row in active),
+        recovery_days=sum(1 for row in active if row.get("recovery_day") is True),
+        active_days=len(active),
+    )
+
+
+async def _load_my_daily_metrics(
+    sb: SupabaseRest, *, auth: AuthContext, since: date
+) -> list[dict[str, Any]] | None:
+    """Per-day trend counters for the user's logs since `since`.
+
+    None when the activity_daily_metrics RPC is not deployed.
+    """
+    capability = schema_capabilities.ACTIVITY_DAILY_METRICS
+    if not schema_capabilities.has(capability):
+        return None
+    try:
+        rows = await sb.rpc(
+            "activity_daily_metrics",
+            bearer_token=auth.access_token,
+            params={"p_user_id": auth.user_id, "p_since": since.isoformat()},
+        )
+    except SupabaseRestError as exc:
+        if not schema_capabilities.is_missing_function_error(exc):
+            raise
+        schema_capabilities.mark(capability, False)
+        return None
+    return rows
+
+
 def _rank_label(locale: str, my_focus: float | None, cohort_focus: float | None) -> str:
     if my_focus is None or cohort_focus is None:
         return ""
@@ -381,21 +440,12 @@ def _cohort_confidence_level(
 
 @router.get("/trends/cohort", response_model=CohortTrendResponse)
 async def get_cohort_trend(auth: AuthDep) -> CohortTrendResponse:
-    sb_rls = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    sb_service = SupabaseRest(
-        str(settings.supabase_url), settings.supabase_service_role_key
-    )
+    sb_rls = get_anon_client(coalesce_selects=True)
 
-    own_rows = await sb_rls.select(
-        "profiles",
-        bearer_token=auth.access_token,
-        params={
-            "select": "age_group,gender,job_family,work_mode,trend_opt_in,trend_compare_by",
-            "id": f"eq.{auth.user_id}",
-            "limit": 1,
-        },
+    own = (
+        await get_profile_row(user_id=auth.user_id, access_token=auth.access_token)
+        or {}
     )
-    own = own_rows[0] if own_rows else {}
     trend_opt_in = bool(own.get("trend_opt_in"))
 
     compare_by_raw = own.get("trend_compare_by")
@@ -443,25 +493,41 @@ async def get_cohort_trend(auth: AuthDep) -> CohortTrendResponse:
     today = date.today()
     current_week_start = today - timedelta(days=6)
     previous_week_start = today - timedelta(days=13)
-    my_rows = await sb_rls.select(
-        "activity_logs",
-        bearer_token=auth.access_token,
-        params={
-            "select": "date,entries",
-            "user_id": f"eq.{auth.user_id}",
-            "date": f"gte.{previous_week_start.isoformat()}",
-            "order": "date.asc",
-        },
-    )
-    current_rows, previous_rows = _split_rows_by_weeks(
-        my_rows,
-        current_start=current_week_start,
-        previous_start=previous_week_start,
-    )
-    my_focus_rate, my_rebound_rate, my_recovery_rate = _compute_my_rates(current_rows)
-    prev_focus_rate, prev_rebound_rate, prev_recovery_rate = _compute_my_rates(
-        previous_rows
-    )
+    my_days = await _load_my_daily_metrics(sb_rls, auth=auth, since=previous_week_start)
+    if my_days is not None:
+        current_days, previous_days = _split_rows_by_weeks(
+            my_days,
+            current_start=current_week_start,
+            previous_start=previous_week_start,
+        )
+        my_focus_rate, my_rebound_rate, my_recovery_rate = _rates_from_daily_metrics(
+            current_days
+        )
+        prev_focus_rate, prev_rebound_rate, prev_recovery_rate = (
+            _rates_from_daily_metrics(previous_days)
+        )
+    else:
+        my_rows = await sb_rls.select(
+            "activity_logs",
+            bearer_token=auth.access_token,
+            params={
+                "select": "date,entries",
+                "user_id": f"eq.{auth.user_id}",
+                "date": f"gte.{previous_week_start.isoformat()}",
+                "order": "date.asc",
+            },
+        )
+        current_rows, previous_rows = _split_rows_by_weeks(
+            my_rows,
+            current_start=current_week_start,
+            previous_start=previous_week_start,
+        )
+        my_focus_rate, my_rebound_rate, my_recovery_rate = _compute_my_rates(
+            current_rows
+        )
+        prev_focus_rate, prev_rebound_rate, prev_recovery_rate = _compute_my_rates(
+            previous_rows
+        )
     my_focus_delta = _delta(my_focus_rate, prev_focus_rate)
     my_rebound_delta = _delta(my_rebound_rate, prev_rebound_rate)
     my_recovery_delta = _delta(my_recovery_rate, prev_recovery_rate)
@@ -475,21 +541,12 @@ async def get_cohort_trend(auth: AuthDep) -> CohortTrendResponse:
         effective_compare_by.append(dim)
         filters[dim] = val
 
-    rows = await sb_service.rpc(
-        "cohort_trend_summary",
-        bearer_token=settings.supabase_service_role_key,
-        params={
-            "p_age_group": profile_values["age_group"],
-            "p_gender": profile_values["gender"],
-            "p_job_family": profile_values["job_family"],
-            "p_work_mode": profile_values["work_mode"],
-            "p_chronotype": "unknown",
-            "p_compare_by": effective_compare_by,
-            "p_window_days": max(int(settings.cohort_window_days), 7),
-        },
+    data = await get_cohort_summary(
+        profile_values=profile_values,
+        compare_by=effective_compare_by,
+        filters=filters,
+        window_days=max(int(settings.cohort_window_days), 7),
     )
-
-    data = rows[0] if rows else {}
     cohort_size = _as_int(data.get("cohort_size"))
     active_users = _as_int(data.get("active_users"))
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import date as Date
+from typing import Literal
 
 from pydantic import BaseModel
 
@@ -57,3 +58,27 @@ class InsightsWeeklyResponse(BaseModel):
     weekly: WeeklySummaryPayload
     streak: StreakPayload
     trend: WeeklyTrendPayload
+
+
+InsightsGranularity = Literal["day", "week", "month", "quarter"]
+
+
+class InsightsBucket(BaseModel):
+    start: Date
+    end: Date
+    days_logged: int
+    days_total: int
+    blocks: int
+    deep_minutes: int
+
+
+class InsightsRollupResponse(BaseModel):
+    from_date: Date
+    to_date: Date
+    granularity: InsightsGranularity
+    days_logged: int
+    days_total: int
+    total_blocks: int
+    deep_minutes: int
+    goal: GoalPrefs | None = None
+    buckets: list[InsightsBucket]
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
 from typing import Any
 from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import AwareDatetime, BaseModel, ConfigDict, Field, model_validator
 
 TIME_RE = r"^\d{2}:\d{2}$"
+ENTRY_ID_RE = r"^[A-Za-z0-9_-]{1,64}$"
 
 
 def _to_minutes(hhmm: str) -> int:
@@ -21,6 +22,8 @@ def _to_minutes(hhmm: str) -> int:
 class ActivityLogEntry(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
+    # Assigned by the server when missing; stable across saves.
+    id: str | None = Field(default=None, pattern=ENTRY_ID_RE)
     start: str | None = Field(default=None, pattern=TIME_RE, description="HH:MM")
     end: str | None = Field(default=None, pattern=TIME_RE, description="HH:MM")
     activity: str = Field(min_length=1, max_length=120)
@@ -85,6 +88,10 @@ class UpsertLogRequest(BaseModel):
 
     @model_validator(mode="after")
     def validate_entries(self):
+        ids = [e.id for e in self.entries if e.id is not None]
+        if len(ids) != len(set(ids)):
+            raise ValueError("entries: duplicate id")
+
         # Ensure explicit-time blocks have valid ordering and no overlaps.
         items = []
         for i, e in enumerate(self.entries):
@@ -107,6 +114,105 @@ class UpsertLogRequest(BaseModel):
         return self
 
 
+class BulkUpsertLogsRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    logs: list[UpsertLogRequest] = Field(min_length=1, max_length=366)
+
+    @model_validator(mode="after")
+    def validate_unique_dates(self):
+        # One upsert statement cannot touch the same (user_id, date) twice.
+        seen: dict[date, int] = {}
+        for i, item in enumerate(self.logs):
+            if item.date in seen:
+                raise ValueError(
+                    f"logs[{i}]: duplicate date {item.date} (logs[{seen[item.date]}])"
+                )
+            seen[item.date] = i
+        return self
+
+
+class BulkUpsertLogsResponse(BaseModel):
+    saved: int
+    from_date: date
+    to_date: date
+
+
+class SyncLogMutation(UpsertLogRequest):
+    # updated_at of the server row the edit was based on; null for a new day.
+    base_version: AwareDatetime | None = None
+    deleted: bool = False
+
+
+class SyncLogsRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    mutations: list[SyncLogMutation] = Field(default_factory=list, max_length=366)
+    # `cursor` of the previous sync; omit on the first sync.
+    since: datetime | None = None
+
+    @model_validator(mode="after")
+    def validate_unique_dates(self):
+        seen: dict[date, int] = {}
+        for i, item in enumerate(self.mutations):
+            if item.date in seen:
+                raise ValueError(
+                    f"mutations[{i}]: duplicate date {item.date} "
+                    f"(mutations[{seen[item.date]}])"
+                )
+            seen[item.date] = i
+        return self
+
+
+class SyncAppliedLog(BaseModel):
+    date: date
+    # New updated_at of the day; null once deleted.
+    version: str | None = None
+    deleted: bool = False
+    # False when the server already had this content (e.g. a retried sync).
+    written: bool
+
+
+class SyncLogConflict(BaseModel):
+    date: date
+    # The server's row, or null when the day was deleted on the server.
+    server: dict[str, Any] | None = None
+
+
+class SyncLogsResponse(BaseModel):
+    applied: list[SyncAppliedLog]
+    conflicts: list[SyncLogConflict]
+    # Days outside the batch changed or deleted since `since`.
+    changes: list[dict[str, Any]]
+    deleted: list[date]
+    cursor: str
+
+
+class LogEntryUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    id: str = Field(pattern=ENTRY_ID_RE)
+    # Fields of ActivityLogEntry to replace; the merged entry is re-validated.
+    set: dict[str, Any] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def validate_fields(self):
+        unknown = set(self.set) - (set(ActivityLogEntry.model_fields) - {"id"})
+        if unknown:
+            raise ValueError(f"set: unknown fields {sorted(unknown)}")
+        return self
+
+
+class PatchLogEntriesRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    add: list[ActivityLogEntry] = Field(default_factory=list, max_length=48)
+    update: list[LogEntryUpdate] = Field(default_factory=list, max_length=48)
+    remove: list[str] = Field(default_factory=list, max_length=48)
+    # Replaces the day's note only when present in the body.
+    note: str | None = Field(default=None, max_length=5000)
+
+
 class ActivityLogRow(BaseModel):
     model_config = ConfigDict(extra="allow")
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -99,6 +99,8 @@ class RecoveryAutoLapseRunResponse(BaseModel):
 
     scanned_users: int
     created_count: int
+    # Users whose processing raised; they are retried on the next run.
+    failed_count: int = 0
     suppressed_count: int
     suppressed_by_reason: dict[str, int] = Field(default_factory=dict)
     correlation_id: str
@@ -115,6 +117,19 @@ class RecoveryNudgeRunResponse(BaseModel):
     correlation_id: str
 
 
+class RecoveryCronHealthResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    # Last cron preflight outcome; "unknown" until a cron has run.
+    status: Literal["ok", "failed", "unknown"]
+    # True while a passing preflight is within its TTL, so crons skip probing.
+    fresh: bool
+    checked_at: datetime | None = None
+    age_seconds: float | None = None
+    ttl_seconds: float
+    detail: dict[str, Any] | None = None
+
+
 class RecoveryNudgePayload(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+
+from app.core import deadline, metrics
+from app.core.config import settings
+from app.services import schema_capabilities
+from app.services.cron_scheduler import ScheduledJob
+from app.services.supabase_rest import SupabaseRestError, get_service_client
+
+logger = logging.getLogger(__name__)
+
+DAILY_METRICS_BACKFILL = schema_capabilities.rpc_capability(
+    "backfill_activity_log_daily_metrics"
+)
+
+
+async def run_backfill_job(correlation_id: str) -> int:
+    """Roll up activity_logs that predate the daily metrics trigger.
+
+    Pages through backfill_activity_log_daily_metrics until it runs dry or
+    the run's deadline passes; later runs pick up where this one stopped.
+    Once everything is backfilled a run costs one cheap anti-join.
+    """
+    if schema_capabilities.is_known_missing(DAILY_METRICS_BACKFILL):
+        return 0
+    sb = get_service_client()
+    batch_size = settings.activity_metrics_backfill_batch_size
+    total = 0
+    # Half an interval keeps a run well inside its lease (two intervals).
+    run_budget = settings.activity_metrics_backfill_interval_seconds / 2
+    with deadline.request_deadline(run_budget):
+        while True:
+            try:
+                rows = await sb.rpc(
+                    "backfill_activity_log_daily_metrics",
+                    bearer_token=settings.supabase_service_role_key,
+                    params={"p_limit": batch_size},
+                )
+            except SupabaseRestError as exc:
+                if not schema_capabilities.is_missing_function_error(exc):
+                    raise
+                schema_capabilities.mark(DAILY_METRICS_BACKFILL, False)
+                logger.warning(
+                    "daily metrics backfill RPC is missing; apply "
+                    "supabase/patches/2026-10-18_activity_log_daily_metrics.sql"
+                )
+                break
+            written = int((rows[0] if rows else {}).get("backfilled_count") or 0)
+            total += written
+            left = deadline.remaining()
+            if written < batch_size or (left is not None and left <= 0):
+                break
+    metrics.incr("activity_metrics_backfilled_total", total)
+    logger.info(
+        "activity daily metrics backfill wrote %d rows (correlation_id=%s)",
+        total,
+        correlation_id,
+    )
+    return total
+
+
+def scheduled_jobs() -> list[ScheduledJob]:
+    if not settings.activity_metrics_backfill_enabled:
+        return []
+    return [
+        ScheduledJob(
+            name="activity_metrics_backfill",
+            interval_seconds=settings.activity_metrics_backfill_interval_seconds,
+            run=run_backfill_job,
+        )
+    ]
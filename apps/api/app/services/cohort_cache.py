@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.core.ttl_cache import MISSING, TTLCache
+from app.services import schema_capabilities
+from app.services.cron_scheduler import ScheduledJob
+from app.services.supabase_rest import SupabaseRestError, get_service_client
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TABLE = "cohort_trend_snapshots"
+SNAPSHOTS = schema_capabilities.table_capability(SNAPSHOT_TABLE)
+
+# (window_days, ((dim, value), ...)) with dims sorted. cohort_trend_summary
+# ignores the values of dimensions that are not compared, so they are left out
+# of the key and users who differ only there share one entry.
+CohortKey = tuple[int, tuple[tuple[str, str], ...]]
+
+# fetched_at (monotonic) and the RPC row. The TTL cache holds entries for the
+# fresh and stale windows combined; freshness is judged from fetched_at.
+_cache: TTLCache[tuple[float, dict[str, Any]]] = TTLCache(
+    ttl_seconds=settings.cohort_cache_ttl_seconds + settings.cohort_cache_stale_seconds,
+    max_entries=2048,
+)
+_flight = SingleFlight("cohort_summary")
+# At most one background refresh per key.
+_refreshes: dict[CohortKey, asyncio.Task[None]] = {}
+
+
+def cohort_key(*, filters: dict[str, str], window_days: int) -> CohortKey:
+    return (int(window_days), tuple(sorted(filters.items())))
+
+
+def snapshot_cache_key(key: CohortKey) -> str:
+    """Text key of the snapshot row; must match refresh_cohort_trend_snapshots."""
+    window_days, filters = key
+    return "|".join([f"w={window_days}", *(f"{dim}={val}" for dim, val in filters)])
+
+
+def clear_cohort_cache() -> None:
+    _cache.clear()
+    for task in _refreshes.values():
+        task.cancel()
+    _refreshes.clear()
+
+
+async def _load_snapshot(key: CohortKey) -> dict[str, Any] | None:
+    max_age = settings.cohort_snapshot_max_age_seconds
+    if (
+        not settings.cohort_snapshot_enabled
+        or max_age <= 0
+        or not schema_capabilities.has(SNAPSHOTS)
+    ):
+        return None
+    oldest = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    try:
+        rows = await get_service_client().select(
+            SNAPSHOT_TABLE,
+            bearer_token=settings.supabase_service_role_key,
+            params={
+                "select": "summary",
+                "cache_key": f"eq.{snapshot_cache_key(key)}",
+                "refreshed_at": f"gte.{oldest.isoformat()}",
+                "limit": 1,
+            },
+        )
+    except SupabaseRestError as exc:
+        if schema_capabilities.is_missing_relation_error(exc):
+            schema_capabilities.mark(SNAPSHOTS, False)
+        else:
+            logger.warning("cohort snapshot read failed: %s", exc)
+        return None
+    summary = rows[0].get("summary") if rows else None
+    return summary if isinstance(summary, dict) else None
+
+
+async def _fetch(
+    key: CohortKey, *, profile_values: dict[str, str], compare_by: Sequence[str]
+) -> dict[str, Any]:
+    summary = await _load_snapshot(key)
+    source = "snapshot"
+    if summary is None:
+        source = "rpc"
+        rows = await get_service_client().rpc(
+            "cohort_trend_summary",
+            bearer_token=settings.supabase_service_role_key,
+            params={
+                "p_age_group": profile_values["age_group"],
+                "p_gender": profile_values["gender"],
+                "p_job_family": profile_values["job_family"],
+                "p_work_mode": profile_values["work_mode"],
+                "p_chronotype": "unknown",
+                "p_compare_by": list(compare_by),
+                "p_window_days": key[0],
+            },
+        )
+        summary = rows[0] if rows else {}
+    metrics.incr("cohort_cache_fetch_total", source=source)
+    if settings.cohort_cache_ttl_seconds > 0:
+        _cache.set(key, (time.monotonic(), summary))
+    return summary
+
+
+def _refresh_in_background(
+    key: CohortKey, *, profile_values: dict[str, str], compare_by: Sequence[str]
+) -> None:
+    if key in _refreshes:
+        return
+
+    async def _refresh() -> None:
+        try:
+            await _flight.do(
+                key,
+                lambda: _fetch(
+                    key, profile_values=profile_values, compare_by=compare_by
+                ),
+            )
+        except Exception as exc:
+            # Keep serving the stale entry; the next stale read retries.
+            metrics.incr("cohort_cache_refresh_total", result="error")
+            logger.warning("cohort summary refresh failed: %s", exc)
+        else:
+            metrics.incr("cohort_cache_refresh_total", result="ok")
+
+    task = asyncio.create_task(_refresh())
+    _refreshes[key] = task
+
+    def _forget(done: asyncio.Task[None]) -> None:
+        if _refreshes.get(key) is done:
+            _refreshes.pop(key, None)
+
+    task.add_done_callback(_forget)
+
+
+async def get_cohort_summary(
+    *,
+    profile_values: dict[str, str],
+    compare_by: Sequence[str],
+    filters: dict[str, str],
+    window_days: int,
+) -> dict[str, Any]:
+    """Return the cohort_trend_summary row for the caller's cohort filters.
+
+    Fresh for COHORT_CACHE_TTL_SECONDS; for COHORT_CACHE_STALE_SECONDS after
+    that the cached row is served while one background refresh runs.
+    Concurrent misses for the same cohort share one fetch. Callers must not
+    mutate the returned dict.
+    """
+    key = cohort_key(filters=filters, window_days=window_days)
+    entry = _cache.get(key)
+    if entry is not MISSING:
+        fetched_at, summary = entry
+        if time.monotonic() - fetched_at < settings.cohort_cache_ttl_seconds:
+            metrics.incr("cohort_cache_total", result="fresh")
+        else:
+            metrics.incr("cohort_cache_total", result="stale")
+            _refresh_in_background(
+                key, profile_values=profile_values, compare_by=compare_by
+            )
+        return summary
+
+    metrics.incr("cohort_cache_total", result="miss")
+    return await _flight.do(
+        key,
+        lambda: _fetch(key, profile_values=profile_values, compare_by=compare_by),
+    )
+
+
+async def refresh_snapshots(correlation_id: str) -> int:
+    """Recompute every opted-in cohort into cohort_trend_snapshots."""
+    rows = await get_service_client().rpc(
+        "refresh_cohort_trend_snapshots",
+        bearer_token=settings.supabase_service_role_key,
+        params={"p_window_days": max(int(settings.cohort_window_days), 7)},
+    )
+    refreshed = int((rows[0] if rows else {}).get("refreshed_count") or 0)
+    metrics.set_gauge("cohort_snapshot_rows", refreshed)
+    logger.info(
+        "cohort snapshots refreshed: %d cohorts (correlation_id=%s)",
+        refreshed,
+        correlation_id,
+    )
+    return refreshed
+
+
+def scheduled_jobs() -> list[ScheduledJob]:
+    if not settings.cohort_snapshot_enabled:
+        return []
+    return [
+        ScheduledJob(
+            name="cohort_snapshot_refresh",
+            interval_seconds=settings.cohort_snapshot_refresh_interval_seconds,
+            run=refresh_snapshots,
+        )
+    ]
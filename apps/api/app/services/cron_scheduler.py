@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from app.core import metrics
+from app.core.config import settings
+from app.services import schema_capabilities
+from app.services.supabase_rest import SupabaseRestError, get_service_client
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lease holder across the fleet.
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+_RELEASE_TIMEOUT_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class ScheduledJob:
+    name: str
+    interval_seconds: float
+    # Called with a fresh correlation id for every run.
+    run: Callable[[str], Awaitable[Any]]
+
+    @property
+    def lease_seconds(self) -> float:
+        # The leader renews on every run, so two intervals survive one slow or
+        # missed tick while still failing over quickly when the holder dies.
+        return 2 * self.interval_seconds
+
+
+# Per-process guard so a job never overlaps itself; the lease covers the fleet.
+_running: set[str] = set()
+# Jobs whose lease this process held at its last attempt.
+_leading: set[str] = set()
+
+
+async def acquire_lease(name: str, *, ttl_seconds: float) -> bool:
+    """Take or renew the fleet-wide lease for `name`.
+
+    False when another holder owns an unexpired lease, or when the lease RPC
+    is not deployed (nobody runs the job rather than everybody).
+    """
+    capability = schema_capabilities.CRON_LEADER_LEASE
+    if schema_capabilities.is_known_missing(capability):
+        return False
+    try:
+        rows = await get_service_client().rpc(
+            "try_acquire_cron_lease",
+            bearer_token=settings.supabase_service_role_key,
+            params={
+                "p_name": name,
+                "p_holder": HOLDER_ID,
+                "p_ttl_seconds": int(ttl_seconds),
+            },
+        )
+    except SupabaseRestError as exc:
+        if not schema_capabilities.is_missing_function_error(exc):
+            raise
+        schema_capabilities.mark(capability, False)
+        logger.warning(
+            "cron lease RPC is missing; apply "
+            "supabase/patches/2026-10-18_cron_leader_lease.sql to run scheduled jobs"
+        )
+        return False
+    schema_capabilities.mark(capability, True)
+    return bool(rows)
+
+
+async def release_lease(name: str) -> None:
+    await get_service_client().rpc(
+        "release_cron_lease",
+        bearer_token=settings.supabase_service_role_key,
+        params={"p_name": name, "p_holder": HOLDER_ID},
+    )
+
+
+async def run_job_once(job: ScheduledJob) -> str:
+    """Run `job` if this process holds its lease; returns the run result label."""
+    if job.name in _running:
+        result = "skipped_overlap"
+    else:
+        _running.add(job.name)
+        try:
+            result = await _run_as_leader(job)
+        finally:
+            _running.discard(job.name)
+    metrics.incr("cron_job_runs_total", job=job.name, result=result)
+    return result
+
+
+async def _run_as_leader(job: ScheduledJob) -> str:
+    try:
+        leader = await acquire_lease(job.name, ttl_seconds=job.lease_seconds)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("cron lease for %s unavailable: %s", job.name, exc)
+        return "lease_error"
+    metrics.set_gauge("cron_job_leader", 1 if leader else 0, job=job.name)
+    if not leader:
+        _leading.discard(job.name)
+        return "not_leader"
+    _leading.add(job.name)
+
+    started = time.perf_counter()
+    try:
+        await job.run(uuid4().hex[:16])
+    except Exception:  # noqa: BLE001
+        logger.exception("scheduled job %s failed", job.name)
+        return "error"
+    finally:
+        metrics.observe("cron_job_seconds", time.perf_counter() - started, job=job.name)
+    metrics.set_gauge("cron_job_last_success_timestamp", time.time(), job=job.name)
+    return "ok"
+
+
+async def _job_loop(job: ScheduledJob) -> None:
+    # Jittered start so a fleet restarted together does not race for leases.
+    await asyncio.sleep(random.uniform(0, job.interval_seconds))
+    try:
+        while True:
+            started = time.monotonic()
+            await run_job_once(job)
+            await asyncio.sleep(
+                max(0.0, job.interval_seconds - (time.monotonic() - started))
+            )
+    finally:
+        if job.name in _leading:
+            _leading.discard(job.name)
+            # Hand over promptly instead of waiting for the lease to expire.
+            try:
+                await asyncio.wait_for(
+                    release_lease(job.name), timeout=_RELEASE_TIMEOUT_SECONDS
+                )
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("failed to release cron lease %s: %s", job.name, exc)
+
+
+async def run_scheduler(jobs: list[ScheduledJob]) -> None:
+    """Run each job on its interval until cancelled (started from lifespan)."""
+    if not jobs:
+        return
+    logger.info(
+        "cron scheduler started as %s: %s",
+        HOLDER_ID,
+        ", ".join(f"{job.name}/{job.interval_seconds:g}s" for job in jobs),
+    )
+    await asyncio.gather(*(_job_loop(job) for job in jobs))
@@ -5,7 +5,7 @@ from typing import Any
 
 from app.core.config import settings
 from app.services.privacy import redact_secrets_text, sanitize_for_log
-from app.services.supabase_rest import SupabaseRest
+from app.services.supabase_rest import get_service_client
 
 
 async def log_system_error(
@@ -33,9 +33,7 @@ async def log_system_error(
             "meta": sanitize_for_log(meta or {}),
         }
         # Server-managed audit table write: service-role only.
-        sb = SupabaseRest(
-            str(settings.supabase_url), settings.supabase_service_role_key
-        )
+        sb = get_service_client()
         await sb.insert_one(
             "system_errors", bearer_token=settings.supabase_service_role_key, row=row
         )
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date as Date
+from datetime import timedelta
+from typing import Any
+
+from app.services import schema_capabilities
+from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+
+CALENDAR_TABLE = "activity_log_calendars"
+CALENDARS = schema_capabilities.table_capability(CALENDAR_TABLE)
+
+
+def _parse_date(value: Any) -> Date | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return Date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _decode_bytea(value: Any) -> bytes | None:
+    # PostgREST renders bytea in Postgres hex format: "\x0f01...".
+    if not isinstance(value, str) or not value.startswith("\\x"):
+        return None
+    try:
+        return bytes.fromhex(value[2:])
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class LogCalendar:
+    """Set of logged dates as one bit per day since `first_date`.
+
+    Bit n (Postgres set_bit order: least significant bit of byte n // 8
+    first) marks first_date + n days. Maintained by triggers on
+    activity_logs (supabase/patches/2026-10-18_activity_log_calendars.sql).
+    """
+
+    first_date: Date
+    bits: int
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> LogCalendar | None:
+        first_date = _parse_date(row.get("first_date"))
+        raw = _decode_bytea(row.get("bits"))
+        if first_date is None or raw is None:
+            return None
+        return cls(first_date=first_date, bits=int.from_bytes(raw, "little"))
+
+    @classmethod
+    def empty(cls) -> LogCalendar:
+        return cls(first_date=Date.min, bits=0)
+
+    def _upto(self, day: Date) -> int:
+        """Bits for days <= `day`."""
+        idx = (day - self.first_date).days
+        if idx < 0 or not self.bits:
+            return 0
+        return self.bits & ((1 << (idx + 1)) - 1)
+
+    def is_logged(self, day: Date) -> bool:
+        idx = (day - self.first_date).days
+        return idx >= 0 and bool(self.bits >> idx & 1)
+
+    def days_logged(self, *, until: Date, since: Date | None = None) -> int:
+        bits = self._upto(until)
+        if since is not None:
+            start = (since - self.first_date).days
+            if start > 0:
+                bits >>= start
+        return bits.bit_count()
+
+    def first_logged(self) -> Date | None:
+        if not self.bits:
+            return None
+        low = (self.bits & -self.bits).bit_length() - 1
+        return self.first_date + timedelta(days=low)
+
+    def last_logged(self) -> Date | None:
+        if not self.bits:
+            return None
+        return self.first_date + timedelta(days=self.bits.bit_length() - 1)
+
+    def streaks(self, *, anchor_date: Date) -> tuple[int, int]:
+        """compute_streaks over the logged dates <= anchor_date."""
+        bits = self._upto(anchor_date)
+        if not bits:
+            return 0, 0
+
+        current = 0
+        if self.is_logged(anchor_date):
+            idx = (anchor_date - self.first_date).days
+            gaps = ~bits & ((1 << (idx + 1)) - 1)
+            current = idx + 1 if not gaps else idx - (gaps.bit_length() - 1)
+
+        # Each step shortens every run of ones by one.
+        longest = 0
+        while bits:
+            bits &= bits >> 1
+            longest += 1
+        return current, longest
+
+
+async def load_log_calendar(
+    sb: SupabaseRest, *, bearer_token: str, user_id: str
+) -> LogCalendar | None:
+    """The user's calendar, or None when the calendar table is not deployed.
+
+    A user without logs has no row and gets an empty calendar.
+    """
+    if not schema_capabilities.has(CALENDARS):
+        return None
+    try:
+        rows = await sb.select(
+            CALENDAR_TABLE,
+            bearer_token=bearer_token,
+            params={
+                "select": "first_date,bits",
+                "user_id": f"eq.{user_id}",
+                "limit": 1,
+            },
+        )
+    except SupabaseRestError as exc:
+        if not schema_capabilities.is_missing_relation_error(exc):
+            raise
+        schema_capabilities.mark(CALENDARS, False)
+        return None
+    if not rows:
+        return LogCalendar.empty()
+    return LogCalendar.from_row(rows[0])
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import uuid
+from typing import Any, Iterable
+
+from app.core.json_codec import dumps
+from app.schemas.logs import ENTRY_ID_RE
+
+_ENTRY_ID = re.compile(ENTRY_ID_RE)
+
+
+class EntryNotFound(LookupError):
+    def __init__(self, entry_id: str) -> None:
+        super().__init__(entry_id)
+        self.entry_id = entry_id
+
+
+def new_entry_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _derived_entry_id(date_iso: str, index: int, entry: dict[str, Any]) -> str:
+    # Deterministic, so entries saved before ids existed get the same id on
+    # every read until the first write persists it.
+    source = dumps(
+        {"date": date_iso, "index": index, "entry": without_entry_id(entry)},
+        sort_keys=True,
+    )
+    return hashlib.sha256(source).hexdigest()[:12]
+
+
+def without_entry_id(entry: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in entry.items() if k != "id"}
+
+
+def without_entry_ids(entries: Any) -> Any:
+    """Entries as the analysis sees them: ids are bookkeeping, not content."""
+    if not isinstance(entries, list):
+        return entries
+    return [without_entry_id(e) if isinstance(e, dict) else e for e in entries]
+
+
+def with_entry_ids(entries: Iterable[Any], *, date_iso: str) -> list[dict[str, Any]]:
+    """Copies of the dict entries, each with a unique valid `id`."""
+    out: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
+        item = dict(entry)
+        entry_id = item.get("id")
+        if (
+            not isinstance(entry_id, str)
+            or not _ENTRY_ID.match(entry_id)
+            or entry_id in seen
+        ):
+            entry_id = _derived_entry_id(date_iso, index, item)
+            while entry_id in seen:
+                entry_id = new_entry_id()
+            item["id"] = entry_id
+        seen.add(entry_id)
+        out.append(item)
+    return out
+
+
+def apply_entry_changes(
+    entries: list[dict[str, Any]],
+    *,
+    add: Iterable[dict[str, Any]] = (),
+    update: Iterable[tuple[str, dict[str, Any]]] = (),
+    remove: Iterable[str] = (),
+) -> list[dict[str, Any]]:
+    """Merge changes into id-keyed entries, keeping the existing order.
+
+    Updates are shallow merges of the given fields; added entries go last.
+    Raises EntryNotFound for an update or remove of an unknown id.
+    """
+    by_id = {entry["id"]: dict(entry) for entry in entries}
+    order = [entry["id"] for entry in entries]
+    for entry_id in remove:
+        if entry_id not in by_id:
+            raise EntryNotFound(entry_id)
+        del by_id[entry_id]
+    for entry_id, fields in update:
+        if entry_id not in by_id:
+            raise EntryNotFound(entry_id)
+        by_id[entry_id].update(fields)
+    merged = [by_id[entry_id] for entry_id in order if entry_id in by_id]
+    for entry in add:
+        item = dict(entry)
+        if not isinstance(item.get("id"), str) or item["id"] in by_id:
+            item["id"] = new_entry_id()
+        by_id[item["id"]] = item
+        merged.append(item)
+    return merged
+
+
+def log_etag(updated_at: Any) -> str | None:
+    """Strong ETag of a log row; activity_logs.updated_at changes on every write."""
+    if not updated_at:
+        return None
+    digest = hashlib.sha256(str(updated_at).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_match: str, etag: str | None) -> bool:
+    if etag is None:
+        return False
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
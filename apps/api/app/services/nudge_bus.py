@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import Any, AsyncIterator, Protocol
+
+from app.core import metrics
+
+
+class NudgeSubscription(Protocol):
+    async def get(self, timeout: float) -> dict[str, Any] | None: ...
+
+
+class NudgeBus(Protocol):
+    """Fan-out of newly scheduled nudges to long-polling clients.
+
+    Payloads are JSON-serializable dicts (RecoveryNudgePayload in JSON mode)
+    so a cross-instance backend (Redis pub/sub, Postgres LISTEN/NOTIFY) can
+    be plugged in with set_nudge_bus() without touching the routes.
+    """
+
+    async def publish(self, user_id: str, payload: dict[str, Any]) -> None: ...
+
+    def subscribe(
+        self, user_id: str
+    ) -> AbstractAsyncContextManager[NudgeSubscription]: ...
+
+
+class _QueueSubscription:
+    def __init__(self) -> None:
+        # Only the newest nudge matters: GET /recovery/nudge shows the latest
+        # pending one too.
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=1)
+
+    def offer(self, payload: dict[str, Any]) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(payload)
+
+    async def get(self, timeout: float) -> dict[str, Any] | None:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessNudgeBus:
+    """Delivers only to subscribers connected to this process.
+
+    Enough for a single instance, or when the nudge cron runs on the same
+    instance as the subscriber; elsewhere clients still see the nudge on
+    their next subscribe, which starts with a database read.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[_QueueSubscription]] = {}
+
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    async def publish(self, user_id: str, payload: dict[str, Any]) -> None:
+        subs = self._subscribers.get(user_id)
+        metrics.incr(
+            "nudge_bus_published_total",
+            result="delivered" if subs else "no_subscriber",
+        )
+        for sub in subs or ():
+            sub.offer(payload)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[NudgeSubscription]:
+        sub = _QueueSubscription()
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        metrics.set_gauge("nudge_bus_subscribers", self.subscriber_count())
+        try:
+            yield sub
+        finally:
+            subs = self._subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[user_id]
+            metrics.set_gauge("nudge_bus_subscribers", self.subscriber_count())
+
+
+_bus: NudgeBus = InProcessNudgeBus()
+
+
+def get_nudge_bus() -> NudgeBus:
+    return _bus
+
+
+def set_nudge_bus(bus: NudgeBus) -> None:
+    global _bus
+    _bus = bus
+
+
+def reset_nudge_bus() -> None:
+    set_nudge_bus(InProcessNudgeBus())
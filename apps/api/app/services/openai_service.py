@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import logging
 from typing import Any
 
@@ -14,6 +13,7 @@ from tenacity import (
 )
 
 from app.core.config import settings
+from app.core.json_codec import dumps, loads
 
 logger = logging.getLogger(__name__)
 
@@ -281,15 +281,15 @@ async def call_openai_structured(
                 resp = await client.post(
                     "https://api.openai.com/v1/responses",
                     headers=headers,
-                    json=payload,
+                    content=dumps(payload),
                 )
                 resp.raise_for_status()
-                resp_json = resp.json()
+                resp_json = loads(resp.content)
 
     if resp_json is None:
         raise RuntimeError("OpenAI request failed without response")
 
     text = _extract_output_text(resp_json)
-    obj = json.loads(text)
+    obj = loads(text)
     usage = _extract_usage(resp_json)
     return obj, usage
@@ -5,10 +5,18 @@ from datetime import datetime, timezone
 from typing import Any, Literal
 
 from app.core.config import settings
-from app.services.supabase_rest import SupabaseRest
+from app.core.ttl_cache import MISSING, TTLCache
+from app.services.supabase_rest import get_anon_client
 
 Plan = Literal["free", "pro"]
 
+_SUBSCRIPTION_COLUMNS = "user_id,plan,status,current_period_end,stripe_customer_id,stripe_subscription_id,cancel_at_period_end"
+
+# Raw rows are cached (not SubscriptionInfo) so period-end checks stay current.
+_subscription_cache: TTLCache[dict[str, Any] | None] = TTLCache(
+    ttl_seconds=settings.subscription_cache_ttl_seconds
+)
+
 
 @dataclass(frozen=True)
 class SubscriptionInfo:
@@ -48,17 +56,20 @@ async def get_subscription_info(
     user_id: str,
     access_token: str,
 ) -> SubscriptionInfo:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    rows = await sb.select(
-        "subscriptions",
-        bearer_token=access_token,
-        params={
-            "select": "user_id,plan,status,current_period_end,stripe_customer_id,stripe_subscription_id,cancel_at_period_end",
-            "user_id": f"eq.{user_id}",
-            "limit": 1,
-        },
-    )
-    row = rows[0] if rows else None
+    row = _subscription_cache.get(user_id)
+    if row is MISSING:
+        sb = get_anon_client(coalesce_selects=True)
+        rows = await sb.select(
+            "subscriptions",
+            bearer_token=access_token,
+            params={
+                "select": _SUBSCRIPTION_COLUMNS,
+                "user_id": f"eq.{user_id}",
+                "limit": 1,
+            },
+        )
+        row = rows[0] if rows else None
+        _subscription_cache.set(user_id, row)
 
     if not row:
         return SubscriptionInfo(
@@ -108,3 +119,11 @@ def analyze_limit_for_plan(plan: Plan) -> int:
         if plan == "pro"
         else settings.free_daily_analyze_limit
     )
+
+
+def invalidate_subscription_cache(user_id: str) -> None:
+    _subscription_cache.pop(user_id)
+
+
+def clear_subscription_cache() -> None:
+    _subscription_cache.clear()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+from app.core.config import settings
+from app.core.ttl_cache import MISSING, TTLCache
+from app.services.supabase_rest import get_anon_client
+
+# Union of the profile columns read by analyze, insights, trends, activation
+# and preferences. Streak columns are intentionally excluded: they are written
+# on every log save and live behind an optional patch.
+PROFILE_COLUMNS = (
+    "id,age_group,gender,job_family,work_mode,trend_opt_in,trend_compare_by,"
+    "goal_keyword,goal_minutes_per_day"
+)
+
+_profile_cache: TTLCache[dict[str, Any] | None] = TTLCache(
+    ttl_seconds=settings.profile_cache_ttl_seconds
+)
+
+
+async def get_profile_row(*, user_id: str, access_token: str) -> dict[str, Any] | None:
+    """Return the user's profile row (PROFILE_COLUMNS), or None if missing.
+
+    Cached per user for PROFILE_CACHE_TTL_SECONDS; concurrent misses share one
+    select. Callers get their own copy.
+    """
+    cached = _profile_cache.get(user_id)
+    if cached is not MISSING:
+        return copy.deepcopy(cached)
+
+    sb = get_anon_client(coalesce_selects=True)
+    rows = await sb.select(
+        "profiles",
+        bearer_token=access_token,
+        params={
+            "select": PROFILE_COLUMNS,
+            "id": f"eq.{user_id}",
+            "limit": 1,
+        },
+    )
+    row = rows[0] if rows else None
+    _profile_cache.set(user_id, row)
+    return copy.deepcopy(row)
+
+
+def invalidate_profile_cache(user_id: str) -> None:
+    _profile_cache.pop(user_id)
+
+
+def clear_profile_cache() -> None:
+    _profile_cache.clear()
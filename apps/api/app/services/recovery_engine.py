@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
 
 _DEFAULT_TZ_BY_LOCALE: dict[str, str] = {
     "ko": "Asia/Seoul",
@@ -66,15 +67,40 @@ def decide_auto_lapse(
     return AutoLapseDecision(True, "eligible")
 
 
+@lru_cache(maxsize=1024)
+def _zone(name: str) -> ZoneInfo | None:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def _all_zone_names() -> tuple[str, ...]:
+    return tuple(sorted(available_timezones()))
+
+
+def _locale_key(locale: str | None) -> str:
+    return (locale or "ko").strip().lower() or "ko"
+
+
 def resolve_user_timezone(locale: str | None, timezone_name: str | None) -> ZoneInfo:
     if timezone_name:
-        try:
-            return ZoneInfo(timezone_name)
-        except ZoneInfoNotFoundError:
-            pass
-    key = (locale or "ko").strip().lower()
-    fallback = _DEFAULT_TZ_BY_LOCALE.get(key, "UTC")
-    return ZoneInfo(fallback)
+        tz = _zone(timezone_name)
+        if tz is not None:
+            return tz
+    fallback = _DEFAULT_TZ_BY_LOCALE.get(_locale_key(locale), "UTC")
+    return _zone(fallback) or ZoneInfo("UTC")
+
+
+def is_quiet_hour(hour: int, *, quiet_start_hour: int, quiet_end_hour: int) -> bool:
+    start = int(quiet_start_hour) % 24
+    end = int(quiet_end_hour) % 24
+    if start == end:
+        return False
+    if start < end:
+        return start <= hour < end
+    return hour >= start or hour < end
 
 
 def is_quiet_hours(
@@ -86,16 +112,51 @@ def is_quiet_hours(
     quiet_end_hour: int,
 ) -> bool:
     tz = resolve_user_timezone(locale, timezone_name)
-    local_now = to_utc(now_utc).astimezone(tz)
-    h = int(local_now.hour)
-    start = int(quiet_start_hour) % 24
-    end = int(quiet_end_hour) % 24
+    return is_quiet_hour(
+        int(to_utc(now_utc).astimezone(tz).hour),
+        quiet_start_hour=quiet_start_hour,
+        quiet_end_hour=quiet_end_hour,
+    )
 
-    if start == end:
-        return False
-    if start < end:
-        return start <= h < end
-    return h >= start or h < end
+
+class LocalHourClock:
+    """Local hour at one instant, computed once per timezone.
+
+    Built once per nudge run: candidates sharing a timezone share the
+    conversion. zone_hours()/locale_hours() export the same answers so the
+    database can drop quiet-hour users before they are fetched.
+    """
+
+    def __init__(self, now_utc: datetime) -> None:
+        self._now = to_utc(now_utc)
+        self._hours: dict[str, int] = {}
+
+    def _zone_hour(self, tz: ZoneInfo) -> int:
+        hour = self._hours.get(tz.key)
+        if hour is None:
+            hour = int(self._now.astimezone(tz).hour)
+            self._hours[tz.key] = hour
+        return hour
+
+    def hour_for(self, *, timezone_name: str | None, locale: str | None) -> int:
+        return self._zone_hour(resolve_user_timezone(locale, timezone_name))
+
+    def zone_hours(self) -> dict[str, int]:
+        out: dict[str, int] = {}
+        for name in _all_zone_names():
+            tz = _zone(name)
+            if tz is not None:
+                out[name] = self._zone_hour(tz)
+        return out
+
+    def locale_hours(self) -> dict[str, int]:
+        # "*" is the fallback for locales without a default timezone.
+        out = {
+            key: self.hour_for(timezone_name=None, locale=key)
+            for key in _DEFAULT_TZ_BY_LOCALE
+        }
+        out["*"] = self.hour_for(timezone_name=None, locale="*")
+        return out
 
 
 def decide_nudge(
@@ -111,6 +172,7 @@ def decide_nudge(
     locale: str | None,
     quiet_start_hour: int,
     quiet_end_hour: int,
+    local_hour: int | None = None,
 ) -> NudgeDecision:
     now = to_utc(now_utc)
     lapse_start = to_utc(lapse_start_ts)
@@ -129,13 +191,21 @@ def decide_nudge(
         if now < limit:
             return NudgeDecision(False, "nudge_rate_limited")
 
-    if is_quiet_hours(
-        now_utc=now,
-        timezone_name=timezone_name,
-        locale=locale,
-        quiet_start_hour=quiet_start_hour,
-        quiet_end_hour=quiet_end_hour,
-    ):
+    if local_hour is None:
+        quiet = is_quiet_hours(
+            now_utc=now,
+            timezone_name=timezone_name,
+            locale=locale,
+            quiet_start_hour=quiet_start_hour,
+            quiet_end_hour=quiet_end_hour,
+        )
+    else:
+        quiet = is_quiet_hour(
+            local_hour,
+            quiet_start_hour=quiet_start_hour,
+            quiet_end_hour=quiet_end_hour,
+        )
+    if quiet:
         return NudgeDecision(False, "quiet_hours")
 
     return NudgeDecision(True, "eligible")
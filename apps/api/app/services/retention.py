@@ -3,7 +3,11 @@ from __future__ import annotations
 from datetime import date, timedelta
 
 from app.core.config import settings
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.services.supabase_rest import (
+    SupabaseRestError,
+    get_anon_client,
+    get_service_client,
+)
 
 
 def _is_service_key_failure(exc: SupabaseRestError) -> bool:
@@ -30,9 +34,7 @@ async def cleanup_expired_reports(
     }
 
     # Primary path: service-role cleanup.
-    sb_service = SupabaseRest(
-        str(settings.supabase_url), settings.supabase_service_role_key
-    )
+    sb_service = get_service_client()
     try:
         await sb_service.delete(
             "ai_reports",
@@ -45,7 +47,7 @@ async def cleanup_expired_reports(
         if not access_token or not _is_service_key_failure(exc):
             raise
 
-    sb_rls = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    sb_rls = get_anon_client()
     await sb_rls.delete(
         "ai_reports",
         bearer_token=access_token,
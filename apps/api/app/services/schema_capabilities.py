@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.supabase_rest import (
+    SupabaseRest,
+    SupabaseRestError,
+    get_service_client,
+)
+
+logger = logging.getLogger(__name__)
+
+# Optional schema pieces that ship as separate patches. Call sites ask the
+# registry which query shape to use instead of paying a failed round trip on
+# every request against databases that have not been migrated yet.
+ACTIVITY_LOGS_META = "activity_logs.meta"
+# The request_id column and its unique index ship in the same patch
+# (2026-02-12_security_hotfix.sql); the column is probed as a proxy.
+USAGE_EVENTS_REQUEST_ID = "usage_events.request_id"
+PROFILES_STREAK_LAST_DATE = "profiles.streak_last_date"
+ACTIVITY_LOGS_ANALYSIS_UPDATED_AT = "activity_logs.analysis_updated_at"
+
+
+def table_capability(table: str) -> str:
+    return f"table.{table}"
+
+
+def rpc_capability(fn_name: str) -> str:
+    return f"rpc.{fn_name}"
+
+
+USER_RECOVERY_STATE_MERGE = rpc_capability("upsert_user_recovery_state_batch")
+AUTO_LAPSE_CANDIDATES = rpc_capability("auto_lapse_candidates")
+CRON_LEADER_LEASE = rpc_capability("try_acquire_cron_lease")
+NUDGE_CANDIDATES = rpc_capability("recovery_nudge_candidates")
+RECOVERY_SUMMARY = rpc_capability("recovery_summary")
+ACTIVITY_DAILY_METRICS = rpc_capability("activity_daily_metrics")
+ACTIVITY_INSIGHT_DAYS = rpc_capability("activity_insight_days")
+SYNC_ACTIVITY_LOGS = rpc_capability("sync_activity_logs")
+
+
+# capability -> (table, column) selected by the probe.
+_PROBES: dict[str, tuple[str, str]] = {
+    ACTIVITY_LOGS_META: ("activity_logs", "meta"),
+    USAGE_EVENTS_REQUEST_ID: ("usage_events", "request_id"),
+    PROFILES_STREAK_LAST_DATE: ("profiles", "streak_last_date"),
+    ACTIVITY_LOGS_ANALYSIS_UPDATED_AT: ("activity_logs", "analysis_updated_at"),
+    table_capability("recovery_sessions"): ("recovery_sessions", "id"),
+    table_capability("user_recovery_state"): ("user_recovery_state", "user_id"),
+    table_capability("recovery_nudges"): ("recovery_nudges", "id"),
+    table_capability("cohort_trend_snapshots"): ("cohort_trend_snapshots", "cache_key"),
+}
+
+# capability -> (function, params) for RPCs that are side-effect free with
+# these params. RPCs not listed here are learned at runtime via mark().
+_RPC_PROBES: dict[str, tuple[str, dict[str, Any]]] = {
+    USER_RECOVERY_STATE_MERGE: ("upsert_user_recovery_state_batch", {"p_rows": []}),
+    AUTO_LAPSE_CANDIDATES: (
+        "auto_lapse_candidates",
+        {
+            "p_engaged_before": "1970-01-01T00:00:00+00:00",
+            "p_auto_lapse_before": "1970-01-01T00:00:00+00:00",
+            "p_limit": 1,
+        },
+    ),
+    NUDGE_CANDIDATES: (
+        "recovery_nudge_candidates",
+        {
+            "p_zone_hours": {},
+            "p_locale_hours": {},
+            "p_quiet_start": 0,
+            "p_quiet_end": 0,
+            "p_limit": 1,
+        },
+    ),
+    RECOVERY_SUMMARY: (
+        "recovery_summary",
+        {
+            "p_user_id": "00000000-0000-0000-0000-000000000000",
+            "p_since": "1970-01-01T00:00:00+00:00",
+        },
+    ),
+    ACTIVITY_DAILY_METRICS: (
+        "activity_daily_metrics",
+        {
+            "p_user_id": "00000000-0000-0000-0000-000000000000",
+            "p_since": "1970-01-01",
+        },
+    ),
+    ACTIVITY_INSIGHT_DAYS: (
+        "activity_insight_days",
+        {
+            "p_user_id": "00000000-0000-0000-0000-000000000000",
+            "p_from": "1970-01-01",
+            "p_to": "1970-01-01",
+            "p_goal_keyword": None,
+        },
+    ),
+    SYNC_ACTIVITY_LOGS: (
+        "sync_activity_logs",
+        {
+            "p_user_id": "00000000-0000-0000-0000-000000000000",
+            "p_mutations": [],
+            "p_since": None,
+        },
+    ),
+}
+
+
+@dataclass
+class _State:
+    available: bool
+    checked_at: float
+    source: str
+
+
+_states: dict[str, _State] = {}
+
+
+def _ttl_seconds() -> float:
+    # Two refresh intervals: probed states never lapse between refreshes.
+    return 2.0 * settings.schema_capability_refresh_seconds
+
+
+def _current(name: str) -> _State | None:
+    state = _states.get(name)
+    if state is None:
+        return None
+    # Learned states expire so an applied migration is picked up without a
+    # restart even when the background refresher is disabled.
+    if time.monotonic() - state.checked_at > _ttl_seconds():
+        _states.pop(name, None)
+        return None
+    return state
+
+
+def has(name: str) -> bool:
+    """True unless the capability is known to be missing.
+
+    Unknown (never probed, expired, or probe failed for unrelated reasons) is
+    treated as available so healthy databases never take the fallback path.
+    """
+    state = _current(name)
+    return state is None or state.available
+
+
+def is_known_missing(name: str) -> bool:
+    state = _current(name)
+    return state is not None and not state.available
+
+
+def mark(name: str, available: bool, *, source: str = "runtime") -> None:
+    previous = _states.get(name)
+    _states[name] = _State(
+        available=available, checked_at=time.monotonic(), source=source
+    )
+    metrics.set_gauge("schema_capability_available", int(available), capability=name)
+    if previous is None or previous.available != available:
+        logger.info(
+            "schema capability %s -> %s (%s)",
+            name,
+            "available" if available else "missing",
+            source,
+        )
+
+
+def snapshot() -> dict[str, Any]:
+    now = time.monotonic()
+    out: dict[str, Any] = {}
+    for name in (*_PROBES, *_RPC_PROBES):
+        state = _current(name)
+        out[name] = (
+            None
+            if state is None
+            else {
+                "available": state.available,
+                "source": state.source,
+                "age_seconds": round(now - state.checked_at, 1),
+            }
+        )
+    return out
+
+
+def reset() -> None:
+    _states.clear()
+
+
+def is_missing_relation_error(exc: SupabaseRestError) -> bool:
+    blob = f"{exc.code or ''} {exc} {exc.hint or ''} {exc.details or ''}".lower()
+    if exc.code in {"42P01", "PGRST205"}:
+        return True
+    return (
+        ("does not exist" in blob and "relation" in blob)
+        or "table not found" in blob
+        or "could not find the table" in blob
+    )
+
+
+def is_missing_column_error(exc: SupabaseRestError) -> bool:
+    blob = f"{exc} {exc.hint or ''} {exc.details or ''}".lower()
+    if exc.code in {"42703", "PGRST204"}:
+        return True
+    return "column" in blob and ("does not exist" in blob or "could not find" in blob)
+
+
+def is_missing_function_error(exc: SupabaseRestError) -> bool:
+    blob = f"{exc} {exc.hint or ''}".lower()
+    if exc.code in {"42883", "PGRST202"}:
+        return True
+    return "could not find the function" in blob
+
+
+async def _probe(sb: SupabaseRest, token: str, name: str) -> bool | None:
+    try:
+        if name in _RPC_PROBES:
+            fn_name, params = _RPC_PROBES[name]
+            await sb.rpc(fn_name, bearer_token=token, params=params)
+        else:
+            table, column = _PROBES[name]
+            await sb.select(
+                table,
+                bearer_token=token,
+                params={"select": column, "limit": 1},
+            )
+    except SupabaseRestError as exc:
+        if (
+            is_missing_relation_error(exc)
+            or is_missing_column_error(exc)
+            or is_missing_function_error(exc)
+        ):
+            return False
+        # Permission/transient failures say nothing about the schema.
+        logger.warning("schema capability probe %s failed: %s", name, exc)
+        return None
+    except Exception as exc:
+        logger.warning("schema capability probe %s failed: %s", name, exc)
+        return None
+    return True
+
+
+async def refresh() -> dict[str, bool | None]:
+    """Probe every capability concurrently with the service role."""
+    service_token = (settings.supabase_service_role_key or "").strip()
+    if not service_token:
+        return {name: None for name in (*_PROBES, *_RPC_PROBES)}
+
+    sb = get_service_client()
+    names = [*_PROBES, *_RPC_PROBES]
+    results = await asyncio.gather(*(_probe(sb, service_token, n) for n in names))
+    outcome = dict(zip(names, results))
+    for name, available in outcome.items():
+        if available is not None:
+            mark(name, available, source="probe")
+    return outcome
+
+
+async def run_refresh_loop() -> None:
+    """Probe at startup, then every SCHEMA_CAPABILITY_REFRESH_SECONDS."""
+    while True:
+        try:
+            await refresh()
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning("schema capability refresh failed: %s", exc)
+        await asyncio.sleep(settings.schema_capability_refresh_seconds)
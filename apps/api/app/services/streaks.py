@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import date as Date
 from datetime import timedelta
 from typing import Any
@@ -53,3 +54,32 @@ def compute_streaks(*, log_dates: list[Date], anchor_date: Date) -> tuple[int, i
             longest = run
 
     return current, longest
+
+
+@dataclass(frozen=True)
+class StreakState:
+    current: int
+    longest: int
+    # Latest logged date; `current` is the run ending there. None when unknown
+    # (never computed, or invalidated by a delete or back-dated edit).
+    last_date: Date | None
+
+
+def advance_streak(state: StreakState, saved_date: Date) -> StreakState | None:
+    """State after a log is saved for `saved_date`, without reading history.
+
+    Returns None when only a full recompute can tell: no anchor yet, or a
+    back-dated save that may bridge or extend an older run. Agrees with
+    compute_streaks(anchor_date=saved_date) over all log dates otherwise.
+    """
+    last = state.last_date
+    if last is None or saved_date < last:
+        return None
+    if saved_date == last:
+        return state
+    current = state.current + 1 if saved_date == last + timedelta(days=1) else 1
+    return StreakState(
+        current=current,
+        longest=max(state.longest, current),
+        last_date=saved_date,
+    )
@@ -8,7 +8,8 @@ from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 import stripe
 
 from app.core.config import settings
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.services.plan import invalidate_subscription_cache
+from app.services.supabase_rest import SupabaseRestError, get_service_client
 
 
 def stripe_is_configured() -> bool:
@@ -117,7 +118,7 @@ def _to_iso(ts: int | None) -> str | None:
 async def upsert_subscription_row(
     *, user_id: str, sub: dict[str, Any], plan: str, source: str = "stripe_webhook"
 ) -> None:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_service_role_key)
+    sb = get_service_client()
 
     source_norm = (source or "stripe_webhook").strip().lower()[:32] or "stripe_webhook"
     row = {
@@ -152,6 +153,8 @@ async def upsert_subscription_row(
             )
             return
         raise
+    finally:
+        invalidate_subscription_cache(user_id)
 
 
 async def set_subscription_free(
@@ -162,7 +165,7 @@ async def set_subscription_free(
     status: str | None,
     source: str = "stripe_webhook",
 ) -> None:
-    sb = SupabaseRest(str(settings.supabase_url), settings.supabase_service_role_key)
+    sb = get_service_client()
     source_norm = (source or "stripe_webhook").strip().lower()[:32] or "stripe_webhook"
     row = {
         "user_id": user_id,
@@ -193,3 +196,5 @@ async def set_subscription_free(
             )
             return
         raise
+    finally:
+        invalidate_subscription_cache(user_id)
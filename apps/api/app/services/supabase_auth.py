@@ -4,6 +4,7 @@ import time
 from typing import Any
 
 from app.core.config import settings
+from app.core.json_codec import loads
 from app.services.supabase_rest import get_http
 
 _USER_CACHE: dict[str, tuple[float, dict[str, Any]]] = {}
@@ -51,7 +52,7 @@ async def get_current_user(
     }
     resp = await get_http().get(url, headers=headers)
     resp.raise_for_status()
-    data = resp.json()
+    data = loads(resp.content)
     if not isinstance(data, dict):
         raise ValueError("Unexpected Supabase user response")
 
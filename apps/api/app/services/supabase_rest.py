@@ -1,10 +1,34 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
 
 import httpx
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_any,
+    wait_exponential_jitter,
+)
+from tenacity.stop import stop_base
+
+from app.core import deadline, metrics
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.json_codec import dumps, loads
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 _http: httpx.AsyncClient | None = None
+_select_flights = SingleFlight("supabase_select_singleflight")
 
 
 class SupabaseRestError(Exception):
@@ -27,7 +51,13 @@ class SupabaseRestError(Exception):
 def get_http() -> httpx.AsyncClient:
     global _http
     if _http is None:
-        _http = httpx.AsyncClient(timeout=httpx.Timeout(30.0))
+        _http = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.supabase_http_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.supabase_http_max_connections,
+                max_keepalive_connections=settings.supabase_http_max_keepalive,
+            ),
+        )
     return _http
 
 
@@ -38,23 +68,309 @@ async def close_http() -> None:
         _http = None
 
 
+@dataclass(frozen=True)
+class RequestInfo:
+    method: str
+    # Table name, or "rpc/<fn>" for RPC calls.
+    endpoint: str
+    started_at: float
+
+
+RequestStartHook = Callable[[RequestInfo], None]
+RequestEndHook = Callable[
+    [RequestInfo, "int | None", float, "BaseException | None"], None
+]
+
+_start_hooks: list[RequestStartHook] = []
+_end_hooks: list[RequestEndHook] = []
+
+
+def add_request_hooks(
+    *,
+    on_start: RequestStartHook | None = None,
+    on_end: RequestEndHook | None = None,
+) -> Callable[[], None]:
+    """Register instrumentation called around every Supabase REST request.
+
+    on_end receives (info, status_code or None, elapsed seconds, error or None).
+    Hooks must be cheap and synchronous; their exceptions are logged and
+    swallowed. Returns a function that unregisters the hooks.
+    """
+    if on_start is not None:
+        _start_hooks.append(on_start)
+    if on_end is not None:
+        _end_hooks.append(on_end)
+
+    def _remove() -> None:
+        if on_start is not None and on_start in _start_hooks:
+            _start_hooks.remove(on_start)
+        if on_end is not None and on_end in _end_hooks:
+            _end_hooks.remove(on_end)
+
+    return _remove
+
+
+def _record_request_metrics(
+    info: RequestInfo,
+    status_code: int | None,
+    elapsed: float,
+    error: BaseException | None,
+) -> None:
+    metrics.observe(
+        "supabase_request_seconds",
+        elapsed,
+        endpoint=info.endpoint,
+        method=info.method,
+    )
+    if isinstance(error, asyncio.CancelledError):
+        # Losing hedges and abandoned requests are not backend errors.
+        return
+    if error is not None or (status_code is not None and status_code >= 400):
+        metrics.incr(
+            "supabase_request_errors_total",
+            endpoint=info.endpoint,
+            status=status_code if status_code is not None else "transport",
+        )
+
+
+add_request_hooks(on_end=_record_request_metrics)
+
+
+def _table_timeout(endpoint: str) -> float:
+    return (
+        settings.supabase_table_timeouts.get(endpoint)
+        or settings.supabase_http_timeout_seconds
+    )
+
+
+# Rows per request for insert_many/upsert_many.
+_BULK_CHUNK_ROWS = 500
+
+_RETRYABLE_STATUSES = {502, 503, 504}
+# Do not start another GET attempt with less than this left on the deadline.
+_MIN_RETRY_BUDGET_SECONDS = 0.25
+# Hedging needs a latency distribution to pick its delay from.
+_HEDGE_MIN_SAMPLES = 20
+_HEDGE_WINDOW = 200
+_HEDGE_MIN_DELAY_SECONDS = 0.02
+
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[str, deque[float]] = {}
+
+
+def _breaker(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(
+            endpoint,
+            failure_threshold=settings.supabase_circuit_failure_threshold,
+            cooldown_seconds=settings.supabase_circuit_cooldown_seconds,
+            metric_prefix="supabase",
+        )
+    return breaker
+
+
+def _record_latency(endpoint: str, elapsed: float) -> None:
+    window = _latencies.get(endpoint)
+    if window is None:
+        window = _latencies[endpoint] = deque(maxlen=_HEDGE_WINDOW)
+    window.append(elapsed)
+
+
+def _hedge_delay(endpoint: str) -> float | None:
+    window = _latencies.get(endpoint)
+    if window is None or len(window) < _HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(window)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    return max(_HEDGE_MIN_DELAY_SECONDS, p95)
+
+
+def reset_resilience_state() -> None:
+    _breakers.clear()
+    _latencies.clear()
+
+
+class _RetryableResponse(Exception):
+    def __init__(self, response: httpx.Response) -> None:
+        super().__init__(f"retryable status {response.status_code}")
+        self.response = response
+
+
+def _is_retryable_get_error(exc: BaseException) -> bool:
+    return isinstance(exc, (httpx.TransportError, _RetryableResponse))
+
+
+class _deadline_exhausted(stop_base):
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        left = deadline.remaining()
+        return left is not None and left <= _MIN_RETRY_BUDGET_SECONDS
+
+
+def _log_retry(endpoint: str, retry_state: RetryCallState) -> None:
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    metrics.incr("supabase_get_retries_total", endpoint=endpoint)
+    logger.warning(
+        "Supabase GET %s retrying after %s (attempt %s)",
+        endpoint,
+        exc,
+        retry_state.attempt_number,
+    )
+
+
 class SupabaseRest:
-    def __init__(self, supabase_url: str, api_key: str):
+    def __init__(
+        self, supabase_url: str, api_key: str, *, coalesce_selects: bool = False
+    ):
         self._rest_base = supabase_url.rstrip("/") + "/rest/v1"
         self._api_key = api_key
+        self._base_headers = {"apikey": api_key, "accept": "application/json"}
+        # Header dicts for requests authorized with the client's own key (the
+        # service role path), keyed by (prefer, with_body). User-token requests
+        # still build a fresh dict since the bearer differs per request.
+        self._own_headers: dict[tuple[str | None, bool], dict[str, str]] = {}
+        # Opt-in: identical concurrent selects (same table, params and bearer)
+        # share one HTTP round trip. Only safe for reads whose result does not
+        # depend on a write the caller just issued.
+        self._coalesce_selects = coalesce_selects
 
     def _headers(
-        self, bearer_token: str, *, prefer: str | None = None
+        self,
+        bearer_token: str,
+        *,
+        prefer: str | None = None,
+        with_body: bool = False,
     ) -> dict[str, str]:
-        h = {
-            "apikey": self._api_key,
-            "authorization": f"Bearer {bearer_token}",
-            "accept": "application/json",
-        }
+        if bearer_token == self._api_key:
+            cached = self._own_headers.get((prefer, with_body))
+            if cached is None:
+                cached = self._build_headers(bearer_token, prefer, with_body)
+                self._own_headers[(prefer, with_body)] = cached
+            return cached
+        return self._build_headers(bearer_token, prefer, with_body)
+
+    def _build_headers(
+        self, bearer_token: str, prefer: str | None, with_body: bool
+    ) -> dict[str, str]:
+        h = {**self._base_headers, "authorization": f"Bearer {bearer_token}"}
+        if with_body:
+            h["content-type"] = "application/json"
         if prefer:
             h["prefer"] = prefer
         return h
 
+    async def _send(self, method: str, endpoint: str, **kwargs: Any) -> httpx.Response:
+        timeout = deadline.budget(_table_timeout(endpoint))
+        if timeout <= 0:
+            raise SupabaseRestError(
+                status_code=504,
+                code="DEADLINE_EXCEEDED",
+                message=f"Request deadline exceeded before Supabase call ({endpoint})",
+            )
+        breaker = _breaker(endpoint)
+        if not breaker.allow():
+            metrics.incr("supabase_circuit_rejected_total", endpoint=endpoint)
+            raise SupabaseRestError(
+                status_code=503,
+                code="CIRCUIT_OPEN",
+                message=f"Supabase endpoint {endpoint} is failing; not sending requests",
+                details={"retry_after_seconds": round(breaker.retry_after(), 1)},
+            )
+        kwargs["timeout"] = httpx.Timeout(timeout)
+
+        info = RequestInfo(
+            method=method.upper(), endpoint=endpoint, started_at=time.perf_counter()
+        )
+        for hook in _start_hooks:
+            try:
+                hook(info)
+            except Exception:
+                logger.exception("Supabase request start hook failed")
+        status_code: int | None = None
+        error: BaseException | None = None
+        try:
+            resp = await getattr(get_http(), method)(
+                f"{self._rest_base}/{endpoint}", **kwargs
+            )
+            status_code = resp.status_code
+            return resp
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            elapsed = time.perf_counter() - info.started_at
+            if status_code is not None and status_code < 500:
+                breaker.record_success()
+                if method == "get":
+                    _record_latency(endpoint, elapsed)
+            elif status_code is not None or isinstance(error, httpx.TransportError):
+                breaker.record_failure()
+            else:
+                breaker.release()
+            for end_hook in _end_hooks:
+                try:
+                    end_hook(info, status_code, elapsed, error)
+                except Exception:
+                    logger.exception("Supabase request end hook failed")
+
+    async def _get(self, endpoint: str, **kwargs: Any) -> httpx.Response:
+        # GETs are idempotent: retry transient failures with jitter while the
+        # request deadline allows. Writes and RPCs are never retried here.
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_any(
+                    stop_after_attempt(1 + settings.supabase_get_retry_attempts),
+                    _deadline_exhausted(),
+                ),
+                wait=wait_exponential_jitter(initial=0.05, max=1.0),
+                retry=retry_if_exception(_is_retryable_get_error),
+                reraise=True,
+                before_sleep=lambda state: _log_retry(endpoint, state),
+            ):
+                with attempt:
+                    resp = await self._hedged_get(endpoint, **kwargs)
+                    if resp.status_code in _RETRYABLE_STATUSES:
+                        raise _RetryableResponse(resp)
+        except _RetryableResponse as exc:
+            return exc.response
+        return resp
+
+    async def _hedged_get(self, endpoint: str, **kwargs: Any) -> httpx.Response:
+        delay = _hedge_delay(endpoint) if settings.supabase_hedge_enabled else None
+        if delay is None:
+            return await self._send("get", endpoint, **kwargs)
+
+        primary = asyncio.ensure_future(self._send("get", endpoint, **kwargs))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            left = deadline.remaining()
+            if left is not None and left <= delay:
+                return await primary
+            metrics.incr("supabase_hedged_requests_total", endpoint=endpoint)
+            hedge = asyncio.ensure_future(self._send("get", endpoint, **kwargs))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Prefer a completed response; surface an error only once
+                # both requests have failed.
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    if task.exception() is None or not pending:
+                        if task is hedge:
+                            metrics.incr("supabase_hedge_wins_total", endpoint=endpoint)
+                        return task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
     def _raise_for_error(self, resp: httpx.Response) -> None:
         if resp.status_code < 400:
             return
@@ -65,7 +381,7 @@ class SupabaseRest:
         details: Any | None = None
 
         try:
-            payload = resp.json()
+            payload = loads(resp.content)
             if isinstance(payload, dict):
                 code = (
                     payload.get("code")
@@ -109,12 +425,32 @@ class SupabaseRest:
         bearer_token: str,
         params: dict[str, Any],
     ) -> list[dict[str, Any]]:
-        url = f"{self._rest_base}/{table}"
-        resp = await get_http().get(
-            url, headers=self._headers(bearer_token), params=params
+        if not self._coalesce_selects:
+            return await self._select(table, bearer_token=bearer_token, params=params)
+        key = (
+            self._rest_base,
+            table,
+            tuple(sorted((str(k), str(v)) for k, v in params.items())),
+            hashlib.sha256(f"{self._api_key}:{bearer_token}".encode()).hexdigest(),
+        )
+        return await _select_flights.do(
+            key,
+            lambda: self._select(table, bearer_token=bearer_token, params=params),
+            table=table,
+        )
+
+    async def _select(
+        self,
+        table: str,
+        *,
+        bearer_token: str,
+        params: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        resp = await self._get(
+            table, headers=self._headers(bearer_token), params=params
         )
         self._raise_for_error(resp)
-        data = resp.json()
+        data = loads(resp.content)
         if isinstance(data, list):
             return data
         return [data]
@@ -127,16 +463,20 @@ class SupabaseRest:
         row: dict[str, Any],
         on_conflict: str,
     ) -> dict[str, Any]:
-        url = f"{self._rest_base}/{table}"
         headers = self._headers(
             bearer_token,
             prefer="resolution=merge-duplicates,return=representation",
+            with_body=True,
         )
-        resp = await get_http().post(
-            url, headers=headers, params={"on_conflict": on_conflict}, json=row
+        resp = await self._send(
+            "post",
+            table,
+            headers=headers,
+            params={"on_conflict": on_conflict},
+            content=dumps(row),
         )
         self._raise_for_error(resp)
-        data = resp.json()
+        data = loads(resp.content)
         if isinstance(data, list):
             return data[0] if data else {}
         return data
@@ -148,15 +488,83 @@ class SupabaseRest:
         bearer_token: str,
         row: dict[str, Any],
     ) -> dict[str, Any]:
-        url = f"{self._rest_base}/{table}"
-        headers = self._headers(bearer_token, prefer="return=representation")
-        resp = await get_http().post(url, headers=headers, json=row)
+        headers = self._headers(
+            bearer_token, prefer="return=representation", with_body=True
+        )
+        resp = await self._send("post", table, headers=headers, content=dumps(row))
         self._raise_for_error(resp)
-        data = resp.json()
+        data = loads(resp.content)
         if isinstance(data, list):
             return data[0] if data else {}
         return data
 
+    async def insert_many(
+        self,
+        table: str,
+        *,
+        bearer_token: str,
+        rows: list[dict[str, Any]],
+        on_conflict: str | None = None,
+        returning: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Bulk insert. With on_conflict, conflicting rows are skipped and only
+        the inserted rows come back. Rows must share the same keys."""
+        prefer = "resolution=ignore-duplicates," if on_conflict else ""
+        return await self._post_many(
+            table,
+            bearer_token=bearer_token,
+            rows=rows,
+            prefer=prefer
+            + ("return=representation" if returning else "return=minimal"),
+            on_conflict=on_conflict,
+        )
+
+    async def upsert_many(
+        self,
+        table: str,
+        *,
+        bearer_token: str,
+        rows: list[dict[str, Any]],
+        on_conflict: str,
+        returning: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Bulk upsert; only the columns present in the rows are updated."""
+        return await self._post_many(
+            table,
+            bearer_token=bearer_token,
+            rows=rows,
+            prefer="resolution=merge-duplicates,"
+            + ("return=representation" if returning else "return=minimal"),
+            on_conflict=on_conflict,
+        )
+
+    async def _post_many(
+        self,
+        table: str,
+        *,
+        bearer_token: str,
+        rows: list[dict[str, Any]],
+        prefer: str,
+        on_conflict: str | None,
+    ) -> list[dict[str, Any]]:
+        headers = self._headers(bearer_token, prefer=prefer, with_body=True)
+        params = {"on_conflict": on_conflict} if on_conflict else None
+        out: list[dict[str, Any]] = []
+        for start in range(0, len(rows), _BULK_CHUNK_ROWS):
+            resp = await self._send(
+                "post",
+                table,
+                headers=headers,
+                params=params,
+                content=dumps(rows[start : start + _BULK_CHUNK_ROWS]),
+            )
+            self._raise_for_error(resp)
+            if resp.content:
+                data = loads(resp.content)
+                if isinstance(data, list):
+                    out.extend(data)
+        return out
+
     async def patch(
         self,
         table: str,
@@ -165,11 +573,14 @@ class SupabaseRest:
         params: dict[str, Any],
         payload: dict[str, Any],
     ) -> list[dict[str, Any]]:
-        url = f"{self._rest_base}/{table}"
-        headers = self._headers(bearer_token, prefer="return=representation")
-        resp = await get_http().patch(url, headers=headers, params=params, json=payload)
+        headers = self._headers(
+            bearer_token, prefer="return=representation", with_body=True
+        )
+        resp = await self._send(
+            "patch", table, headers=headers, params=params, content=dumps(payload)
+        )
         self._raise_for_error(resp)
-        data = resp.json()
+        data = loads(resp.content)
         if isinstance(data, list):
             return data
         return [data] if data else []
@@ -181,9 +592,8 @@ class SupabaseRest:
         bearer_token: str,
         params: dict[str, Any],
     ) -> None:
-        url = f"{self._rest_base}/{table}"
-        resp = await get_http().delete(
-            url, headers=self._headers(bearer_token), params=params
+        resp = await self._send(
+            "delete", table, headers=self._headers(bearer_token), params=params
         )
         self._raise_for_error(resp)
 
@@ -194,14 +604,41 @@ class SupabaseRest:
         bearer_token: str,
         params: dict[str, Any] | None = None,
     ) -> list[dict[str, Any]]:
-        url = f"{self._rest_base}/rpc/{fn_name}"
-        resp = await get_http().post(
-            url, headers=self._headers(bearer_token), json=params or {}
+        resp = await self._send(
+            "post",
+            f"rpc/{fn_name}",
+            headers=self._headers(bearer_token, with_body=True),
+            content=dumps(params or {}),
         )
         self._raise_for_error(resp)
-        data = resp.json()
+        data = loads(resp.content)
         if isinstance(data, list):
             return data
         if isinstance(data, dict):
             return [data]
         return []
+
+
+_clients: dict[tuple[str, bool], tuple[Any, SupabaseRest]] = {}
+
+
+def _shared_client(api_key: str, *, coalesce_selects: bool) -> SupabaseRest:
+    # Rebuilt only when SUPABASE_URL or the key changes (e.g. tests patching
+    # settings); otherwise the base URL and header templates are reused.
+    url = settings.supabase_url
+    cached = _clients.get((api_key, coalesce_selects))
+    if cached is not None and cached[0] is url:
+        return cached[1]
+    client = SupabaseRest(str(url), api_key, coalesce_selects=coalesce_selects)
+    _clients[(api_key, coalesce_selects)] = (url, client)
+    return client
+
+
+def get_anon_client(*, coalesce_selects: bool = False) -> SupabaseRest:
+    """Process-wide client for user-scoped (RLS) requests with the anon key."""
+    return _shared_client(settings.supabase_anon_key, coalesce_selects=coalesce_selects)
+
+
+def get_service_client() -> SupabaseRest:
+    """Process-wide client authorized with the service role key."""
+    return _shared_client(settings.supabase_service_role_key, coalesce_selects=False)
@@ -5,7 +5,12 @@ from datetime import date
 from typing import Any
 
 from app.core.config import settings
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.services import schema_capabilities
+from app.services.supabase_rest import (
+    SupabaseRestError,
+    get_anon_client,
+    get_service_client,
+)
 
 
 @dataclass(frozen=True)
@@ -23,6 +28,11 @@ def _is_service_key_failure(exc: SupabaseRestError) -> bool:
     )
 
 
+def _is_missing_request_id_support(exc: SupabaseRestError) -> bool:
+    # 42P10: no unique constraint matching on_conflict; 42703/PGRST204: no column.
+    return exc.code in {"42P10", "42703", "PGRST204"}
+
+
 def estimate_cost_usd(
     *, input_tokens: int | None, output_tokens: int | None
 ) -> float | None:
@@ -55,9 +65,7 @@ async def count_daily_analyze_calls(
     }
 
     # Primary path: service-role count (stable for admin/server tasks).
-    sb_service = SupabaseRest(
-        str(settings.supabase_url), settings.supabase_service_role_key
-    )
+    sb_service = get_service_client()
     try:
         rows = await sb_service.select(
             "usage_events",
@@ -68,7 +76,7 @@ async def count_daily_analyze_calls(
         # Fallback path for local/dev misconfiguration: user-scoped read under RLS.
         if not access_token or not _is_service_key_failure(exc):
             raise
-        sb_rls = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+        sb_rls = get_anon_client()
         rows = await sb_rls.select(
             "usage_events",
             bearer_token=access_token,
@@ -77,7 +85,7 @@ async def count_daily_analyze_calls(
     return len(rows)
 
 
-async def insert_usage_event(
+def build_usage_event_row(
     *,
     user_id: str,
     event_date: date,
@@ -89,14 +97,13 @@ async def insert_usage_event(
     cost_usd: float | None,
     request_id: str | None = None,
     meta: dict[str, Any] | None = None,
-    access_token: str | None = None,
-) -> None:
+) -> dict[str, Any]:
     rid = (
         request_id.strip()[:128]
         if isinstance(request_id, str) and request_id.strip()
         else None
     )
-    row = {
+    return {
         "user_id": user_id,
         "event_type": event_type,
         "event_date": event_date.isoformat(),
@@ -109,12 +116,44 @@ async def insert_usage_event(
         "meta": meta or {},
     }
 
-    # Primary path: service-role write.
-    sb_service = SupabaseRest(
-        str(settings.supabase_url), settings.supabase_service_role_key
+
+async def insert_usage_event(
+    *,
+    user_id: str,
+    event_date: date,
+    event_type: str = "analyze",
+    model: str,
+    tokens_prompt: int | None,
+    tokens_completion: int | None,
+    tokens_total: int | None,
+    cost_usd: float | None,
+    request_id: str | None = None,
+    meta: dict[str, Any] | None = None,
+    access_token: str | None = None,
+) -> None:
+    row = build_usage_event_row(
+        user_id=user_id,
+        event_date=event_date,
+        event_type=event_type,
+        model=model,
+        tokens_prompt=tokens_prompt,
+        tokens_completion=tokens_completion,
+        tokens_total=tokens_total,
+        cost_usd=cost_usd,
+        request_id=request_id,
+        meta=meta,
+    )
+    rid = row["request_id"]
+    use_request_id = rid is not None and schema_capabilities.has(
+        schema_capabilities.USAGE_EVENTS_REQUEST_ID
     )
+    if not use_request_id:
+        row.pop("request_id", None)
+
+    # Primary path: service-role write.
+    sb_service = get_service_client()
     try:
-        if rid:
+        if use_request_id:
             # Requires unique index on (user_id,event_type,event_date,request_id).
             await sb_service.upsert_one(
                 "usage_events",
@@ -131,7 +170,11 @@ async def insert_usage_event(
         return
     except SupabaseRestError as exc:
         # Backward compatibility: if DB patch hasn't been applied yet, retry without request_id.
-        if rid and exc.status_code == 400:
+        if use_request_id and exc.status_code == 400:
+            if _is_missing_request_id_support(exc):
+                schema_capabilities.mark(
+                    schema_capabilities.USAGE_EVENTS_REQUEST_ID, False
+                )
             fallback_row = dict(row)
             fallback_row.pop("request_id", None)
             await sb_service.insert_one(
@@ -144,8 +187,8 @@ async def insert_usage_event(
         if not access_token or not _is_service_key_failure(exc):
             raise
 
-    sb_rls = SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
-    if rid:
+    sb_rls = get_anon_client()
+    if use_request_id:
         try:
             await sb_rls.upsert_one(
                 "usage_events",
@@ -157,6 +200,10 @@ async def insert_usage_event(
         except SupabaseRestError as exc:
             if exc.status_code != 400:
                 raise
+            if _is_missing_request_id_support(exc):
+                schema_capabilities.mark(
+                    schema_capabilities.USAGE_EVENTS_REQUEST_ID, False
+                )
             row.pop("request_id", None)
 
     await sb_rls.insert_one(
@@ -164,3 +211,49 @@ async def insert_usage_event(
         bearer_token=access_token,
         row=row,
     )
+
+
+async def insert_usage_events(rows: list[dict[str, Any]]) -> None:
+    """Service-role bulk write of rows built by build_usage_event_row."""
+    if not rows:
+        return
+    sb_service = get_service_client()
+    if schema_capabilities.has(schema_capabilities.USAGE_EVENTS_REQUEST_ID):
+        # One statement cannot upsert the same key twice; keep the last row
+        # per request_id, as sequential upserts would.
+        deduped: dict[Any, dict[str, Any]] = {}
+        for idx, row in enumerate(rows):
+            key = (
+                (
+                    row["user_id"],
+                    row["event_type"],
+                    row["event_date"],
+                    row["request_id"],
+                )
+                if row.get("request_id")
+                else idx
+            )
+            deduped[key] = row
+        try:
+            await sb_service.upsert_many(
+                "usage_events",
+                bearer_token=settings.supabase_service_role_key,
+                on_conflict="user_id,event_type,event_date,request_id",
+                rows=list(deduped.values()),
+                returning=False,
+            )
+            return
+        except SupabaseRestError as exc:
+            if exc.status_code != 400:
+                raise
+            if _is_missing_request_id_support(exc):
+                schema_capabilities.mark(
+                    schema_capabilities.USAGE_EVENTS_REQUEST_ID, False
+                )
+
+    await sb_service.insert_many(
+        "usage_events",
+        bearer_token=settings.supabase_service_role_key,
+        rows=[{k: v for k, v in row.items() if k != "request_id"} for row in rows],
+        returning=False,
+    )
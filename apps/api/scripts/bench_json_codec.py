@@ -0,0 +1,145 @@
+"""Micro-benchmark for the JSON codec backends.
+
+Run from apps/api:
+
+    python -m scripts.bench_json_codec [--iterations 2000]
+
+The payloads mirror the hot paths: an ``ai_reports`` row with a full report
+blob (decode on read, encode on upsert) and a 7-day ``activity_logs`` window
+(decoded for every analyze call).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Any, Callable
+
+# Settings are validated on import; the benchmark never talks to a backend.
+for _key, _value in {
+    "FRONTEND_URL": "http://localhost:3000",
+    "SUPABASE_URL": "https://example.supabase.co",
+    "SUPABASE_ANON_KEY": "bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "OPENAI_API_KEY": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from app.core.json_codec import OrjsonCodec, StdlibJsonCodec, orjson  # noqa: E402
+
+
+def _entries(day: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "start": f"{h:02d}:00",
+            "end": f"{h:02d}:50",
+            "activity": f"딥워크 블록 {day}-{h}",
+            "energy": (h % 5) + 1,
+            "focus": (h % 4) + 2,
+            "tags": ["deep", "focus"] if h % 2 else ["meeting"],
+            "note": "회의 후 집중력 저하" if h % 3 == 0 else None,
+            "confidence": "high",
+        }
+        for h in range(7, 23)
+    ]
+
+
+def _report_row() -> dict[str, Any]:
+    report = {
+        "schema_version": 2,
+        "summary": "오전 집중 구간이 길었고 오후에는 회의로 흐름이 끊겼습니다. " * 4,
+        "productivity_peaks": [
+            {"start": "09:00", "end": "11:00", "reason": "우선순위 작업 선행"}
+        ]
+        * 3,
+        "failure_patterns": [
+            {"pattern": "점심 이후 슬럼프", "trigger": "식곤증", "fix": "짧은 산책"}
+        ]
+        * 3,
+        "tomorrow_routine": [
+            {
+                "start": f"{h:02d}:00",
+                "end": f"{h:02d}:45",
+                "activity": "집중 작업",
+                "goal": "핵심 과제 1개 완료",
+            }
+            for h in range(8, 20)
+        ],
+        "if_then_rules": [{"if": "알림이 오면", "then": "25분 뒤 확인"}] * 4,
+        "coach_one_liner": "오전 두 시간을 지키세요.",
+        "micro_advice": [
+            {
+                "action": "물 마시기",
+                "when": "15:00",
+                "reason": "에너지 회복",
+                "duration_min": 3,
+            }
+        ]
+        * 3,
+        "analysis_meta": {"input_quality_score": 82, "schema_retry_count": 0},
+    }
+    return {
+        "id": "8b1c3f0e-0000-4000-8000-000000000000",
+        "user_id": "1f0c3f0e-0000-4000-8000-000000000000",
+        "date": "2026-02-15",
+        "locale": "ko",
+        "report": report,
+        "model": "gpt-4o-mini",
+    }
+
+
+def _recent_logs() -> list[dict[str, Any]]:
+    return [
+        {"date": f"2026-02-{day:02d}", "entries": _entries(day), "note": "메모"}
+        for day in range(9, 16)
+    ]
+
+
+def _time_per_op(fn: Callable[[], Any], iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    codecs: list[Any] = [StdlibJsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson not installed; only the stdlib backend is measured.")
+
+    payloads = {"report_row": [_report_row()], "recent_logs_7d": _recent_logs()}
+    results: dict[tuple[str, str, str], float] = {}
+    for name, payload in payloads.items():
+        for codec in codecs:
+            raw = codec.dumps(payload)
+            results[(name, codec.name, "encode")] = _time_per_op(
+                lambda: codec.dumps(payload), args.iterations
+            )
+            results[(name, codec.name, "decode")] = _time_per_op(
+                lambda: codec.loads(raw), args.iterations
+            )
+            print(
+                f"{name:<16} {codec.name:<7} size={len(raw):>6}B "
+                f"encode={results[(name, codec.name, 'encode')]:8.1f}us "
+                f"decode={results[(name, codec.name, 'decode')]:8.1f}us"
+            )
+
+    if orjson is not None:
+        print()
+        for name in payloads:
+            for op in ("encode", "decode"):
+                base = results[(name, "stdlib", op)]
+                fast = results[(name, "orjson", op)]
+                print(f"{name:<16} {op}: {base / fast:5.1f}x faster with orjson")
+
+
+if __name__ == "__main__":
+    main()
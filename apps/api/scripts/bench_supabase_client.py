@@ -0,0 +1,139 @@
+"""Micro-benchmark for SupabaseRest client construction and header building.
+
+Run from apps/api:
+
+    python -m scripts.bench_supabase_client [--iterations 20000]
+
+Compares the old per-call pattern (``SupabaseRest(str(settings.supabase_url),
+key)`` plus a fresh header dict) with the shared clients returned by
+``get_service_client()`` / ``get_anon_client()``, and measures a full
+service-role select against an in-memory transport to show the share of
+client overhead in a request.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Callable
+
+# Settings are validated on import; the benchmark never talks to a backend.
+for _key, _value in {
+    "FRONTEND_URL": "http://localhost:3000",
+    "SUPABASE_URL": "https://example.supabase.co",
+    "SUPABASE_ANON_KEY": "bench-anon",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench-service",
+    "OPENAI_API_KEY": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import httpx  # noqa: E402
+
+import app.services.supabase_rest as supabase_rest  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.supabase_rest import (  # noqa: E402
+    SupabaseRest,
+    get_anon_client,
+    get_service_client,
+)
+
+
+def _legacy_headers(api_key: str, bearer_token: str, prefer: str) -> dict[str, str]:
+    # Header construction as it was before the shared clients.
+    return {
+        "apikey": api_key,
+        "authorization": f"Bearer {bearer_token}",
+        "accept": "application/json",
+        "content-type": "application/json",
+        "prefer": prefer,
+    }
+
+
+def _legacy_service_call() -> Any:
+    key = settings.supabase_service_role_key
+    SupabaseRest(str(settings.supabase_url), key)
+    return _legacy_headers(key, key, "return=representation")
+
+
+def _shared_service_call() -> Any:
+    key = settings.supabase_service_role_key
+    return get_service_client()._headers(
+        key, prefer="return=representation", with_body=True
+    )
+
+
+def _legacy_anon_call() -> Any:
+    SupabaseRest(str(settings.supabase_url), settings.supabase_anon_key)
+    return _legacy_headers(settings.supabase_anon_key, "user-jwt", "count=exact")
+
+
+def _shared_anon_call() -> Any:
+    return get_anon_client()._headers("user-jwt", prefer="count=exact", with_body=True)
+
+
+def _time_per_op(fn: Callable[[], Any], iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def _select_round_trip(iterations: int, *, shared: bool) -> float:
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, content=b'[{"user_id":"u1"}]')
+    )
+    supabase_rest._http = httpx.AsyncClient(transport=transport)
+    key = settings.supabase_service_role_key
+    params = {"select": "user_id", "limit": 1}
+
+    def _client() -> SupabaseRest:
+        if shared:
+            return get_service_client()
+        return SupabaseRest(str(settings.supabase_url), key)
+
+    try:
+        for _ in range(50):  # warm up the transport and code paths
+            await _client().select(
+                "user_recovery_state", bearer_token=key, params=params
+            )
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await _client().select(
+                "user_recovery_state", bearer_token=key, params=params
+            )
+        return (time.perf_counter() - start) / iterations * 1e6
+    finally:
+        await supabase_rest.close_http()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    rows = [
+        ("service headers", _legacy_service_call, _shared_service_call),
+        ("anon headers", _legacy_anon_call, _shared_anon_call),
+    ]
+    for name, legacy, shared in rows:
+        before = _time_per_op(legacy, args.iterations)
+        after = _time_per_op(shared, args.iterations)
+        print(
+            f"{name:<16} per-call={before:6.2f}us shared={after:6.2f}us "
+            f"({before / after:4.1f}x)"
+        )
+
+    select_iterations = max(args.iterations // 10, 100)
+    before = asyncio.run(_select_round_trip(select_iterations, shared=False))
+    after = asyncio.run(_select_round_trip(select_iterations, shared=True))
+    print(
+        f"{'select (mocked)':<16} per-call={before:6.1f}us shared={after:6.1f}us "
+        f"(saves {before - after:.1f}us/request)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -25,18 +25,26 @@ _ENV_DEFAULTS = {
     "STRIPE_PRICE_ID_PRO": "price_test_pro",
     "STRIPE_SUCCESS_URL": "http://localhost:3000/app/billing?success=1",
     "STRIPE_CANCEL_URL": "http://localhost:3000/app/billing?canceled=1",
+    "SCHEMA_CAPABILITY_PROBE_ENABLED": "false",
 }
 for _key, _value in _ENV_DEFAULTS.items():
     os.environ.setdefault(_key, _value)
 
 import app.core.rate_limit as rate_limit
 import app.core.idempotency as idempotency
+import app.core.metrics as metrics
 import app.routes.analyze as analyze_route
+import app.routes.recovery as recovery_route
 import app.routes.reflect as reflect_route
 import app.routes.suggest as suggest_route
 from app.core.security import AuthContext, verify_token
 from app.main import app
-from app.services.supabase_rest import SupabaseRest
+from app.services import schema_capabilities
+from app.services.cohort_cache import clear_cohort_cache
+from app.services.nudge_bus import reset_nudge_bus
+from app.services.plan import clear_subscription_cache
+from app.services.profile import clear_profile_cache
+from app.services.supabase_rest import SupabaseRest, reset_resilience_state
 
 TEST_USER_ID = "00000000-0000-4000-8000-000000000001"
 TEST_EMAIL = "pytest-user@rutineiq.test"
@@ -66,6 +74,15 @@ def reset_test_state() -> None:
     app.dependency_overrides.clear()
     rate_limit._counters.clear()  # type: ignore[attr-defined]
     idempotency._entries.clear()  # type: ignore[attr-defined]
+    metrics.reset()
+    clear_profile_cache()
+    clear_subscription_cache()
+    schema_capabilities.reset()
+    reset_resilience_state()
+    recovery_route.clear_cron_preflight_cache()
+    recovery_route.clear_summary_cache()
+    reset_nudge_bus()
+    clear_cohort_cache()
 
 
 @pytest.fixture
@@ -113,6 +130,9 @@ def supabase_mock(monkeypatch: pytest.MonkeyPatch) -> dict[str, AsyncMock]:
         "select": AsyncMock(return_value=[]),
         "upsert_one": AsyncMock(return_value={}),
         "insert_one": AsyncMock(return_value={}),
+        # Echo the rows back, like PostgREST with return=representation.
+        "insert_many": AsyncMock(side_effect=lambda **kwargs: list(kwargs["rows"])),
+        "upsert_many": AsyncMock(side_effect=lambda **kwargs: list(kwargs["rows"])),
         "patch": AsyncMock(return_value=[]),
         "delete": AsyncMock(return_value=None),
         "rpc": AsyncMock(return_value=[]),
@@ -151,6 +171,40 @@ def supabase_mock(monkeypatch: pytest.MonkeyPatch) -> dict[str, AsyncMock]:
             table=table, bearer_token=bearer_token, row=row
         )
 
+    async def _insert_many(
+        self: SupabaseRest,
+        table: str,
+        *,
+        bearer_token: str,
+        rows: list[dict[str, Any]],
+        on_conflict: str | None = None,
+        returning: bool = True,
+    ) -> list[dict[str, Any]]:
+        return await mocks["insert_many"](
+            table=table,
+            bearer_token=bearer_token,
+            rows=rows,
+            on_conflict=on_conflict,
+            returning=returning,
+        )
+
+    async def _upsert_many(
+        self: SupabaseRest,
+        table: str,
+        *,
+        bearer_token: str,
+        rows: list[dict[str, Any]],
+        on_conflict: str,
+        returning: bool = True,
+    ) -> list[dict[str, Any]]:
+        return await mocks["upsert_many"](
+            table=table,
+            bearer_token=bearer_token,
+            rows=rows,
+            on_conflict=on_conflict,
+            returning=returning,
+        )
+
     async def _delete(
         self: SupabaseRest, table: str, *, bearer_token: str, params: dict[str, Any]
     ) -> None:
@@ -182,6 +236,8 @@ def supabase_mock(monkeypatch: pytest.MonkeyPatch) -> dict[str, AsyncMock]:
     monkeypatch.setattr(SupabaseRest, "select", _select)
     monkeypatch.setattr(SupabaseRest, "upsert_one", _upsert_one)
     monkeypatch.setattr(SupabaseRest, "insert_one", _insert_one)
+    monkeypatch.setattr(SupabaseRest, "insert_many", _insert_many)
+    monkeypatch.setattr(SupabaseRest, "upsert_many", _upsert_many)
     monkeypatch.setattr(SupabaseRest, "patch", _patch)
     monkeypatch.setattr(SupabaseRest, "delete", _delete)
     monkeypatch.setattr(SupabaseRest, "rpc", _rpc)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core import metrics
+from app.services import activity_metrics, schema_capabilities
+from app.services.supabase_rest import SupabaseRestError
+
+
+@pytest.mark.asyncio
+async def test_backfill_job_pages_until_a_short_batch(
+    supabase_mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        activity_metrics.settings, "activity_metrics_backfill_batch_size", 2
+    )
+    supabase_mock["rpc"].side_effect = [
+        [{"backfilled_count": 2}],
+        [{"backfilled_count": 2}],
+        [{"backfilled_count": 1}],
+    ]
+
+    assert await activity_metrics.run_backfill_job("cid") == 5
+
+    assert supabase_mock["rpc"].await_count == 3
+    call = supabase_mock["rpc"].await_args.kwargs
+    assert call["fn_name"] == "backfill_activity_log_daily_metrics"
+    assert call["params"] == {"p_limit": 2}
+    assert metrics.counter_value("activity_metrics_backfilled_total") == 5
+
+
+@pytest.mark.asyncio
+async def test_backfill_job_stops_calling_a_missing_rpc(supabase_mock) -> None:
+    supabase_mock["rpc"].side_effect = SupabaseRestError(
+        status_code=404,
+        code="PGRST202",
+        message="Could not find the function public.backfill_activity_log_daily_metrics",
+    )
+
+    assert await activity_metrics.run_backfill_job("cid") == 0
+    assert await activity_metrics.run_backfill_job("cid") == 0
+
+    assert supabase_mock["rpc"].await_count == 1
+    assert schema_capabilities.is_known_missing(activity_metrics.DAILY_METRICS_BACKFILL)
@@ -455,3 +455,37 @@ def test_analyze_low_signal_data_adds_conservative_guidance(
     assert response.status_code == 200
     summary = response.json()["report"]["summary"]
     assert "에너지/집중" in summary or "energy/focus" in summary.lower()
+
+
+def test_analyze_keeps_cached_report_when_only_entry_ids_changed(
+    authenticated_client: TestClient, supabase_mock, openai_mock, monkeypatch
+) -> None:
+    usage_mock = AsyncMock(return_value=0)
+    monkeypatch.setattr(analyze_route, "count_daily_analyze_calls", usage_mock)
+    report_row = {
+        "date": "2026-02-15",
+        "report": {"summary": "cached report"},
+        "model": "gpt-4o-mini|loc=ko",
+        "updated_at": "2026-02-15T12:00:00+00:00",
+    }
+    supabase_mock["select"].side_effect = [
+        [{"date": "2026-02-14"}],  # previous_report
+        [_profile_row()],  # profile context
+        [report_row],  # existing report for target date
+        # updated_at moved when entry ids were persisted; the content did not.
+        [
+            {
+                "updated_at": "2026-02-15T13:00:00+00:00",
+                "analysis_updated_at": "2026-02-15T11:00:00+00:00",
+            }
+        ],
+    ]
+
+    response = authenticated_client.post("/api/analyze", json={"date": "2026-02-15"})
+
+    assert response.status_code == 200
+    assert response.json()["cached"] is True
+    log_params = supabase_mock["select"].await_args_list[3].kwargs["params"]
+    assert log_params["select"] == "updated_at,analysis_updated_at"
+    assert openai_mock.await_count == 0
+    usage_mock.assert_not_awaited()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.core import metrics
+from app.services import cohort_cache
+
+_PROFILE = {
+    "age_group": "25_34",
+    "gender": "female",
+    "job_family": "office_worker",
+    "work_mode": "fixed",
+}
+_FILTERS = {"job_family": "office_worker", "age_group": "25_34"}
+
+
+async def _get() -> dict:
+    return await cohort_cache.get_cohort_summary(
+        profile_values=_PROFILE,
+        compare_by=["age_group", "job_family"],
+        filters=_FILTERS,
+        window_days=14,
+    )
+
+
+def test_snapshot_cache_key_sorts_dimensions() -> None:
+    key = cohort_cache.cohort_key(filters=_FILTERS, window_days=14)
+
+    assert cohort_cache.snapshot_cache_key(key) == (
+        "w=14|age_group=25_34|job_family=office_worker"
+    )
+    assert (
+        cohort_cache.snapshot_cache_key(
+            cohort_cache.cohort_key(filters={}, window_days=7)
+        )
+        == "w=7"
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_rpc(supabase_mock) -> None:
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        await asyncio.sleep(0.01)
+        return [{"cohort_size": 60}]
+
+    supabase_mock["rpc"].side_effect = _rpc
+
+    results = await asyncio.gather(_get(), _get(), _get())
+
+    assert [r["cohort_size"] for r in results] == [60, 60, 60]
+    assert supabase_mock["rpc"].await_count == 1
+    assert metrics.counter_value("cohort_summary_coalesced_total") == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_refreshing_in_background(
+    supabase_mock,
+) -> None:
+    key = cohort_cache.cohort_key(filters=_FILTERS, window_days=14)
+    stale_at = time.monotonic() - cohort_cache.settings.cohort_cache_ttl_seconds - 1
+    cohort_cache._cache.set(key, (stale_at, {"cohort_size": 10}))
+    supabase_mock["rpc"].return_value = [{"cohort_size": 60}]
+
+    first = await _get()
+    second = await _get()
+    await asyncio.gather(*cohort_cache._refreshes.values())
+    third = await _get()
+
+    assert first["cohort_size"] == 10
+    assert second["cohort_size"] == 10
+    assert third["cohort_size"] == 60
+    assert supabase_mock["rpc"].await_count == 1
+    assert metrics.counter_value("cohort_cache_total", result="stale") == 2
+    assert metrics.counter_value("cohort_cache_refresh_total", result="ok") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_stale_entry(supabase_mock) -> None:
+    key = cohort_cache.cohort_key(filters=_FILTERS, window_days=14)
+    stale_at = time.monotonic() - cohort_cache.settings.cohort_cache_ttl_seconds - 1
+    cohort_cache._cache.set(key, (stale_at, {"cohort_size": 10}))
+    supabase_mock["rpc"].side_effect = RuntimeError("db down")
+
+    assert (await _get())["cohort_size"] == 10
+    await asyncio.gather(*cohort_cache._refreshes.values())
+
+    assert (await _get())["cohort_size"] == 10
+    assert metrics.counter_value("cohort_cache_refresh_total", result="error") == 1
+
+
+@pytest.mark.asyncio
+async def test_fresh_snapshot_is_used_instead_of_the_rpc(
+    supabase_mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cohort_cache.settings, "cohort_snapshot_enabled", True)
+    supabase_mock["select"].return_value = [{"summary": {"cohort_size": 42}}]
+
+    summary = await _get()
+
+    assert summary["cohort_size"] == 42
+    supabase_mock["rpc"].assert_not_awaited()
+    params = supabase_mock["select"].await_args.kwargs["params"]
+    assert params["cache_key"] == "eq.w=14|age_group=25_34|job_family=office_worker"
+    assert metrics.counter_value("cohort_cache_fetch_total", source="snapshot") == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_snapshot_falls_back_to_the_rpc(
+    supabase_mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cohort_cache.settings, "cohort_snapshot_enabled", True)
+    supabase_mock["select"].return_value = []
+    supabase_mock["rpc"].return_value = [{"cohort_size": 60}]
+
+    summary = await _get()
+
+    assert summary["cohort_size"] == 60
+    assert supabase_mock["rpc"].await_args.kwargs["fn_name"] == "cohort_trend_summary"
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core import metrics
+from app.services import cron_scheduler, schema_capabilities
+from app.services.cron_scheduler import ScheduledJob, run_job_once
+from app.services.supabase_rest import SupabaseRestError
+
+
+def _job(calls: list[str], *, name: str = "test_job", delay: float = 0.0):
+    async def _run(correlation_id: str) -> None:
+        calls.append(correlation_id)
+        await asyncio.sleep(delay)
+
+    return ScheduledJob(name=name, interval_seconds=60, run=_run)
+
+
+@pytest.mark.asyncio
+async def test_run_job_once_runs_only_when_lease_is_held(supabase_mock) -> None:
+    calls: list[str] = []
+    leases = iter([[{"holder": cron_scheduler.HOLDER_ID}], []])
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        assert fn_name == "try_acquire_cron_lease"
+        assert params == {
+            "p_name": "test_job",
+            "p_holder": cron_scheduler.HOLDER_ID,
+            "p_ttl_seconds": 120,
+        }
+        return next(leases)
+
+    supabase_mock["rpc"].side_effect = _rpc
+
+    assert await run_job_once(_job(calls)) == "ok"
+    assert await run_job_once(_job(calls)) == "not_leader"
+    assert len(calls) == 1
+    assert metrics.gauge_value("cron_job_leader", job="test_job") == 0
+    assert (
+        metrics.counter_value("cron_job_runs_total", job="test_job", result="ok") == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_job_once_skips_overlapping_run(supabase_mock) -> None:
+    calls: list[str] = []
+    supabase_mock["rpc"].return_value = [{"holder": cron_scheduler.HOLDER_ID}]
+    job = _job(calls, delay=0.01)
+
+    results = await asyncio.gather(run_job_once(job), run_job_once(job))
+
+    assert sorted(results) == ["ok", "skipped_overlap"]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_run_job_once_does_not_run_without_lease_rpc(supabase_mock) -> None:
+    calls: list[str] = []
+    supabase_mock["rpc"].side_effect = SupabaseRestError(
+        status_code=404,
+        code="PGRST202",
+        message="Could not find the function public.try_acquire_cron_lease",
+    )
+
+    assert await run_job_once(_job(calls)) == "not_leader"
+    assert await run_job_once(_job(calls)) == "not_leader"
+
+    assert calls == []
+    assert supabase_mock["rpc"].await_count == 1
+    assert schema_capabilities.is_known_missing(schema_capabilities.CRON_LEADER_LEASE)
+
+
+@pytest.mark.asyncio
+async def test_run_job_once_isolates_job_errors(supabase_mock) -> None:
+    supabase_mock["rpc"].return_value = [{"holder": cron_scheduler.HOLDER_ID}]
+
+    async def _boom(correlation_id: str) -> None:
+        raise RuntimeError("boom")
+
+    job = ScheduledJob(name="broken", interval_seconds=60, run=_boom)
+
+    assert await run_job_once(job) == "error"
+    assert (
+        metrics.counter_value("cron_job_runs_total", job="broken", result="error") == 1
+    )
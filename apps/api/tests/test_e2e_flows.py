@@ -8,6 +8,7 @@ from fastapi.testclient import TestClient
 
 import app.routes.analyze as analyze_route
 import app.routes.parse as parse_route
+from app.services import log_calendar, schema_capabilities
 
 
 def _eq(value: object) -> str | None:
@@ -96,6 +97,8 @@ def _install_inmemory_supabase(
     profiles: dict[str, dict] = deepcopy(initial_profiles or {})
     logs: dict[tuple[str, str], dict] = deepcopy(initial_logs or {})
     reports: dict[tuple[str, str], dict] = deepcopy(initial_reports or {})
+    # No triggers here to maintain the log calendar; read dates from the logs.
+    schema_capabilities.mark(log_calendar.CALENDARS, False)
 
     def _log_ts(date_value: str) -> str:
         return f"{date_value}T00:00:00+00:00"
@@ -230,6 +233,21 @@ def _install_inmemory_supabase(
             profiles[user_id] = merged
             return deepcopy(merged)
 
+        if table == "activity_logs":
+            user_id = str(row.get("user_id") or "")
+            day = str(row.get("date") or "")
+            key = (user_id, day)
+            prev = logs.get(key)
+            merged = {
+                **(prev or {}),
+                **deepcopy(row),
+                "id": prev["id"] if prev else f"log-{len(logs) + 1}",
+                "created_at": _log_ts(day),
+                "updated_at": _log_ts(day),
+            }
+            logs[key] = merged
+            return deepcopy(merged)
+
         if table == "ai_reports":
             user_id = str(row.get("user_id") or "")
             day = str(row.get("date") or "")
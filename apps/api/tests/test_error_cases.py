@@ -8,6 +8,7 @@ import app.routes.analyze as analyze_route
 import app.routes.parse as parse_route
 import app.routes.reflect as reflect_route
 import app.routes.suggest as suggest_route
+from app.core import deadline
 from app.core.security import AuthContext, verify_token
 from app.main import app
 from app.services.supabase_rest import SupabaseRestError
@@ -432,3 +433,40 @@ def test_rate_limit_isolated_between_two_users(
 
     assert response_a.status_code == 429
     assert response_b.status_code == 200
+
+
+def test_open_circuit_returns_503_with_retry_after(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].side_effect = SupabaseRestError(
+        status_code=503,
+        code="CIRCUIT_OPEN",
+        message="Supabase endpoint profiles is failing; not sending requests",
+        details={"retry_after_seconds": 7.4},
+    )
+
+    response = authenticated_client.post("/api/analyze", json={"date": "2026-02-15"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "7"
+    assert response.json()["detail"]["code"] == "CIRCUIT_OPEN"
+
+
+def test_llm_routes_are_not_bound_by_request_deadline(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    seen: dict[str, float | None] = {}
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        seen[table] = deadline.remaining()
+        raise SupabaseRestError(status_code=503, code="CIRCUIT_OPEN", message="x")
+
+    supabase_mock["select"].side_effect = _select
+
+    authenticated_client.post("/api/analyze", json={"date": "2026-02-15"})
+    analyze_remaining = seen.popitem()[1]
+    authenticated_client.get("/api/logs", params={"date": "2026-02-15"})
+    logs_remaining = seen.popitem()[1]
+
+    assert analyze_remaining is None
+    assert logs_remaining is not None and logs_remaining > 0
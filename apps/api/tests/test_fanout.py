@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core import metrics
+from app.core.fanout import DEADLINE_EXCEEDED, FAILED, fan_out
+
+
+@pytest.mark.asyncio
+async def test_fan_out_bounds_concurrency_and_keeps_input_order() -> None:
+    in_flight = 0
+    peak = 0
+
+    async def _worker(item: int) -> str:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later items finish first; outcomes must still follow input order.
+        await asyncio.sleep(0.001 * (10 - item))
+        in_flight -= 1
+        return "even" if item % 2 == 0 else "odd"
+
+    result = await fan_out(list(range(10)), _worker, job="test", concurrency=3)
+
+    assert peak == 3
+    assert result.outcomes == ["even", "odd"] * 5
+    assert list(result.counts().items()) == [("even", 5), ("odd", 5)]
+    assert (
+        metrics.counter_value("cron_fanout_items_total", job="test", outcome="odd") == 5
+    )
+    assert metrics.gauge_value("cron_fanout_remaining", job="test") == 0
+
+
+@pytest.mark.asyncio
+async def test_fan_out_isolates_item_errors() -> None:
+    async def _worker(item: str) -> str | None:
+        if item == "bad":
+            raise RuntimeError("boom")
+        return None if item == "skip" else "ok"
+
+    result = await fan_out(["ok", "bad", "skip", "ok"], _worker, job="t", concurrency=2)
+
+    assert result.outcomes == ["ok", FAILED, None, "ok"]
+    assert result.counts() == {"ok": 2, FAILED: 1}
+    assert [(item, str(exc)) for item, exc in result.errors] == [("bad", "boom")]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_skips_items_after_deadline(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    clock = {"now": 100.0}
+    monkeypatch.setattr("app.core.deadline.time.monotonic", lambda: clock["now"])
+
+    async def _worker(item: int) -> str:
+        clock["now"] += 1.0
+        return "done"
+
+    result = await fan_out(
+        [1, 2, 3, 4], _worker, job="t", concurrency=1, deadline_seconds=2.0
+    )
+
+    assert result.outcomes == ["done", "done", DEADLINE_EXCEEDED, DEADLINE_EXCEEDED]
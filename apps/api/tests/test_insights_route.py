@@ -1,7 +1,16 @@
 from __future__ import annotations
 
+import pytest
 from fastapi.testclient import TestClient
 
+from app.services import log_calendar, schema_capabilities
+
+
+@pytest.fixture(autouse=True)
+def _no_log_calendar() -> None:
+    # Tests below script the activity_logs date select; the calendar test opts in.
+    schema_capabilities.mark(log_calendar.CALENDARS, False)
+
 
 def _entry(start: str, end: str, activity: str) -> dict:
     return {
@@ -95,6 +104,29 @@ def test_weekly_insights_resets_current_streak_when_today_missing(
     assert body["streak"]["longest"] == 5
 
 
+def test_weekly_insights_reads_dates_from_log_calendar(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(log_calendar.CALENDARS, True)
+    supabase_mock["select"].side_effect = [
+        [],
+        # 2026-02-01 and 2026-02-11..15 logged.
+        [{"first_date": "2026-02-01", "bits": "\\x017c"}],
+        [],
+    ]
+
+    response = authenticated_client.get(
+        "/api/insights/weekly",
+        params={"from": "2026-02-09", "to": "2026-02-15"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["streak"] == {"current": 5, "longest": 5}
+    assert body["consistency"]["days_logged"] == 6
+    assert body["consistency"]["days_total"] == 15
+
+
 def test_weekly_insights_rejects_date_window_over_31_days(
     authenticated_client: TestClient,
 ) -> None:
@@ -103,3 +135,110 @@ def test_weekly_insights_rejects_date_window_over_31_days(
         params={"from": "2026-01-01", "to": "2026-02-15"},
     )
     assert response.status_code == 422
+
+
+def test_insights_rollup_buckets_rpc_days_by_month(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].side_effect = [
+        [{"goal_keyword": " Deep ", "goal_minutes_per_day": 60}],
+    ]
+    supabase_mock["rpc"].return_value = [
+        {"date": "2026-01-20", "blocks": 3, "deep_minutes": 90},
+        {"date": "2026-01-31", "blocks": 2, "deep_minutes": 0},
+        {"date": "2026-03-01", "blocks": 4, "deep_minutes": 45},
+    ]
+
+    response = authenticated_client.get(
+        "/api/insights/rollup",
+        params={"from": "2026-01-15", "to": "2026-03-10", "granularity": "month"},
+    )
+
+    assert response.status_code == 200
+    rpc_kwargs = supabase_mock["rpc"].await_args.kwargs
+    assert rpc_kwargs["params"]["p_goal_keyword"] == "Deep"
+    body = response.json()
+    assert [(b["start"], b["end"], b["days_total"]) for b in body["buckets"]] == [
+        ("2026-01-15", "2026-01-31", 17),
+        ("2026-02-01", "2026-02-28", 28),
+        ("2026-03-01", "2026-03-10", 10),
+    ]
+    assert [b["days_logged"] for b in body["buckets"]] == [2, 0, 1]
+    assert [b["blocks"] for b in body["buckets"]] == [5, 0, 4]
+    assert [b["deep_minutes"] for b in body["buckets"]] == [90, 0, 45]
+    assert body["days_logged"] == 3
+    assert body["days_total"] == 55
+    assert body["total_blocks"] == 9
+    assert body["deep_minutes"] == 135
+
+
+def test_insights_rollup_falls_back_to_entries_without_rpc(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.ACTIVITY_INSIGHT_DAYS, False)
+    supabase_mock["select"].side_effect = [
+        [{"goal_keyword": "deep", "goal_minutes_per_day": 60}],
+        [
+            {"date": "2025-03-31", "entries": [_entry("09:00", "10:00", "Deep work")]},
+            {
+                "date": "2025-11-03",
+                "entries": [
+                    _entry("09:00", "11:00", "Deep work"),
+                    _entry("13:00", "13:30", "Meeting"),
+                ],
+            },
+        ],
+    ]
+
+    response = authenticated_client.get(
+        "/api/insights/rollup",
+        params={"from": "2025-01-01", "to": "2025-12-31", "granularity": "quarter"},
+    )
+
+    assert response.status_code == 200
+    supabase_mock["rpc"].assert_not_awaited()
+    body = response.json()
+    assert [b["start"] for b in body["buckets"]] == [
+        "2025-01-01",
+        "2025-04-01",
+        "2025-07-01",
+        "2025-10-01",
+    ]
+    assert [b["days_total"] for b in body["buckets"]] == [90, 91, 92, 92]
+    assert [b["blocks"] for b in body["buckets"]] == [1, 0, 0, 2]
+    assert [b["deep_minutes"] for b in body["buckets"]] == [60, 0, 0, 120]
+    assert body["days_total"] == 365
+
+
+def test_insights_rollup_weeks_start_on_monday(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].side_effect = [[]]
+    supabase_mock["rpc"].return_value = [
+        {"date": "2026-02-15", "blocks": 1, "deep_minutes": 0},
+        {"date": "2026-02-16", "blocks": 2, "deep_minutes": 0},
+    ]
+
+    response = authenticated_client.get(
+        "/api/insights/rollup",
+        params={"from": "2026-02-12", "to": "2026-02-18"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["granularity"] == "week"
+    assert body["goal"] is None
+    assert [(b["start"], b["end"], b["blocks"]) for b in body["buckets"]] == [
+        ("2026-02-12", "2026-02-15", 1),
+        ("2026-02-16", "2026-02-18", 2),
+    ]
+
+
+def test_insights_rollup_rejects_window_over_366_days(
+    authenticated_client: TestClient,
+) -> None:
+    response = authenticated_client.get(
+        "/api/insights/rollup",
+        params={"from": "2025-01-01", "to": "2026-01-02"},
+    )
+    assert response.status_code == 422
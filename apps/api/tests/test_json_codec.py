@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from uuid import UUID
+
+import pytest
+
+from app.core import json_codec
+from app.core.json_codec import OrjsonCodec, StdlibJsonCodec, get_codec
+
+_PAYLOAD = {
+    "date": "2026-02-15",
+    "entries": [
+        {"start": "09:00", "end": "10:30", "activity": "집중 작업", "energy": 4},
+        {"start": "11:00", "end": "11:20", "activity": "Break", "focus": None},
+    ],
+    "score": 0.75,
+    "ok": True,
+}
+
+
+def test_stdlib_codec_roundtrip_keeps_unicode_and_is_compact() -> None:
+    codec = StdlibJsonCodec()
+    raw = codec.dumps(_PAYLOAD)
+    assert b", " not in raw
+    assert "집중 작업".encode("utf-8") in raw
+    assert codec.loads(raw) == _PAYLOAD
+    assert codec.loads(memoryview(raw)) == _PAYLOAD
+
+
+def test_stdlib_codec_encodes_dates_and_uuids() -> None:
+    raw = StdlibJsonCodec().dumps(
+        {"d": date(2026, 2, 15), "u": UUID("12345678-1234-5678-1234-567812345678")}
+    )
+    assert json.loads(raw) == {
+        "d": "2026-02-15",
+        "u": "12345678-1234-5678-1234-567812345678",
+    }
+
+
+@pytest.mark.skipif(json_codec.orjson is None, reason="orjson not installed")
+def test_backends_agree_on_typical_payloads() -> None:
+    assert OrjsonCodec().dumps(_PAYLOAD, sort_keys=True) == StdlibJsonCodec().dumps(
+        _PAYLOAD, sort_keys=True
+    )
+
+
+def test_get_codec_honours_explicit_stdlib() -> None:
+    assert get_codec("stdlib").name == "stdlib"
+    assert get_codec("auto").name == (
+        "orjson" if json_codec.orjson is not None else "stdlib"
+    )
+
+
+def test_loads_raises_stdlib_decode_error() -> None:
+    with pytest.raises(json.JSONDecodeError):
+        json_codec.loads("{invalid json")
+
+
+def test_fast_json_response_renders_with_codec() -> None:
+    resp = json_codec.FastJSONResponse({"detail": {"message": "저장 실패"}})
+    assert resp.headers["content-type"] == "application/json"
+    assert json.loads(resp.body) == {"detail": {"message": "저장 실패"}}
+
+
+@pytest.mark.skipif(json_codec.orjson is None, reason="orjson not installed")
+def test_backends_differ_on_small_floats() -> None:
+    # Documented difference; nothing persisted may hash codec bytes.
+    assert StdlibJsonCodec().dumps({"x": 1e-7}) == b'{"x":1e-07}'
+    assert OrjsonCodec().dumps({"x": 1e-7}) == b'{"x":1e-7}'
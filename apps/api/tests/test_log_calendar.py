@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import random
+from datetime import date as Date
+from datetime import timedelta
+
+from app.services.log_calendar import LogCalendar
+from app.services.streaks import compute_streaks
+
+
+def _calendar(first: Date, days: list[Date]) -> LogCalendar:
+    bits = 0
+    for day in days:
+        bits |= 1 << (day - first).days
+    size = max(1, (bits.bit_length() + 7) // 8)
+    return LogCalendar.from_row(
+        {
+            "first_date": first.isoformat(),
+            "bits": "\\x" + bits.to_bytes(size, "little").hex(),
+        }
+    )
+
+
+def test_from_row_uses_postgres_set_bit_order() -> None:
+    calendar = LogCalendar.from_row({"first_date": "2026-02-01", "bits": "\\x0102"})
+
+    assert calendar is not None
+    assert calendar.is_logged(Date(2026, 2, 1))
+    assert not calendar.is_logged(Date(2026, 2, 2))
+    assert calendar.is_logged(Date(2026, 2, 10))
+    assert calendar.last_logged() == Date(2026, 2, 10)
+
+
+def test_from_row_rejects_malformed_rows() -> None:
+    assert LogCalendar.from_row({"first_date": "2026-02-01", "bits": "0102"}) is None
+    assert LogCalendar.from_row({"first_date": None, "bits": "\\x01"}) is None
+
+
+def test_calendar_matches_compute_streaks_on_random_histories() -> None:
+    rng = random.Random(7)
+    first = Date(2016, 1, 1)
+    for _ in range(50):
+        days = sorted(
+            {
+                first + timedelta(days=rng.randrange(3650))
+                for _ in range(rng.randrange(1, 400))
+            }
+        )
+        calendar = _calendar(first, days)
+        for anchor in (days[-1], days[len(days) // 2], days[0] - timedelta(days=1)):
+            before = [day for day in days if day <= anchor]
+            assert calendar.streaks(anchor_date=anchor) == compute_streaks(
+                log_dates=before, anchor_date=anchor
+            )
+            assert calendar.days_logged(until=anchor) == len(before)
+        assert calendar.first_logged() == days[0]
+        # A 10-year history stays well under half a kilobyte.
+        assert calendar.bits.bit_length() <= 3650
+
+
+def test_days_logged_in_range() -> None:
+    first = Date(2026, 2, 1)
+    calendar = _calendar(first, [first + timedelta(days=n) for n in (0, 3, 4, 9)])
+
+    assert calendar.days_logged(since=Date(2026, 2, 3), until=Date(2026, 2, 9)) == 2
+    assert calendar.days_logged(since=Date(2026, 1, 1), until=Date(2026, 2, 28)) == 4
+
+
+def test_empty_calendar() -> None:
+    calendar = LogCalendar.empty()
+
+    assert calendar.streaks(anchor_date=Date(2026, 2, 1)) == (0, 0)
+    assert calendar.days_logged(until=Date(2026, 2, 1)) == 0
+    assert calendar.first_logged() is None
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.log_entries import (
+    EntryNotFound,
+    apply_entry_changes,
+    etag_matches,
+    log_etag,
+    with_entry_ids,
+    without_entry_ids,
+)
+
+
+def _entry(activity: str, **extra) -> dict:
+    return {"start": None, "end": None, "activity": activity, **extra}
+
+
+def test_with_entry_ids_derives_stable_ids_for_legacy_entries() -> None:
+    entries = [_entry("Deep work"), _entry("Deep work"), "not an entry"]
+
+    first = with_entry_ids(entries, date_iso="2026-02-15")
+    again = with_entry_ids(entries, date_iso="2026-02-15")
+
+    assert [e["id"] for e in first] == [e["id"] for e in again]
+    assert len({e["id"] for e in first}) == 2
+    assert "id" not in entries[0]
+
+
+def test_with_entry_ids_keeps_valid_ids_and_replaces_duplicates() -> None:
+    entries = [
+        _entry("A", id="keep-me"),
+        _entry("B", id="keep-me"),
+        _entry("C", id="bad id!"),
+    ]
+
+    out = with_entry_ids(entries, date_iso="2026-02-15")
+
+    assert out[0]["id"] == "keep-me"
+    assert out[1]["id"] not in {"keep-me", "bad id!"}
+    assert out[2]["id"] != "bad id!"
+    assert len({e["id"] for e in out}) == 3
+
+
+def test_apply_entry_changes_merges_in_place_and_appends_adds() -> None:
+    entries = [
+        _entry("A", id="a", focus=2),
+        _entry("B", id="b"),
+        _entry("C", id="c"),
+    ]
+
+    merged = apply_entry_changes(
+        entries,
+        add=[_entry("D")],
+        update=[("a", {"focus": 4})],
+        remove=["b"],
+    )
+
+    assert [e["activity"] for e in merged] == ["A", "C", "D"]
+    assert merged[0] == _entry("A", id="a", focus=4)
+    assert merged[2]["id"] not in {"a", "c"}
+    assert entries[0]["focus"] == 2
+
+
+def test_apply_entry_changes_rejects_unknown_ids() -> None:
+    with pytest.raises(EntryNotFound) as exc:
+        apply_entry_changes([_entry("A", id="a")], update=[("zzz", {"focus": 1})])
+    assert exc.value.entry_id == "zzz"
+
+
+def test_without_entry_ids_strips_only_ids() -> None:
+    assert without_entry_ids([_entry("A", id="a"), 3]) == [_entry("A"), 3]
+    assert without_entry_ids(None) is None
+
+
+def test_log_etag_and_if_match() -> None:
+    etag = log_etag("2026-02-15T10:00:00.123456+00:00")
+
+    assert etag is not None and etag.startswith('"')
+    assert etag != log_etag("2026-02-15T10:00:00.123457+00:00")
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert log_etag(None) is None
+    assert not etag_matches("*", None)
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import json
 from unittest.mock import AsyncMock
 
+import pytest
 from fastapi.testclient import TestClient
 
+from app.core import deadline, metrics
+from app.core.config import settings
+from app.schemas.logs import UpsertLogRequest
+from app.services import log_calendar, schema_capabilities
+from app.services.log_entries import log_etag
 from app.services.supabase_rest import SupabaseRestError
 
 
+@pytest.fixture(autouse=True)
+def _legacy_streak_recompute() -> None:
+    # Most tests script the pre-anchor select sequence; anchor tests opt in.
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, False)
+    schema_capabilities.mark(log_calendar.CALENDARS, False)
+
+
 def _log_payload(date_value: str, *, meta: dict | None = None) -> dict:
     payload = {
         "date": date_value,
@@ -48,15 +63,41 @@ def _profile_row() -> dict:
     }
 
 
+def _script_upserts(
+    supabase_mock,
+    *,
+    log: dict | list[dict] | Exception,
+    profile: dict | Exception | None = None,
+) -> None:
+    """Route upsert_one by table: the log save and the profile streak upsert."""
+    logs = list(log) if isinstance(log, list) else None
+
+    async def _upsert(*, table: str, bearer_token: str, row: dict, on_conflict: str):
+        result = log if table == "activity_logs" else profile
+        if table == "activity_logs" and logs is not None:
+            result = logs.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result if result is not None else {}
+
+    supabase_mock["upsert_one"].side_effect = _upsert
+
+
+def _upsert_calls(supabase_mock, table: str) -> list[dict]:
+    return [
+        call.kwargs
+        for call in supabase_mock["upsert_one"].await_args_list
+        if call.kwargs["table"] == table
+    ]
+
+
 # ── Happy-path: new row ────────────────────────────────────────────────────────
 
 def test_post_logs_creates_entry(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    """PATCH returns 0 rows (no existing row) → INSERT creates it."""
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = _row("2026-02-15")
-    supabase_mock["upsert_one"].return_value = _profile_row()
+    """One upsert on (user_id, date) creates the row."""
+    _script_upserts(supabase_mock, log=_row("2026-02-15"), profile=_profile_row())
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
     response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
@@ -65,50 +106,32 @@ def test_post_logs_creates_entry(
     body = response.json()
     assert body["id"] == "log-1"
     assert body["date"] == "2026-02-15"
-    assert supabase_mock["patch"].await_count == 1
-    assert supabase_mock["insert_one"].await_count == 1
+    log_calls = _upsert_calls(supabase_mock, "activity_logs")
+    assert len(log_calls) == 1
+    assert log_calls[0]["on_conflict"] == "user_id,date"
+    assert log_calls[0]["row"]["date"] == "2026-02-15"
+    assert supabase_mock["patch"].await_count == 0
+    assert supabase_mock["insert_one"].await_count == 0
     # Profile streak upsert still happens
-    assert supabase_mock["upsert_one"].await_count == 1
-    profile_call = supabase_mock["upsert_one"].await_args_list[0].kwargs
-    assert profile_call["table"] == "profiles"
-    assert profile_call["on_conflict"] == "id"
+    profile_calls = _upsert_calls(supabase_mock, "profiles")
+    assert len(profile_calls) == 1
+    assert profile_calls[0]["on_conflict"] == "id"
 
 
 # ── Happy-path: existing row ───────────────────────────────────────────────────
 
-def test_post_logs_updates_existing_row_via_patch(
-    authenticated_client: TestClient, supabase_mock
-) -> None:
-    """PATCH returns the updated row (existing row found and updated)."""
-    updated_row = _row("2026-02-15", note="updated note")
-    supabase_mock["patch"].return_value = [updated_row]
-    supabase_mock["upsert_one"].return_value = _profile_row()
-    supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
-
-    second_payload = _log_payload("2026-02-15")
-    second_payload["note"] = "updated note"
-    response = authenticated_client.post("/api/logs", json=second_payload)
-
-    assert response.status_code == 200
-    assert response.json()["note"] == "updated note"
-    assert supabase_mock["patch"].await_count == 1
-    # No INSERT needed when PATCH succeeds
-    assert supabase_mock["insert_one"].await_count == 0
-
-
 def test_post_logs_two_saves_same_date_both_succeed(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    """First save: PATCH → 0 rows → INSERT. Second save: PATCH → updated row."""
-    first_row = _row("2026-02-15", note="first")
-    second_row = _row("2026-02-15", note="updated")
-
-    supabase_mock["patch"].side_effect = [
-        [],        # first call: no existing row
-        [second_row],  # second call: row now exists
-    ]
-    supabase_mock["insert_one"].return_value = first_row
-    supabase_mock["upsert_one"].return_value = _profile_row()
+    """The second save of a day merges into the existing row through the same upsert."""
+    _script_upserts(
+        supabase_mock,
+        log=[
+            _row("2026-02-15", note="first"),
+            _row("2026-02-15", note="updated"),
+        ],
+        profile=_profile_row(),
+    )
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
     first = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
@@ -119,63 +142,36 @@ def test_post_logs_two_saves_same_date_both_succeed(
     assert first.status_code == 200
     assert second.status_code == 200
     assert second.json()["note"] == "updated"
+    log_calls = _upsert_calls(supabase_mock, "activity_logs")
+    assert [call["row"]["note"] for call in log_calls] == ["good session", "updated"]
+    assert supabase_mock["patch"].await_count == 0
 
 
-# ── Race-condition: INSERT conflicts ──────────────────────────────────────────
-
-def test_post_logs_insert_conflict_select_recovers(
-    authenticated_client: TestClient, supabase_mock
-) -> None:
-    """PATCH → 0 rows, INSERT conflicts (race), SELECT finds the row."""
-    existing_row = _row("2026-02-15", note="concurrent insert", meta={"mood": "neutral"})
-    conflict = SupabaseRestError(
-        status_code=409,
-        code="23505",
-        message='duplicate key value violates unique constraint "activity_logs_user_date_unique"',
-    )
-
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].side_effect = conflict
-    supabase_mock["select"].side_effect = [
-        [existing_row],  # race-condition recovery select
-        [{"date": "2026-02-15"}],  # streak rows select
-    ]
-    supabase_mock["upsert_one"].return_value = _profile_row()
-
-    response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
-
-    assert response.status_code == 200
-    body = response.json()
-    assert body["note"] == "concurrent insert"
-    assert supabase_mock["insert_one"].await_count == 1
-    assert supabase_mock["select"].await_count >= 1
-
-
-def test_post_logs_insert_conflict_no_row_found_raises(
+def test_post_logs_propagates_log_upsert_error(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    """PATCH → 0 rows, INSERT conflicts, SELECT also finds nothing → propagates error."""
-    conflict = SupabaseRestError(
-        status_code=409,
-        code="23505",
-        message='duplicate key value violates unique constraint "activity_logs_user_date_unique"',
+    _script_upserts(
+        supabase_mock,
+        log=SupabaseRestError(
+            status_code=403,
+            code="42501",
+            message="new row violates row-level security policy",
+        ),
     )
 
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].side_effect = conflict
-    supabase_mock["select"].return_value = []  # no row found
-
     response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
 
-    assert response.status_code == 409
+    assert response.status_code == 503
+    assert response.json()["detail"]["code"] == "42501"
+    assert _upsert_calls(supabase_mock, "profiles") == []
 
 
 # ── Meta column fallback ───────────────────────────────────────────────────────
 
-def test_post_logs_meta_column_missing_patch_falls_back(
+def test_post_logs_meta_column_missing_upsert_falls_back(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    """PATCH with meta fails (column missing) → retries without meta → inserts."""
+    """Upsert with meta fails (column missing) → retries without meta."""
     meta_error = SupabaseRestError(
         status_code=400,
         code="42703",
@@ -188,13 +184,9 @@ def test_post_logs_meta_column_missing_patch_falls_back(
         "entries": _log_payload("2026-02-15")["entries"],
         "note": "good session",
     }
-
-    supabase_mock["patch"].side_effect = [
-        meta_error,  # first patch (with meta) fails
-        [],          # second patch (without meta) → no row
-    ]
-    supabase_mock["insert_one"].return_value = row_no_meta
-    supabase_mock["upsert_one"].return_value = _profile_row()
+    _script_upserts(
+        supabase_mock, log=[meta_error, row_no_meta], profile=_profile_row()
+    )
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
     response = authenticated_client.post(
@@ -204,6 +196,11 @@ def test_post_logs_meta_column_missing_patch_falls_back(
 
     assert response.status_code == 200
     assert response.json()["id"] == "log-meta-fb"
+    assert response.json()["meta"] == {}
+    log_calls = _upsert_calls(supabase_mock, "activity_logs")
+    assert "meta" in log_calls[0]["row"]
+    assert "meta" not in log_calls[1]["row"]
+    assert schema_capabilities.is_known_missing(schema_capabilities.ACTIVITY_LOGS_META)
 
 
 # ── GET ────────────────────────────────────────────────────────────────────────
@@ -240,13 +237,15 @@ def test_logs_requires_auth(client: TestClient) -> None:
 def test_post_logs_updates_profile_streak_metrics(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = _row("2026-02-15")
-    supabase_mock["upsert_one"].return_value = {
-        "id": "00000000-0000-4000-8000-000000000001",
-        "current_streak": 5,
-        "longest_streak": 5,
-    }
+    _script_upserts(
+        supabase_mock,
+        log=_row("2026-02-15"),
+        profile={
+            "id": "00000000-0000-4000-8000-000000000001",
+            "current_streak": 5,
+            "longest_streak": 5,
+        },
+    )
     supabase_mock["select"].return_value = [
         {"date": "2026-02-11"},
         {"date": "2026-02-12"},
@@ -258,8 +257,7 @@ def test_post_logs_updates_profile_streak_metrics(
     response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
 
     assert response.status_code == 200
-    profile_call = supabase_mock["upsert_one"].await_args_list[0].kwargs
-    assert profile_call["table"] == "profiles"
+    profile_call = _upsert_calls(supabase_mock, "profiles")[0]
     assert profile_call["on_conflict"] == "id"
     assert profile_call["row"]["current_streak"] == 5
     assert profile_call["row"]["longest_streak"] == 5
@@ -268,12 +266,14 @@ def test_post_logs_updates_profile_streak_metrics(
 def test_post_logs_ignores_missing_streak_columns_until_migration_applied(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = _row("2026-02-15")
-    supabase_mock["upsert_one"].side_effect = SupabaseRestError(
-        status_code=400,
-        code="42703",
-        message='column "current_streak" does not exist',
+    _script_upserts(
+        supabase_mock,
+        log=_row("2026-02-15"),
+        profile=SupabaseRestError(
+            status_code=400,
+            code="42703",
+            message='column "current_streak" does not exist',
+        ),
     )
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
@@ -286,12 +286,14 @@ def test_post_logs_ignores_missing_streak_columns_until_migration_applied(
 def test_post_logs_ignores_profile_conflict_error(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = _row("2026-02-15")
-    supabase_mock["upsert_one"].side_effect = SupabaseRestError(
-        status_code=409,
-        code="23505",
-        message='duplicate key value violates unique constraint "profiles_pkey"',
+    _script_upserts(
+        supabase_mock,
+        log=_row("2026-02-15"),
+        profile=SupabaseRestError(
+            status_code=409,
+            code="23505",
+            message='duplicate key value violates unique constraint "profiles_pkey"',
+        ),
     )
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
@@ -304,8 +306,7 @@ def test_post_logs_ignores_profile_conflict_error(
 def test_post_logs_returns_200_when_streak_select_side_effect_fails(
     authenticated_client: TestClient, supabase_mock, monkeypatch
 ) -> None:
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = _row("2026-02-15")
+    _script_upserts(supabase_mock, log=_row("2026-02-15"))
     supabase_mock["select"].side_effect = SupabaseRestError(
         status_code=500,
         code="XX000",
@@ -324,12 +325,14 @@ def test_post_logs_returns_200_when_streak_select_side_effect_fails(
 def test_post_logs_returns_200_when_profile_upsert_side_effect_fails(
     authenticated_client: TestClient, supabase_mock, monkeypatch
 ) -> None:
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = _row("2026-02-15")
-    supabase_mock["upsert_one"].side_effect = SupabaseRestError(
-        status_code=400,
-        code="23502",
-        message='null value in column "age_group" violates not-null constraint',
+    _script_upserts(
+        supabase_mock,
+        log=_row("2026-02-15"),
+        profile=SupabaseRestError(
+            status_code=400,
+            code="23502",
+            message='null value in column "age_group" violates not-null constraint',
+        ),
     )
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
     log_mock = AsyncMock(return_value=None)
@@ -342,15 +345,146 @@ def test_post_logs_returns_200_when_profile_upsert_side_effect_fails(
     assert log_mock.await_count == 1
 
 
+def _streak_profile(last_date: str | None, *, current: int, longest: int) -> dict:
+    return {
+        "current_streak": current,
+        "longest_streak": longest,
+        "streak_last_date": last_date,
+    }
+
+
+def test_post_logs_advances_streak_without_reading_history(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, True)
+    profile_patches: list[dict] = []
+
+    async def _patch(*, table: str, bearer_token: str, params: dict, payload: dict):
+        if table == "profiles":
+            profile_patches.append({"params": params, "payload": payload})
+            return [{"id": "00000000-0000-4000-8000-000000000001"}]
+        return []
+
+    supabase_mock["patch"].side_effect = _patch
+    _script_upserts(supabase_mock, log=_row("2026-02-15"))
+    supabase_mock["select"].return_value = [
+        _streak_profile("2026-02-14", current=4, longest=6)
+    ]
+
+    response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
+
+    assert response.status_code == 200
+    assert supabase_mock["select"].await_count == 1
+    assert _upsert_calls(supabase_mock, "profiles") == []
+    assert profile_patches == [
+        {
+            "params": {
+                "id": "eq.00000000-0000-4000-8000-000000000001",
+                "streak_last_date": "eq.2026-02-14",
+            },
+            "payload": {
+                "current_streak": 5,
+                "longest_streak": 6,
+                "streak_last_date": "2026-02-15",
+            },
+        }
+    ]
+    assert metrics.counter_value("streak_updates_total", mode="incremental") == 1
+
+
+def test_post_logs_resave_of_latest_day_skips_streak_write(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, True)
+    _script_upserts(supabase_mock, log=_row("2026-02-15"))
+    supabase_mock["select"].return_value = [
+        _streak_profile("2026-02-15", current=5, longest=6)
+    ]
+
+    response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-15"))
+
+    assert response.status_code == 200
+    # Only the activity_logs upsert; no profile write, no history read.
+    assert supabase_mock["upsert_one"].await_count == 1
+    assert supabase_mock["patch"].await_count == 0
+    assert supabase_mock["select"].await_count == 1
+
+
+def test_post_logs_back_dated_save_recomputes_and_clears_anchor(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, True)
+    _script_upserts(supabase_mock, log=_row("2026-02-12"), profile=_profile_row())
+    supabase_mock["select"].side_effect = [
+        [_streak_profile("2026-02-15", current=2, longest=2)],
+        [
+            {"date": "2026-02-15"},
+            {"date": "2026-02-14"},
+            {"date": "2026-02-12"},
+            {"date": "2026-02-11"},
+            {"date": "2026-02-10"},
+        ],
+    ]
+
+    response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-12"))
+
+    assert response.status_code == 200
+    row = supabase_mock["upsert_one"].await_args.kwargs["row"]
+    assert row["current_streak"] == 3
+    assert row["longest_streak"] == 3
+    assert row["streak_last_date"] is None
+    assert metrics.counter_value("streak_updates_total", mode="recompute") == 1
+
+
+def test_post_logs_recomputes_when_anchor_moved_concurrently(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, True)
+    supabase_mock["patch"].return_value = []  # stale profile PATCH
+    _script_upserts(supabase_mock, log=_row("2026-02-16"), profile=_profile_row())
+    supabase_mock["select"].side_effect = [
+        [_streak_profile("2026-02-14", current=1, longest=1)],
+        [{"date": "2026-02-16"}, {"date": "2026-02-15"}, {"date": "2026-02-14"}],
+    ]
+
+    response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-16"))
+
+    assert response.status_code == 200
+    row = supabase_mock["upsert_one"].await_args.kwargs["row"]
+    assert row["current_streak"] == 3
+    assert row["streak_last_date"] == "2026-02-16"
+
+
+def test_post_logs_recompute_reads_log_calendar(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, True)
+    schema_capabilities.mark(log_calendar.CALENDARS, True)
+    _script_upserts(supabase_mock, log=_row("2026-02-12"), profile=_profile_row())
+    supabase_mock["select"].side_effect = [
+        [_streak_profile(None, current=0, longest=0)],
+        # 2026-02-10..12 and 2026-02-14..15 logged.
+        [{"first_date": "2026-02-10", "bits": "\\x37"}],
+    ]
+
+    response = authenticated_client.post("/api/logs", json=_log_payload("2026-02-12"))
+
+    assert response.status_code == 200
+    assert (
+        supabase_mock["select"].await_args.kwargs["table"] == "activity_log_calendars"
+    )
+    row = supabase_mock["upsert_one"].await_args.kwargs["row"]
+    assert (row["current_streak"], row["longest_streak"]) == (3, 3)
+    assert row["streak_last_date"] is None
+
+
 # ── Optional meta / entry fields ──────────────────────────────────────────────
 
 def test_post_logs_persists_optional_daily_meta(
     authenticated_client: TestClient, supabase_mock
 ) -> None:
     row = _row("2026-02-15", meta={"mood": "good", "sleep_quality": 4})
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = row
-    supabase_mock["upsert_one"].return_value = _profile_row()
+    _script_upserts(supabase_mock, log=row, profile=_profile_row())
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
     response = authenticated_client.post(
@@ -362,8 +496,7 @@ def test_post_logs_persists_optional_daily_meta(
     )
 
     assert response.status_code == 200
-    insert_call = supabase_mock["insert_one"].await_args_list[0].kwargs
-    assert insert_call["table"] == "activity_logs"
+    insert_call = _upsert_calls(supabase_mock, "activity_logs")[0]
     assert insert_call["row"]["meta"]["mood"] == "good"
     assert insert_call["row"]["meta"]["sleep_quality"] == 4
     assert insert_call["row"]["meta"]["hydration_level"] == "ok"
@@ -376,15 +509,13 @@ def test_post_logs_accepts_optional_entry_confidence(
     payload["entries"][0]["confidence"] = "low"
     row = _row("2026-02-15")
     row["entries"] = payload["entries"]
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = row
-    supabase_mock["upsert_one"].return_value = _profile_row()
+    _script_upserts(supabase_mock, log=row, profile=_profile_row())
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
     response = authenticated_client.post("/api/logs", json=payload)
 
     assert response.status_code == 200
-    insert_call = supabase_mock["insert_one"].await_args_list[0].kwargs
+    insert_call = _upsert_calls(supabase_mock, "activity_logs")[0]
     assert insert_call["row"]["entries"][0]["confidence"] == "low"
 
 
@@ -420,15 +551,511 @@ def test_post_logs_accepts_window_entry_without_exact_time(
         "note": payload["note"],
         "meta": payload["meta"],
     }
-    supabase_mock["patch"].return_value = []
-    supabase_mock["insert_one"].return_value = row
-    supabase_mock["upsert_one"].return_value = _profile_row()
+    _script_upserts(supabase_mock, log=row, profile=_profile_row())
     supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
 
     response = authenticated_client.post("/api/logs", json=payload)
 
     assert response.status_code == 200
-    insert_call = supabase_mock["insert_one"].await_args_list[0].kwargs
+    insert_call = _upsert_calls(supabase_mock, "activity_logs")[0]
     assert insert_call["row"]["entries"][0]["time_window"] == "afternoon"
     assert insert_call["row"]["entries"][0]["start"] is None
     assert insert_call["row"]["meta"]["parse_issues"]
+
+
+# ── Bulk import / export ──────────────────────────────────────────────────────
+
+
+def test_post_logs_bulk_upserts_in_chunks_and_recomputes_streak_once(
+    authenticated_client: TestClient, supabase_mock, monkeypatch
+) -> None:
+    monkeypatch.setattr("app.routes.logs._BULK_CHUNK_SIZE", 2)
+    _script_upserts(supabase_mock, log={}, profile=_profile_row())
+    supabase_mock["select"].return_value = [
+        {"date": "2026-02-15"},
+        {"date": "2026-02-14"},
+        {"date": "2026-02-13"},
+    ]
+
+    response = authenticated_client.post(
+        "/api/logs/bulk",
+        json={
+            "logs": [
+                _log_payload("2026-02-15"),
+                _log_payload("2026-02-13", meta={"mood": "good"}),
+                _log_payload("2026-02-14"),
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "saved": 3,
+        "from_date": "2026-02-13",
+        "to_date": "2026-02-15",
+    }
+    chunks = [call.kwargs for call in supabase_mock["upsert_many"].await_args_list]
+    assert [len(call["rows"]) for call in chunks] == [2, 1]
+    assert all(call["on_conflict"] == "user_id,date" for call in chunks)
+    assert chunks[0]["rows"][1]["meta"]["mood"] == "good"
+    assert _upsert_calls(supabase_mock, "activity_logs") == []
+    profile_calls = _upsert_calls(supabase_mock, "profiles")
+    assert len(profile_calls) == 1
+    assert profile_calls[0]["row"]["current_streak"] == 3
+    assert metrics.counter_value("streak_updates_total", mode="recompute") == 1
+
+
+def test_post_logs_bulk_rejects_duplicate_dates(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    response = authenticated_client.post(
+        "/api/logs/bulk",
+        json={"logs": [_log_payload("2026-02-15"), _log_payload("2026-02-15")]},
+    )
+
+    assert response.status_code == 422
+    supabase_mock["upsert_many"].assert_not_awaited()
+
+
+def test_get_logs_export_streams_keyset_pages_as_ndjson(
+    authenticated_client: TestClient, supabase_mock, monkeypatch
+) -> None:
+    monkeypatch.setattr("app.routes.logs._EXPORT_PAGE_SIZE", 2)
+    supabase_mock["select"].side_effect = [
+        [_row("2026-02-10"), _row("2026-02-12", meta={"mood": "good"})],
+        [{**_row("2026-02-15"), "meta": None}],
+    ]
+
+    response = authenticated_client.get(
+        "/api/logs/export", params={"from": "2026-02-01", "to": "2026-02-28"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["date"] for line in lines] == [
+        "2026-02-10",
+        "2026-02-12",
+        "2026-02-15",
+    ]
+    assert lines[1]["meta"] == {"mood": "good"}
+    assert lines[2]["meta"] == {}
+    # Each line is a POST /logs body, so an export feeds back into /logs/bulk.
+    for line in lines:
+        assert set(line) == {"date", "entries", "note", "meta"}
+        UpsertLogRequest.model_validate(line)
+    filters = [
+        call.kwargs["params"]["and"] for call in supabase_mock["select"].await_args_list
+    ]
+    assert filters == [
+        "(user_id.eq.00000000-0000-4000-8000-000000000001,"
+        "date.gte.2026-02-01,date.lte.2026-02-28)",
+        "(user_id.eq.00000000-0000-4000-8000-000000000001,"
+        "date.gt.2026-02-12,date.lte.2026-02-28)",
+    ]
+
+
+def test_get_logs_export_pages_are_not_bound_by_request_deadline(
+    authenticated_client: TestClient, supabase_mock, monkeypatch
+) -> None:
+    monkeypatch.setattr("app.routes.logs._EXPORT_PAGE_SIZE", 1)
+    monkeypatch.setattr(settings, "request_deadline_seconds", 0.2)
+    pages = [[_row("2026-02-10")], [_row("2026-02-12")], []]
+    remaining: list[float | None] = []
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        remaining.append(deadline.remaining())
+        if len(remaining) == 1:
+            # The first page uses up the whole request budget.
+            await asyncio.sleep(0.25)
+        return pages.pop(0)
+
+    supabase_mock["select"].side_effect = _select
+
+    response = authenticated_client.get(
+        "/api/logs/export", params={"from": "2026-02-01", "to": "2026-02-28"}
+    )
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2
+    assert len(remaining) == 3
+    assert all(left is not None and left > 0.1 for left in remaining[1:])
+
+
+# ── Entry-level PATCH ─────────────────────────────────────────────────────────
+
+
+def _stored_day() -> dict:
+    row = _row("2026-02-15")
+    row["updated_at"] = "2026-02-15T10:00:00.123456+00:00"
+    row["entries"] = [
+        {
+            "id": "morning",
+            "start": "09:00",
+            "end": "10:00",
+            "activity": "Deep work",
+            "focus": 3,
+        },
+        {"id": "lunch", "start": "12:00", "end": "13:00", "activity": "Lunch"},
+    ]
+    return row
+
+
+def test_get_logs_returns_etag_and_entry_ids(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].return_value = [_row("2026-02-15")]
+
+    first = authenticated_client.get("/api/logs", params={"date": "2026-02-15"})
+    second = authenticated_client.get("/api/logs", params={"date": "2026-02-15"})
+
+    assert first.status_code == 200
+    assert first.headers["etag"] == log_etag("2026-02-15T00:00:00+00:00")
+    entry_id = first.json()["entries"][0]["id"]
+    assert entry_id and entry_id == second.json()["entries"][0]["id"]
+
+
+def test_patch_log_entries_merges_and_writes_conditionally(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    stored = _stored_day()
+    supabase_mock["select"].return_value = [stored]
+    supabase_mock["patch"].side_effect = lambda **kwargs: [
+        {**stored, **kwargs["payload"], "updated_at": "2026-02-15T11:00:00+00:00"}
+    ]
+
+    response = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries",
+        headers={"If-Match": log_etag(stored["updated_at"])},
+        json={
+            "update": [{"id": "morning", "set": {"focus": 5}}],
+            "remove": ["lunch"],
+            "add": [{"start": "14:00", "end": "15:00", "activity": "Review"}],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == log_etag("2026-02-15T11:00:00+00:00")
+    call = supabase_mock["patch"].await_args.kwargs
+    assert call["table"] == "activity_logs"
+    assert call["params"]["updated_at"] == "eq.2026-02-15T10:00:00.123456+00:00"
+    assert set(call["payload"]) == {"entries", "note"}
+    entries = call["payload"]["entries"]
+    assert [(e["id"], e["activity"], e["focus"]) for e in entries[:1]] == [
+        ("morning", "Deep work", 5)
+    ]
+    assert [e["activity"] for e in entries] == ["Deep work", "Review"]
+    assert entries[1]["id"]
+    assert metrics.counter_value("log_entry_patches_total", result="written") == 1
+
+
+def test_patch_log_entries_requires_if_match(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    response = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries", json={"remove": ["lunch"]}
+    )
+
+    assert response.status_code == 428
+    supabase_mock["select"].assert_not_awaited()
+
+
+def test_patch_log_entries_rejects_stale_etag(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    stored = _stored_day()
+    supabase_mock["select"].return_value = [stored]
+
+    response = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries",
+        headers={"If-Match": log_etag("2026-02-15T09:00:00+00:00")},
+        json={"remove": ["lunch"]},
+    )
+
+    assert response.status_code == 412
+    assert response.headers["etag"] == log_etag(stored["updated_at"])
+    supabase_mock["patch"].assert_not_awaited()
+
+
+def test_patch_log_entries_returns_412_when_row_changed_before_write(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    stored = _stored_day()
+    supabase_mock["select"].return_value = [stored]
+    supabase_mock["patch"].return_value = []
+
+    response = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries",
+        headers={"If-Match": log_etag(stored["updated_at"])},
+        json={"remove": ["lunch"]},
+    )
+
+    assert response.status_code == 412
+    assert metrics.counter_value("log_entry_patches_total", result="conflict") == 1
+
+
+def test_patch_log_entries_validates_merged_day(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    stored = _stored_day()
+    supabase_mock["select"].return_value = [stored]
+    headers = {"If-Match": log_etag(stored["updated_at"])}
+
+    overlap = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries",
+        headers=headers,
+        json={"update": [{"id": "lunch", "set": {"start": "09:30"}}]},
+    )
+    unknown = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries",
+        headers=headers,
+        json={"remove": ["missing"]},
+    )
+
+    assert overlap.status_code == 422
+    assert unknown.status_code == 404
+    assert unknown.json()["detail"]["entry_id"] == "missing"
+    supabase_mock["patch"].assert_not_awaited()
+
+
+def test_patch_log_entries_skips_write_when_nothing_changes(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    stored = _stored_day()
+    # Stored exactly as a save writes it, so an unchanged merge is a no-op.
+    saved = UpsertLogRequest.model_validate(
+        {"date": "2026-02-15", "entries": stored["entries"][:1]}
+    )
+    stored["entries"] = [e.model_dump() for e in saved.entries]
+    supabase_mock["select"].return_value = [stored]
+
+    response = authenticated_client.patch(
+        "/api/logs/2026-02-15/entries",
+        headers={"If-Match": log_etag(stored["updated_at"])},
+        json={"update": [{"id": "morning", "set": {"focus": 3}}]},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == log_etag(stored["updated_at"])
+    supabase_mock["patch"].assert_not_awaited()
+    assert metrics.counter_value("log_entry_patches_total", result="noop") == 1
+
+
+# ── Batched sync ──────────────────────────────────────────────────────────────
+
+
+def _sync_result(**overrides) -> dict:
+    result = {
+        "applied": [],
+        "conflicts": [],
+        "changes": [],
+        "deleted": [],
+        "cursor": "2026-02-16T08:00:00.5+00:00",
+    }
+    result.update(overrides)
+    return result
+
+
+def test_post_logs_sync_applies_batch_through_rpc(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    _script_upserts(supabase_mock, log={}, profile=_profile_row())
+    server = {**_row("2026-02-14", note="edited elsewhere"), "meta": None}
+    supabase_mock["rpc"].return_value = [
+        _sync_result(
+            applied=[
+                {
+                    "date": "2026-02-15",
+                    "version": "2026-02-16T08:00:00.5+00:00",
+                    "deleted": False,
+                    "written": True,
+                },
+                {
+                    "date": "2026-02-13",
+                    "version": None,
+                    "deleted": True,
+                    "written": True,
+                },
+            ],
+            conflicts=[{"date": "2026-02-14", "server": server}],
+            changes=[_row("2026-02-10")],
+            deleted=["2026-02-09"],
+        )
+    ]
+    supabase_mock["select"].return_value = [{"date": "2026-02-15"}]
+
+    response = authenticated_client.post(
+        "/api/logs/sync",
+        json={
+            "since": "2026-02-15T20:00:00+00:00",
+            "mutations": [
+                _log_payload("2026-02-15", meta={"mood": "good"}),
+                {
+                    **_log_payload("2026-02-14"),
+                    "base_version": "2026-02-14T00:00:00+00:00",
+                },
+                {
+                    "date": "2026-02-13",
+                    "base_version": "2026-02-13T00:00:00+00:00",
+                    "deleted": True,
+                },
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    call = supabase_mock["rpc"].await_args.kwargs
+    assert call["fn_name"] == "sync_activity_logs"
+    assert call["params"]["p_since"] == "2026-02-15T20:00:00+00:00"
+    mutations = call["params"]["p_mutations"]
+    assert [(m["date"], m["base_version"], m["deleted"]) for m in mutations] == [
+        ("2026-02-15", None, False),
+        ("2026-02-14", "2026-02-14T00:00:00+00:00", False),
+        ("2026-02-13", "2026-02-13T00:00:00+00:00", True),
+    ]
+    assert mutations[0]["meta"]["mood"] == "good"
+    assert mutations[0]["entries"][0]["id"]
+    body = response.json()
+    assert body["cursor"] == "2026-02-16T08:00:00.5+00:00"
+    assert [a["date"] for a in body["applied"]] == ["2026-02-15", "2026-02-13"]
+    assert body["conflicts"][0]["server"]["note"] == "edited elsewhere"
+    assert body["conflicts"][0]["server"]["meta"] == {}
+    assert body["changes"][0]["entries"][0]["id"]
+    assert body["deleted"] == ["2026-02-09"]
+    # One recompute for the batch, anchored at the latest written day.
+    profile_calls = _upsert_calls(supabase_mock, "profiles")
+    assert len(profile_calls) == 1
+    assert metrics.counter_value("streak_updates_total", mode="recompute") == 1
+    assert metrics.counter_value("log_sync_mutations_total", result="written") == 2
+    assert metrics.counter_value("log_sync_mutations_total", result="conflict") == 1
+
+
+def test_post_logs_sync_delete_only_anchors_at_latest_remaining_log(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.PROFILES_STREAK_LAST_DATE, True)
+    _script_upserts(supabase_mock, log={}, profile=_profile_row())
+    supabase_mock["rpc"].return_value = [
+        _sync_result(
+            applied=[
+                {
+                    "date": "2026-01-20",
+                    "version": None,
+                    "deleted": True,
+                    "written": True,
+                }
+            ]
+        )
+    ]
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "profiles":
+            return [_streak_profile("2026-02-15", current=3, longest=3)]
+        return [{"date": "2026-02-15"}, {"date": "2026-02-14"}, {"date": "2026-02-13"}]
+
+    supabase_mock["select"].side_effect = _select
+
+    response = authenticated_client.post(
+        "/api/logs/sync",
+        json={
+            "mutations": [
+                {
+                    "date": "2026-01-20",
+                    "base_version": "2026-01-20T00:00:00+00:00",
+                    "deleted": True,
+                }
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    profile_calls = _upsert_calls(supabase_mock, "profiles")
+    assert len(profile_calls) == 1
+    assert profile_calls[0]["row"]["current_streak"] == 3
+    assert profile_calls[0]["row"]["streak_last_date"] == "2026-02-15"
+
+
+def test_post_logs_sync_without_writes_skips_streaks(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["rpc"].return_value = [
+        _sync_result(
+            applied=[
+                {
+                    "date": "2026-02-15",
+                    "version": "2026-02-15T00:00:00+00:00",
+                    "deleted": False,
+                    "written": False,
+                }
+            ]
+        )
+    ]
+
+    response = authenticated_client.post(
+        "/api/logs/sync", json={"mutations": [_log_payload("2026-02-15")]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["applied"][0]["written"] is False
+    assert supabase_mock["rpc"].await_args.kwargs["params"]["p_since"] is None
+    supabase_mock["select"].assert_not_awaited()
+    supabase_mock["upsert_one"].assert_not_awaited()
+
+
+def test_post_logs_sync_returns_503_until_rpc_is_installed(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["rpc"].side_effect = SupabaseRestError(
+        status_code=404,
+        code="PGRST202",
+        message="Could not find the function public.sync_activity_logs",
+    )
+
+    first = authenticated_client.post(
+        "/api/logs/sync", json={"mutations": [_log_payload("2026-02-15")]}
+    )
+    second = authenticated_client.post("/api/logs/sync", json={"mutations": []})
+
+    assert first.status_code == 503
+    assert second.status_code == 503
+    assert supabase_mock["rpc"].await_count == 1
+    assert schema_capabilities.is_known_missing(schema_capabilities.SYNC_ACTIVITY_LOGS)
+    supabase_mock["upsert_one"].assert_not_awaited()
+
+
+def test_post_logs_sync_rejects_duplicate_dates(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    response = authenticated_client.post(
+        "/api/logs/sync",
+        json={
+            "mutations": [
+                _log_payload("2026-02-15"),
+                {"date": "2026-02-15", "deleted": True},
+            ]
+        },
+    )
+
+    assert response.status_code == 422
+    supabase_mock["rpc"].assert_not_awaited()
+
+
+def test_post_logs_sync_rejects_malformed_base_version(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    response = authenticated_client.post(
+        "/api/logs/sync",
+        json={
+            "mutations": [
+                _log_payload("2026-02-14"),
+                {**_log_payload("2026-02-15"), "base_version": "abc"},
+                {**_log_payload("2026-02-16"), "base_version": "2026-02-16"},
+            ]
+        },
+    )
+
+    assert response.status_code == 422
+    locs = [err["loc"] for err in response.json()["detail"]]
+    assert ["body", "mutations", 1, "base_version"] in locs
+    assert ["body", "mutations", 2, "base_version"] in locs
+    supabase_mock["rpc"].assert_not_awaited()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core import metrics
+from app.services.nudge_bus import InProcessNudgeBus
+
+
+@pytest.mark.asyncio
+async def test_in_process_bus_delivers_newest_payload_to_user_subscribers() -> None:
+    bus = InProcessNudgeBus()
+
+    async with bus.subscribe("u1") as first, bus.subscribe("u1") as second:
+        async with bus.subscribe("u2") as other:
+            await bus.publish("u1", {"nudge_id": "n1"})
+            await bus.publish("u1", {"nudge_id": "n2"})
+
+            assert await first.get(1.0) == {"nudge_id": "n2"}
+            assert await second.get(1.0) == {"nudge_id": "n2"}
+            assert await other.get(0) is None
+        assert bus.subscriber_count() == 2
+
+    assert bus.subscriber_count() == 0
+    await bus.publish("u1", {"nudge_id": "n3"})
+    assert (
+        metrics.counter_value("nudge_bus_published_total", result="no_subscriber") == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_in_process_bus_wakes_a_waiting_subscriber() -> None:
+    bus = InProcessNudgeBus()
+
+    async with bus.subscribe("u1") as sub:
+        waiter = asyncio.create_task(sub.get(5.0))
+        await asyncio.sleep(0)
+        await bus.publish("u1", {"nudge_id": "n1"})
+
+        assert await asyncio.wait_for(waiter, 1.0) == {"nudge_id": "n1"}
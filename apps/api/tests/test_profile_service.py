@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.plan import get_subscription_info, invalidate_subscription_cache
+from app.services.profile import get_profile_row, invalidate_profile_cache
+from app.services.stripe_service import set_subscription_free
+
+
+@pytest.mark.asyncio
+async def test_profile_row_is_cached_until_invalidated(supabase_mock) -> None:
+    supabase_mock["select"].return_value = [
+        {"id": "u1", "goal_keyword": "deep", "trend_compare_by": ["age_group"]}
+    ]
+
+    first = await get_profile_row(user_id="u1", access_token="token")
+    assert first is not None
+    first["trend_compare_by"].append("gender")  # callers get their own copy
+    second = await get_profile_row(user_id="u1", access_token="token")
+
+    assert supabase_mock["select"].await_count == 1
+    assert second == {
+        "id": "u1",
+        "goal_keyword": "deep",
+        "trend_compare_by": ["age_group"],
+    }
+
+    invalidate_profile_cache("u1")
+    await get_profile_row(user_id="u1", access_token="token")
+    assert supabase_mock["select"].await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_profile_is_cached_as_none(supabase_mock) -> None:
+    supabase_mock["select"].return_value = []
+
+    assert await get_profile_row(user_id="u1", access_token="token") is None
+    assert await get_profile_row(user_id="u1", access_token="token") is None
+    assert supabase_mock["select"].await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_subscription_cache_invalidated_by_stripe_write(supabase_mock) -> None:
+    supabase_mock["select"].return_value = [
+        {"user_id": "u1", "plan": "pro", "status": "active"}
+    ]
+    assert (await get_subscription_info(user_id="u1", access_token="t")).plan == "pro"
+
+    supabase_mock["select"].return_value = [
+        {"user_id": "u1", "plan": "free", "status": "canceled"}
+    ]
+    assert (await get_subscription_info(user_id="u1", access_token="t")).plan == "pro"
+
+    await set_subscription_free(
+        user_id="u1", customer_id="cus_1", subscription_id="sub_1", status="canceled"
+    )
+    assert (await get_subscription_info(user_id="u1", access_token="t")).plan == "free"
+    assert supabase_mock["select"].await_count == 2
+
+    invalidate_subscription_cache("u1")
+    await get_subscription_info(user_id="u1", access_token="t")
+    assert supabase_mock["select"].await_count == 3
+
+
+def test_put_preferences_invalidates_cached_profile(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].return_value = [{"id": "u1", "goal_keyword": "deep"}]
+    before = authenticated_client.get("/api/preferences/profile")
+    assert before.json()["goal_keyword"] == "deep"
+
+    supabase_mock["upsert_one"].return_value = {"goal_keyword": "study"}
+    supabase_mock["select"].return_value = [{"id": "u1", "goal_keyword": "study"}]
+    saved = authenticated_client.put(
+        "/api/preferences/profile", json={"goal_keyword": "study"}
+    )
+    assert saved.status_code == 200
+
+    after = authenticated_client.get("/api/preferences/profile")
+    assert after.json()["goal_keyword"] == "study"
+    assert supabase_mock["select"].await_count == 2
@@ -6,6 +6,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 import app.routes.recovery as recovery_route
+from app.services import schema_capabilities
 from app.services.supabase_rest import SupabaseRestError
 
 TEST_USER_ID = "00000000-0000-4000-8000-000000000001"
@@ -19,6 +20,10 @@ def recovery_cron_flags(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(recovery_route.settings, "recovery_cron_token", "cron-secret")
     monkeypatch.setattr(recovery_route.settings, "recovery_auto_lapse_batch_size", 100)
     monkeypatch.setattr(recovery_route.settings, "recovery_nudge_batch_size", 100)
+    # These tests model candidates with select(); the candidate RPCs have their
+    # own tests.
+    schema_capabilities.mark(schema_capabilities.AUTO_LAPSE_CANDIDATES, False)
+    schema_capabilities.mark(schema_capabilities.NUDGE_CANDIDATES, False)
 
 
 def test_auto_lapse_cron_run_twice_creates_only_one_open_session(
@@ -368,3 +373,592 @@ def test_cron_returns_503_when_service_role_key_missing(
         nudge_response.json()["detail"]["reason"]
         == "service_role_key_missing"
     )
+
+
+def test_nudge_cron_batches_state_nudge_and_telemetry_writes(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = datetime(2026, 2, 18, 3, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+
+    user_ids = [f"00000000-0000-4000-8000-00000000010{i}" for i in range(3)]
+    open_sessions = [
+        {
+            "id": f"sess-{i}",
+            "user_id": uid,
+            "status": "open",
+            "entry_surface": None,
+            "lapse_start_ts": (now - timedelta(hours=6)).isoformat(),
+            "detection_source": "auto",
+        }
+        for i, uid in enumerate(user_ids)
+    ]
+    # The third user has no state row.
+    states = [
+        {
+            "user_id": uid,
+            "last_engaged_at": (now - timedelta(hours=20)).isoformat(),
+            "last_nudge_at": None,
+            "locale": "en",
+            "timezone": "Asia/Seoul",
+            "quiet_hours_start": 22,
+            "quiet_hours_end": 8,
+        }
+        for uid in user_ids[:2]
+    ]
+    state_queries: list[str] = []
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "recovery_sessions":
+            return list(open_sessions)
+        if table == "user_recovery_state":
+            if "user_id" in params:
+                state_queries.append(params["user_id"])
+            return [dict(row) for row in states]
+        return []
+
+    async def _insert_many(*, table: str, rows: list[dict], **_: object):
+        # The second session already has a nudge: the conflict skips it.
+        return [dict(row) for row in rows if row["session_id"] != "sess-1"]
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["insert_many"].side_effect = _insert_many
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/nudge", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["scanned_sessions"] == 3
+    assert body["scheduled_count"] == 1
+    assert body["suppressed_by_reason"] == {
+        "missing_state": 1,
+        "already_scheduled": 1,
+    }
+    assert state_queries == [f"in.({','.join(user_ids)})"]
+
+    nudge_calls = [
+        c
+        for c in supabase_mock["insert_many"].await_args_list
+        if c.kwargs["table"] == "recovery_nudges"
+    ]
+    assert len(nudge_calls) == 1
+    assert nudge_calls[0].kwargs["on_conflict"] == "user_id,session_id,nudge_channel"
+    assert [r["session_id"] for r in nudge_calls[0].kwargs["rows"]] == [
+        "sess-0",
+        "sess-1",
+    ]
+
+    merges = [
+        c.kwargs
+        for c in supabase_mock["rpc"].await_args_list
+        if c.kwargs["fn_name"] == "upsert_user_recovery_state_batch"
+    ]
+    assert len(merges) == 1
+    assert merges[0]["params"]["p_rows"] == [
+        {
+            "user_id": user_ids[0],
+            "locale": "en",
+            "timezone": "Asia/Seoul",
+            "last_engaged_at": None,
+            "last_auto_lapse_at": None,
+            "last_nudge_at": now.isoformat(),
+        }
+    ]
+    upserts = {
+        c.kwargs["table"]: c.kwargs["rows"]
+        for c in supabase_mock["upsert_many"].await_args_list
+    }
+    assert "user_recovery_state" not in upserts
+    assert sorted(r["event_type"] for r in upserts["usage_events"]) == [
+        "nudge_scheduled",
+        "nudge_sent_count",
+        "nudge_suppressed",
+        "nudge_suppressed",
+        "nudge_suppressed_count",
+        "nudge_suppressed_count",
+    ]
+    supabase_mock["upsert_one"].assert_not_awaited()
+    supabase_mock["insert_one"].assert_not_awaited()
+
+
+def test_nudge_cron_pushes_each_sessions_own_lapse_start(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = datetime(2026, 2, 18, 3, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+
+    user_ids = [f"00000000-0000-4000-8000-00000000020{i}" for i in range(3)]
+    lapse_starts = [now - timedelta(hours=6), now - timedelta(hours=9), None]
+    # The last scanned session has no lapse start and is skipped.
+    open_sessions = [
+        {
+            "id": f"sess-{i}",
+            "user_id": uid,
+            "status": "open",
+            "entry_surface": None,
+            "lapse_start_ts": lapse.isoformat() if lapse else None,
+            "detection_source": "auto",
+        }
+        for i, (uid, lapse) in enumerate(zip(user_ids, lapse_starts, strict=True))
+    ]
+    states = [
+        {
+            "user_id": uid,
+            "last_engaged_at": (now - timedelta(hours=20)).isoformat(),
+            "last_nudge_at": None,
+            "locale": "en",
+            "timezone": "Asia/Seoul",
+            "quiet_hours_start": 22,
+            "quiet_hours_end": 8,
+        }
+        for uid in user_ids
+    ]
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "recovery_sessions":
+            return list(open_sessions)
+        if table == "user_recovery_state":
+            return [dict(row) for row in states]
+        return []
+
+    async def _insert_many(*, table: str, rows: list[dict], **_: object):
+        return [dict(row) for row in rows]
+
+    published: list[tuple[str, dict]] = []
+
+    class _RecordingBus:
+        async def publish(self, user_id: str, payload: dict) -> None:
+            published.append((user_id, payload))
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["insert_many"].side_effect = _insert_many
+    monkeypatch.setattr(recovery_route, "get_nudge_bus", lambda: _RecordingBus())
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/nudge", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["scheduled_count"] == 2
+    assert body["suppressed_by_reason"] == {"missing_lapse_start": 1}
+    assert [
+        (user_id, datetime.fromisoformat(payload["lapse_start_ts"]))
+        for user_id, payload in published
+    ] == [(user_ids[0], lapse_starts[0]), (user_ids[1], lapse_starts[1])]
+    merges = [
+        c.kwargs
+        for c in supabase_mock["rpc"].await_args_list
+        if c.kwargs["fn_name"] == "upsert_user_recovery_state_batch"
+    ]
+    assert len(merges) == 1
+
+
+def test_nudge_cron_records_telemetry_when_state_merge_fails(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = datetime(2026, 2, 18, 3, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+    user_id = "00000000-0000-4000-8000-000000000301"
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "recovery_sessions":
+            return [
+                {
+                    "id": "sess-0",
+                    "user_id": user_id,
+                    "status": "open",
+                    "entry_surface": None,
+                    "lapse_start_ts": (now - timedelta(hours=6)).isoformat(),
+                    "detection_source": "auto",
+                }
+            ]
+        if table == "user_recovery_state":
+            return [
+                {
+                    "user_id": user_id,
+                    "last_engaged_at": (now - timedelta(hours=20)).isoformat(),
+                    "last_nudge_at": None,
+                    "locale": "en",
+                    "timezone": "Asia/Seoul",
+                    "quiet_hours_start": 22,
+                    "quiet_hours_end": 8,
+                }
+            ]
+        return []
+
+    async def _insert_many(*, table: str, rows: list[dict], **_: object):
+        return [dict(row) for row in rows]
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["insert_many"].side_effect = _insert_many
+    supabase_mock["rpc"].side_effect = SupabaseRestError(
+        status_code=500, code="XX000", message="state merge failed"
+    )
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/nudge", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["scheduled_count"] == 1
+    upserts = {
+        c.kwargs["table"]: c.kwargs["rows"]
+        for c in supabase_mock["upsert_many"].await_args_list
+    }
+    assert sorted(r["event_type"] for r in upserts["usage_events"]) == [
+        "nudge_scheduled",
+        "nudge_sent_count",
+    ]
+
+
+def test_auto_lapse_cron_isolates_per_user_failures(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = datetime(2026, 2, 18, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+    monkeypatch.setattr(recovery_route.settings, "recovery_cron_concurrency", 4)
+
+    user_ids = [f"00000000-0000-4000-8000-00000000020{i}" for i in range(4)]
+    states = [
+        {
+            "user_id": uid,
+            "last_engaged_at": (now - timedelta(hours=30)).isoformat(),
+            "lapse_threshold_hours": 12,
+            "last_auto_lapse_at": None,
+            "locale": "ko",
+            "timezone": "Asia/Seoul",
+        }
+        for uid in user_ids
+    ]
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "user_recovery_state" and "or" in params:
+            return [dict(row) for row in states]
+        return []
+
+    async def _insert_one(*, table: str, bearer_token: str, row: dict):
+        if table == "recovery_sessions" and row["user_id"] == user_ids[1]:
+            raise SupabaseRestError(status_code=500, message="boom")
+        if table == "recovery_sessions" and row["user_id"] == user_ids[2]:
+            raise SupabaseRestError(
+                status_code=409,
+                code="23505",
+                message='duplicate key value violates unique constraint "recovery_sessions_one_open_per_user"',
+            )
+        return dict(row)
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["insert_one"].side_effect = _insert_one
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/auto-lapse", headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["scanned_users"] == 4
+    assert body["created_count"] == 2
+    assert body["failed_count"] == 1
+    assert body["suppressed_by_reason"] == {"open_session_exists": 1}
+
+
+def test_auto_lapse_cron_falls_back_when_state_merge_rpc_missing(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services import schema_capabilities
+
+    now = datetime(2026, 2, 18, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+    state = {
+        "user_id": TEST_USER_ID,
+        "last_engaged_at": (now - timedelta(hours=30)).isoformat(),
+        "lapse_threshold_hours": 12,
+        "last_auto_lapse_at": None,
+        "locale": "ko",
+        "timezone": None,
+    }
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "user_recovery_state" and "or" in params:
+            return [dict(state)]
+        return []
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        raise SupabaseRestError(
+            status_code=404,
+            code="PGRST202",
+            message="Could not find the function public.upsert_user_recovery_state_batch",
+        )
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["insert_one"].side_effect = lambda **kwargs: dict(kwargs["row"])
+    supabase_mock["rpc"].side_effect = _rpc
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/auto-lapse", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["created_count"] == 1
+    assert schema_capabilities.is_known_missing(
+        schema_capabilities.USER_RECOVERY_STATE_MERGE
+    )
+    state_upserts = [
+        c.kwargs
+        for c in supabase_mock["upsert_many"].await_args_list
+        if c.kwargs["table"] == "user_recovery_state"
+    ]
+    assert state_upserts[0]["rows"] == [
+        {
+            "user_id": TEST_USER_ID,
+            "locale": "ko",
+            "timezone": None,
+            "last_auto_lapse_at": now.isoformat(),
+        }
+    ]
+
+
+def test_auto_lapse_cron_pages_candidates_with_keyset_rpc(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = datetime(2026, 2, 18, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+    monkeypatch.setattr(recovery_route.settings, "recovery_auto_lapse_batch_size", 2)
+    schema_capabilities.mark(schema_capabilities.AUTO_LAPSE_CANDIDATES, True)
+
+    states = [
+        {
+            "user_id": f"00000000-0000-4000-8000-00000000030{i}",
+            "last_engaged_at": (now - timedelta(hours=40 - i)).isoformat(),
+            "lapse_threshold_hours": 12,
+            "last_auto_lapse_at": None,
+            "locale": "ko",
+            "timezone": "Asia/Seoul",
+        }
+        for i in range(3)
+    ]
+    pages = [states[:2], states[2:]]
+    rpc_params: list[dict] = []
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        if fn_name == "auto_lapse_candidates":
+            rpc_params.append(dict(params or {}))
+            return [dict(row) for row in pages[len(rpc_params) - 1]]
+        return []
+
+    supabase_mock["rpc"].side_effect = _rpc
+    supabase_mock["insert_one"].side_effect = lambda **kwargs: dict(kwargs["row"])
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/auto-lapse", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["scanned_users"] == 3
+    assert response.json()["created_count"] == 3
+    assert "p_after_user_id" not in rpc_params[0]
+    assert rpc_params[1]["p_after_engaged_at"] == states[1]["last_engaged_at"]
+    assert rpc_params[1]["p_after_user_id"] == states[1]["user_id"]
+    assert all(params["p_limit"] == 2 for params in rpc_params)
+    # The anti-join runs in the database; no open-session snapshot is loaded.
+    assert not [
+        c
+        for c in supabase_mock["select"].await_args_list
+        if c.kwargs["table"] == "recovery_sessions"
+        and c.kwargs["params"].get("status") == "eq.open"
+    ]
+
+
+def test_auto_lapse_cron_falls_back_when_candidates_rpc_missing(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = datetime(2026, 2, 18, 12, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+    schema_capabilities.reset()
+    state = {
+        "user_id": TEST_USER_ID,
+        "last_engaged_at": (now - timedelta(hours=30)).isoformat(),
+        "lapse_threshold_hours": 12,
+        "last_auto_lapse_at": None,
+        "locale": "ko",
+        "timezone": "Asia/Seoul",
+    }
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "user_recovery_state" and "or" in params:
+            return [dict(state)]
+        if table == "recovery_sessions" and params.get("status") == "eq.open":
+            return [{"id": "s1", "user_id": TEST_USER_ID, "status": "open"}]
+        return []
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        if fn_name == "auto_lapse_candidates":
+            raise SupabaseRestError(
+                status_code=404,
+                code="PGRST202",
+                message="Could not find the function public.auto_lapse_candidates",
+            )
+        return []
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["rpc"].side_effect = _rpc
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/auto-lapse", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["scanned_users"] == 1
+    assert response.json()["suppressed_by_reason"] == {"open_session_exists": 1}
+    assert schema_capabilities.is_known_missing(
+        schema_capabilities.AUTO_LAPSE_CANDIDATES
+    )
+    supabase_mock["insert_one"].assert_not_awaited()
+
+
+def _preflight_probes(supabase_mock) -> list[str]:
+    return [
+        c.kwargs["table"]
+        for c in supabase_mock["select"].await_args_list
+        if c.kwargs["params"].get("limit") == 1 and len(c.kwargs["params"]) == 2
+    ]
+
+
+def test_cron_preflight_is_cached_and_reported_by_health(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        recovery_route.settings, "recovery_cron_preflight_ttl_seconds", 300.0
+    )
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+
+    before = client.get("/api/recovery/cron/health", headers=headers)
+    assert before.status_code == 200
+    assert before.json()["status"] == "unknown"
+
+    assert (
+        client.post("/api/recovery/cron/auto-lapse", headers=headers).status_code == 200
+    )
+    assert client.post("/api/recovery/cron/nudge", headers=headers).status_code == 200
+
+    assert sorted(_preflight_probes(supabase_mock)) == sorted(
+        recovery_route._RECOVERY_REQUIRED_TABLES
+    )
+    health = client.get("/api/recovery/cron/health", headers=headers).json()
+    assert health["status"] == "ok"
+    assert health["fresh"] is True
+    assert health["ttl_seconds"] == 300.0
+    assert client.get("/api/recovery/cron/health").status_code == 401
+
+
+def test_cron_preflight_failure_is_not_cached(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        recovery_route.settings, "recovery_cron_preflight_ttl_seconds", 300.0
+    )
+    calls = {"n": 0}
+
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "recovery_nudges" and calls["n"] == 0:
+            calls["n"] += 1
+            raise SupabaseRestError(status_code=500, message="upstream down")
+        return []
+
+    supabase_mock["select"].side_effect = _select
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+
+    failed = client.post("/api/recovery/cron/auto-lapse", headers=headers)
+    assert failed.status_code == 503
+    health = client.get("/api/recovery/cron/health", headers=headers).json()
+    assert health["status"] == "failed"
+    assert health["fresh"] is False
+    assert health["detail"]["reason"] == "preflight_query_failed"
+
+    assert (
+        client.post("/api/recovery/cron/auto-lapse", headers=headers).status_code == 200
+    )
+    assert len(_preflight_probes(supabase_mock)) == 2 * len(
+        recovery_route._RECOVERY_REQUIRED_TABLES
+    )
+
+
+def test_nudge_cron_prefilters_quiet_hours_with_candidates_rpc(
+    client: TestClient,
+    supabase_mock,
+    recovery_cron_flags,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # 14:30 UTC: 23:30 in Seoul (quiet), 09:30 in New York.
+    now = datetime(2026, 2, 18, 14, 30, tzinfo=timezone.utc)
+    monkeypatch.setattr(recovery_route, "_utc_now", lambda: now)
+    schema_capabilities.mark(schema_capabilities.NUDGE_CANDIDATES, True)
+    candidate_params: list[dict] = []
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        if fn_name == "recovery_nudge_candidates":
+            candidate_params.append(dict(params or {}))
+            # The Seoul user is in quiet hours and filtered out by the database.
+            return [
+                {
+                    "id": "sess-ny",
+                    "user_id": TEST_USER_ID,
+                    "status": "open",
+                    "entry_surface": None,
+                    "lapse_start_ts": (now - timedelta(hours=6)).isoformat(),
+                    "detection_source": "auto",
+                    "state": {
+                        "user_id": TEST_USER_ID,
+                        "last_engaged_at": (now - timedelta(hours=20)).isoformat(),
+                        "last_nudge_at": None,
+                        "locale": "en",
+                        "timezone": "America/New_York",
+                        "quiet_hours_start": 22,
+                        "quiet_hours_end": 8,
+                    },
+                }
+            ]
+        return []
+
+    supabase_mock["rpc"].side_effect = _rpc
+
+    headers = {"X-Recovery-Cron-Token": "cron-secret"}
+    response = client.post("/api/recovery/cron/nudge", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["scheduled_count"] == 1
+    params = candidate_params[0]
+    assert params["p_zone_hours"]["Asia/Seoul"] == 23
+    assert params["p_zone_hours"]["America/New_York"] == 9
+    assert params["p_locale_hours"]["*"] == 14
+    assert params["p_limit"] == 100
+    # Sessions and states come from the RPC; no per-user state lookup.
+    assert not [
+        c
+        for c in supabase_mock["select"].await_args_list
+        if c.kwargs["table"] == "user_recovery_state"
+        and "user_id" in c.kwargs["params"]
+    ]
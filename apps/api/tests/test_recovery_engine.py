@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 
 from app.services.recovery_engine import (
+    LocalHourClock,
     compute_lapse_start,
     decide_auto_lapse,
     decide_nudge,
@@ -115,3 +116,46 @@ def test_quiet_hours_suppresses_nudge_with_timezone() -> None:
     assert quiet is True
     assert decision.should_send is False
     assert decision.reason == "quiet_hours"
+
+
+def test_local_hour_clock_matches_per_user_quiet_hours() -> None:
+    now = datetime(2026, 2, 18, 14, 30, tzinfo=timezone.utc)
+    clock = LocalHourClock(now)
+
+    # Unknown zones fall back to the locale default, like resolve_user_timezone.
+    assert clock.hour_for(timezone_name="Asia/Seoul", locale="en") == 23
+    assert clock.hour_for(timezone_name="Not/AZone", locale="ja") == 23
+    assert clock.hour_for(timezone_name="", locale="xx") == 14
+    assert clock.zone_hours()["America/New_York"] == 9
+    assert clock.locale_hours() == {
+        "ko": 23,
+        "ja": 23,
+        "zh": 22,
+        "es": 15,
+        "en": 9,
+        "*": 14,
+    }
+    for tz_name in ("Asia/Seoul", "Europe/Madrid", "UTC", "bogus"):
+        assert is_quiet_hours(
+            now_utc=now,
+            timezone_name=tz_name,
+            locale="ko",
+            quiet_start_hour=22,
+            quiet_end_hour=8,
+        ) == (
+            decide_nudge(
+                now_utc=now,
+                lapse_start_ts=now - timedelta(hours=2),
+                last_engaged_at=None,
+                has_open_session=True,
+                recovery_mode_opened=False,
+                last_nudge_at=None,
+                cooldown_hours=24,
+                timezone_name=tz_name,
+                locale="ko",
+                quiet_start_hour=22,
+                quiet_end_hour=8,
+                local_hour=clock.hour_for(timezone_name=tz_name, locale="ko"),
+            ).reason
+            == "quiet_hours"
+        )
@@ -5,6 +5,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 import app.routes.recovery as recovery_route
+from app.services import schema_capabilities
 from app.services.supabase_rest import SupabaseRestError
 
 
@@ -197,10 +198,19 @@ def test_recovery_complete_computes_rt_floor_and_prevents_duplicate_event(
     assert first.json()["rt_min"] == 125
     assert second.status_code == 200
     assert second.json()["rt_min"] == 125
-    # First call: session update + recovery_completed event + user_recovery_state update.
-    # Second call: idempotent read-only return.
-    assert supabase_mock["upsert_one"].await_count == 3
+    # First call: session update + recovery_completed event, then one atomic
+    # user_recovery_state merge RPC. Second call: idempotent read-only return.
+    assert supabase_mock["upsert_one"].await_count == 2
     assert supabase_mock["insert_one"].await_count == 0
+    merge_calls = [
+        c.kwargs
+        for c in supabase_mock["rpc"].await_args_list
+        if c.kwargs["fn_name"] == "upsert_user_recovery_state_batch"
+    ]
+    assert len(merge_calls) == 1
+    assert merge_calls[0]["params"]["p_rows"][0]["last_engaged_at"] == (
+        fixed_now.isoformat()
+    )
 
 
 def test_recovery_checkin_rejects_invalid_bucket(
@@ -253,6 +263,8 @@ def test_recovery_summary_returns_rt_p50(
         },
     ]
     supabase_mock["select"].return_value = rows
+    # Pre-RPC fallback: aggregate the rows in the API.
+    schema_capabilities.mark(schema_capabilities.RECOVERY_SUMMARY, False)
 
     response = authenticated_client.get(
         "/api/recovery/summary", params={"window_days": 14}
@@ -266,6 +278,56 @@ def test_recovery_summary_returns_rt_p50(
     assert body["completion_rate"] == 75.0
 
 
+def test_recovery_summary_aggregates_in_rpc_and_caches_until_complete(
+    authenticated_client: TestClient,
+    supabase_mock,
+    recovery_flag_on,
+) -> None:
+    supabase_mock["rpc"].return_value = [
+        {"started_count": 4, "completed_count": 3, "rt_p50_min": 20.5}
+    ]
+
+    first = authenticated_client.get("/api/recovery/summary", params={"window_days": 7})
+    second = authenticated_client.get(
+        "/api/recovery/summary", params={"window_days": 7}
+    )
+
+    assert first.status_code == 200
+    assert first.json()["rt_p50_min"] == 20
+    assert first.json()["completion_rate"] == 75.0
+    assert second.json()["started_count"] == 4
+
+    def _summary_calls() -> list[dict]:
+        return [
+            c.kwargs
+            for c in supabase_mock["rpc"].await_args_list
+            if c.kwargs["fn_name"] == "recovery_summary"
+        ]
+
+    summary_calls = _summary_calls()
+    assert len(summary_calls) == 1
+    assert (
+        summary_calls[0]["params"]["p_user_id"]
+        == "00000000-0000-4000-8000-000000000001"
+    )
+    supabase_mock["select"].assert_not_awaited()
+
+    # Completing a session drops the cached windows for the user.
+    supabase_mock["select"].return_value = [
+        {
+            "id": "s1",
+            "status": "open",
+            "lapse_start_ts": "2026-02-17T00:00:00+00:00",
+        }
+    ]
+    completed = authenticated_client.post(
+        "/api/recovery/complete", json={"session_id": "s1"}
+    )
+    assert completed.status_code == 200
+    authenticated_client.get("/api/recovery/summary", params={"window_days": 7})
+    assert len(_summary_calls()) == 2
+
+
 def test_recovery_endpoints_require_auth(client: TestClient, recovery_flag_on) -> None:
     response = client.get("/api/recovery/summary")
     assert response.status_code == 401
@@ -311,3 +373,51 @@ def test_recovery_nudge_ack_is_idempotent(
         if call.kwargs.get("table") == "recovery_nudges"
     ]
     assert len(recovery_nudge_upserts) == 1
+
+
+@pytest.mark.asyncio
+async def test_recovery_nudge_subscribe_returns_pushed_nudge(
+    supabase_mock,
+    fake_auth_context,
+    recovery_flag_on,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import asyncio
+
+    import httpx
+
+    from app.core.security import verify_token
+    from app.main import app
+    from app.services.nudge_bus import get_nudge_bus
+
+    monkeypatch.setattr(recovery_route.settings, "recovery_nudge_enabled", True)
+    app.dependency_overrides[verify_token] = lambda: fake_auth_context
+    payload = {
+        "nudge_id": "nudge-1",
+        "session_id": "sess-1",
+        "message": "hi",
+        "lapse_start_ts": "2026-02-18T00:00:00Z",
+        "created_at": "2026-02-18T06:00:00Z",
+        "correlation_id": "cid",
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        request = asyncio.create_task(
+            ac.get("/api/recovery/nudge/subscribe", params={"timeout_seconds": 5})
+        )
+        while supabase_mock["select"].await_count == 0:
+            await asyncio.sleep(0.01)
+        await get_nudge_bus().publish(fake_auth_context.user_id, payload)
+        response = await asyncio.wait_for(request, 2.0)
+
+        empty = await ac.get(
+            "/api/recovery/nudge/subscribe", params={"timeout_seconds": 0}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["has_nudge"] is True
+    assert response.json()["nudge"]["nudge_id"] == "nudge-1"
+    assert empty.json()["has_nudge"] is False
+    # One read per subscribe, none while waiting.
+    assert supabase_mock["select"].await_count == 2
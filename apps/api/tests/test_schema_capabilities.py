@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.routes.recovery as recovery_route
+from app.services import schema_capabilities
+from app.services.supabase_rest import SupabaseRestError
+from app.services.usage import insert_usage_event
+
+
+@pytest.mark.asyncio
+async def test_refresh_marks_missing_and_available_capabilities(
+    supabase_mock,
+) -> None:
+    async def _select(*, table: str, bearer_token: str, params: dict):
+        if table == "activity_logs":
+            raise SupabaseRestError(
+                status_code=400,
+                code="42703",
+                message="column activity_logs.meta does not exist",
+            )
+        if table == "recovery_nudges":
+            raise SupabaseRestError(status_code=503, message="upstream timeout")
+        return []
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        raise SupabaseRestError(
+            status_code=404,
+            code="PGRST202",
+            message=f"Could not find the function public.{fn_name}",
+        )
+
+    supabase_mock["select"].side_effect = _select
+    supabase_mock["rpc"].side_effect = _rpc
+
+    outcome = await schema_capabilities.refresh()
+
+    assert outcome[schema_capabilities.USER_RECOVERY_STATE_MERGE] is False
+    assert outcome[schema_capabilities.ACTIVITY_LOGS_META] is False
+    assert outcome[schema_capabilities.USAGE_EVENTS_REQUEST_ID] is True
+    # Transient failures leave the capability unknown (treated as available).
+    assert outcome[schema_capabilities.table_capability("recovery_nudges")] is None
+    assert not schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META)
+    assert schema_capabilities.has(
+        schema_capabilities.table_capability("recovery_nudges")
+    )
+
+
+def test_learned_state_expires_after_two_refresh_intervals(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(schema_capabilities.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(
+        schema_capabilities.settings, "schema_capability_refresh_seconds", 60
+    )
+
+    schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
+    now[0] += 119
+    assert schema_capabilities.is_known_missing(schema_capabilities.ACTIVITY_LOGS_META)
+    now[0] += 2
+    assert schema_capabilities.has(schema_capabilities.ACTIVITY_LOGS_META)
+
+
+def test_get_log_skips_meta_when_column_known_missing(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.ACTIVITY_LOGS_META, False)
+    supabase_mock["select"].return_value = [
+        {"id": "log-1", "date": "2026-02-15", "entries": [], "note": None}
+    ]
+
+    response = authenticated_client.get("/api/logs", params={"date": "2026-02-15"})
+
+    assert response.status_code == 200
+    assert response.json()["meta"] == {}
+    assert supabase_mock["select"].await_count == 1
+    params = supabase_mock["select"].await_args.kwargs["params"]
+    assert "meta" not in params["select"].split(",")
+
+
+def test_get_log_learns_missing_meta_from_runtime_error(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].side_effect = [
+        SupabaseRestError(
+            status_code=400, code="42703", message="column meta does not exist"
+        ),
+        [{"id": "log-1", "date": "2026-02-15", "entries": [], "note": None}],
+        [{"id": "log-1", "date": "2026-02-15", "entries": [], "note": None}],
+    ]
+
+    for _ in range(2):
+        response = authenticated_client.get("/api/logs", params={"date": "2026-02-15"})
+        assert response.status_code == 200
+
+    # First request pays the failed round trip; the second goes straight there.
+    assert supabase_mock["select"].await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_usage_event_skips_request_id_upsert_when_unsupported(
+    supabase_mock,
+) -> None:
+    schema_capabilities.mark(schema_capabilities.USAGE_EVENTS_REQUEST_ID, False)
+
+    await insert_usage_event(
+        user_id="u1",
+        event_date=date(2026, 2, 15),
+        event_type="analyze",
+        model="gpt-4o-mini",
+        tokens_prompt=None,
+        tokens_completion=None,
+        tokens_total=None,
+        cost_usd=None,
+        request_id="req-12345678",
+    )
+
+    assert supabase_mock["upsert_one"].await_count == 0
+    row = supabase_mock["insert_one"].await_args.kwargs["row"]
+    assert "request_id" not in row
+
+
+def test_cron_preflight_fails_fast_for_known_missing_tables(
+    client: TestClient, supabase_mock, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(recovery_route.settings, "recovery_v1_enabled", True)
+    monkeypatch.setattr(recovery_route.settings, "recovery_nudge_enabled", True)
+    monkeypatch.setattr(recovery_route.settings, "recovery_cron_token", "cron-secret")
+    schema_capabilities.mark(
+        schema_capabilities.table_capability("recovery_nudges"), False
+    )
+
+    response = client.post(
+        "/api/recovery/cron/nudge",
+        headers={"X-Recovery-Cron-Token": "cron-secret"},
+    )
+
+    assert response.status_code == 503
+    assert response.json()["detail"]["missing_tables"] == ["recovery_nudges"]
+    assert supabase_mock["select"].await_count == 0
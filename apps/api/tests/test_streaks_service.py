@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 from datetime import date as Date
+from datetime import timedelta
 
-from app.services.streaks import compute_streaks, extract_log_dates
+from app.services.streaks import (
+    StreakState,
+    advance_streak,
+    compute_streaks,
+    extract_log_dates,
+)
 
 
 def test_compute_streaks_returns_five_for_five_consecutive_days() -> None:
@@ -50,3 +56,36 @@ def test_extract_log_dates_ignores_invalid_rows() -> None:
     )
 
     assert dates == [Date(2026, 2, 10), Date(2026, 2, 12)]
+
+
+def test_advance_streak_matches_compute_streaks_for_forward_saves() -> None:
+    start = Date(2026, 2, 1)
+    offsets = [0, 1, 1, 2, 3, 6, 7, 8, 8, 9, 15, 16, 17, 18, 19]
+    saved: list[Date] = []
+    state = StreakState(current=0, longest=0, last_date=None)
+
+    for offset in offsets:
+        day = start + timedelta(days=offset)
+        saved.append(day)
+        advanced = advance_streak(state, day)
+        if advanced is None:
+            current, longest = compute_streaks(log_dates=saved, anchor_date=day)
+            advanced = StreakState(current=current, longest=longest, last_date=day)
+        state = advanced
+
+        assert (state.current, state.longest) == compute_streaks(
+            log_dates=saved, anchor_date=day
+        )
+
+
+def test_advance_streak_defers_back_dated_saves_and_missing_anchor() -> None:
+    state = StreakState(current=3, longest=4, last_date=Date(2026, 2, 15))
+
+    assert advance_streak(state, Date(2026, 2, 10)) is None
+    assert (
+        advance_streak(
+            StreakState(current=0, longest=0, last_date=None), Date(2026, 2, 15)
+        )
+        is None
+    )
+    assert advance_streak(state, Date(2026, 2, 15)) == state
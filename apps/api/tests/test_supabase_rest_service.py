@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+
 import httpx
 import pytest
 
-from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.core import metrics
+from app.core.deadline import request_deadline
+from app.services.supabase_rest import (
+    SupabaseRest,
+    SupabaseRestError,
+    add_request_hooks,
+    get_anon_client,
+    get_service_client,
+)
 
 
 def _response(
@@ -64,3 +74,341 @@ async def test_select_wraps_single_object_as_list(
         params={"select": "id"},
     )
     assert rows == [{"id": "one"}]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_select_shares_one_request(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon", coalesce_selects=True)
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            calls.append(kwargs["headers"]["authorization"])
+            await release.wait()
+            return _response(200, json_body=[{"id": "one", "plan": "pro"}])
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+
+    params = {"select": "id,plan", "user_id": "eq.u1", "limit": 1}
+    same_user = [
+        asyncio.create_task(
+            sb.select("subscriptions", bearer_token="t1", params=params)
+        )
+        for _ in range(3)
+    ]
+    other_user = asyncio.create_task(
+        sb.select("subscriptions", bearer_token="t2", params=params)
+    )
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*same_user, other_user)
+
+    assert sorted(calls) == ["Bearer t1", "Bearer t2"]
+    assert all(r == [{"id": "one", "plan": "pro"}] for r in results)
+    results[0][0]["plan"] = "free"
+    assert results[1][0]["plan"] == "pro"
+    assert (
+        metrics.counter_value(
+            "supabase_select_singleflight_coalesced_total", table="subscriptions"
+        )
+        == 2
+    )
+    assert (
+        metrics.counter_value(
+            "supabase_select_singleflight_leader_total", table="subscriptions"
+        )
+        == 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_coalesced_select_propagates_errors_and_forgets_key(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon", coalesce_selects=True)
+    responses = [
+        _response(500, json_body={"message": "internal error"}),
+        _response(200, json_body=[{"id": "one"}]),
+    ]
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            await asyncio.sleep(0)
+            return responses.pop(0)
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+
+    params = {"select": "id"}
+    first = await asyncio.gather(
+        sb.select("profiles", bearer_token="t", params=params),
+        sb.select("profiles", bearer_token="t", params=params),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, SupabaseRestError) for r in first)
+
+    assert await sb.select("profiles", bearer_token="t", params=params) == [
+        {"id": "one"}
+    ]
+
+
+def test_shared_clients_are_reused_until_settings_change(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = get_service_client()
+    assert get_service_client() is service
+    assert get_anon_client() is not service
+    assert get_anon_client(coalesce_selects=True) is not get_anon_client()
+
+    monkeypatch.setattr(
+        "app.services.supabase_rest.settings.supabase_service_role_key", "rotated"
+    )
+    rotated = get_service_client()
+    assert rotated is not service
+    assert rotated._headers("rotated")["apikey"] == "rotated"
+
+
+def test_own_key_headers_are_precomputed() -> None:
+    sb = SupabaseRest("https://example.supabase.co", "service-key")
+    first = sb._headers("service-key", prefer="return=representation")
+    assert sb._headers("service-key", prefer="return=representation") is first
+    assert first["authorization"] == "Bearer service-key"
+
+    user = sb._headers("user-jwt")
+    assert user["authorization"] == "Bearer user-jwt"
+    assert sb._headers("user-jwt") is not user
+
+
+@pytest.mark.asyncio
+async def test_request_hooks_and_table_timeouts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    seen_kwargs: list[dict] = []
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            seen_kwargs.append(kwargs)
+            return _response(200, json_body=[])
+
+        async def post(self, *args, **kwargs):
+            seen_kwargs.append(kwargs)
+            return _response(500, text="boom")
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+    monkeypatch.setattr(
+        "app.services.supabase_rest.settings.supabase_table_timeouts",
+        {"rpc/cohort_trend_summary": 7.5},
+    )
+    started: list[str] = []
+    ended: list[tuple[str, int | None]] = []
+    remove = add_request_hooks(
+        on_start=lambda info: started.append(info.endpoint),
+        on_end=lambda info, status, elapsed, err: ended.append((info.endpoint, status)),
+    )
+    try:
+        await sb.select("profiles", bearer_token="t", params={"select": "id"})
+        with pytest.raises(SupabaseRestError):
+            await sb.rpc("cohort_trend_summary", bearer_token="t", params={})
+    finally:
+        remove()
+
+    assert started == ["profiles", "rpc/cohort_trend_summary"]
+    assert ended == [("profiles", 200), ("rpc/cohort_trend_summary", 500)]
+    assert seen_kwargs[0]["timeout"].read == 30.0
+    assert seen_kwargs[1]["timeout"].read == 7.5
+    assert (
+        metrics.counter_value(
+            "supabase_request_errors_total",
+            endpoint="rpc/cohort_trend_summary",
+            status=500,
+        )
+        == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_select_retries_transient_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    outcomes = [httpx.ConnectError("reset"), _response(503, text="busy")]
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            if outcomes:
+                outcome = outcomes.pop(0)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+            return _response(200, json_body=[{"id": "ok"}])
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+    monkeypatch.setattr("app.services.supabase_rest.asyncio.sleep", _no_sleep)
+
+    rows = await sb.select("profiles", bearer_token="t", params={"select": "id"})
+
+    assert rows == [{"id": "ok"}]
+    assert metrics.counter_value("supabase_get_retries_total", endpoint="profiles") == 2
+
+
+async def _no_sleep(_: float) -> None:
+    return None
+
+
+@pytest.mark.asyncio
+async def test_writes_are_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    calls = 0
+
+    class _Client:
+        async def post(self, *args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return _response(503, text="busy")
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+
+    with pytest.raises(SupabaseRestError):
+        await sb.insert_one("activity_logs", bearer_token="t", row={"id": 1})
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_caps_timeout_and_fails_fast_when_spent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    seen_kwargs: list[dict] = []
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            seen_kwargs.append(kwargs)
+            return _response(200, json_body=[])
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+
+    with request_deadline(2.0):
+        await sb.select("profiles", bearer_token="t", params={})
+    assert 0 < seen_kwargs[0]["timeout"].read <= 2.0
+
+    monkeypatch.setattr("app.core.deadline.time.monotonic", lambda: 1000.0)
+    with request_deadline(0.001):
+        monkeypatch.setattr("app.core.deadline.time.monotonic", lambda: 1001.0)
+        with pytest.raises(SupabaseRestError) as exc:
+            await sb.select("profiles", bearer_token="t", params={})
+    assert exc.value.code == "DEADLINE_EXCEEDED"
+    assert len(seen_kwargs) == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_failures_and_recovers(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    status = {"code": 500}
+    calls = 0
+
+    class _Client:
+        async def post(self, *args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return _response(status["code"], json_body=[{"id": 1}])
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+    monkeypatch.setattr(
+        "app.services.supabase_rest.settings.supabase_circuit_failure_threshold", 2
+    )
+    now = {"t": 100.0}
+    monkeypatch.setattr("app.core.circuit_breaker.time.monotonic", lambda: now["t"])
+
+    for _ in range(2):
+        with pytest.raises(SupabaseRestError):
+            await sb.rpc("cohort_trend_summary", bearer_token="t")
+    with pytest.raises(SupabaseRestError) as exc:
+        await sb.rpc("cohort_trend_summary", bearer_token="t")
+
+    assert exc.value.status_code == 503
+    assert exc.value.code == "CIRCUIT_OPEN"
+    assert calls == 2
+    gauge = ("supabase_circuit_state", "rpc/cohort_trend_summary")
+    assert metrics.gauge_value(gauge[0], endpoint=gauge[1]) == 2
+
+    # After the cooldown one trial request is let through and closes the circuit.
+    now["t"] += 60
+    status["code"] = 200
+    assert await sb.rpc("cohort_trend_summary", bearer_token="t") == [{"id": 1}]
+    assert metrics.gauge_value(gauge[0], endpoint=gauge[1]) == 0
+
+
+@pytest.mark.asyncio
+async def test_hedged_select_returns_fastest_response(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from app.services import supabase_rest
+
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    calls = 0
+    cancelled: list[bool] = []
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return _response(200, json_body=[{"id": "slow"}])
+            return _response(200, json_body=[{"id": "fast"}])
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+    monkeypatch.setattr(
+        "app.services.supabase_rest.settings.supabase_hedge_enabled", True
+    )
+    for _ in range(supabase_rest._HEDGE_MIN_SAMPLES):
+        supabase_rest._record_latency("profiles", 0.001)
+
+    rows = await sb.select("profiles", bearer_token="t", params={})
+    await asyncio.sleep(0)
+
+    assert rows == [{"id": "fast"}]
+    assert calls == 2
+    assert cancelled == [True]
+    assert metrics.counter_value("supabase_hedge_wins_total", endpoint="profiles") == 1
+
+
+@pytest.mark.asyncio
+async def test_insert_many_chunks_rows_and_skips_duplicates(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sb = SupabaseRest("https://example.supabase.co", "anon")
+    sent: list[dict] = []
+
+    class _Client:
+        async def post(self, *args, **kwargs):
+            sent.append(kwargs)
+            return _response(201, json_body=[{"id": len(sent)}])
+
+    monkeypatch.setattr("app.services.supabase_rest.get_http", lambda: _Client())
+    monkeypatch.setattr("app.services.supabase_rest._BULK_CHUNK_ROWS", 2)
+
+    created = await sb.insert_many(
+        "recovery_nudges",
+        bearer_token="t",
+        rows=[{"id": i} for i in range(5)],
+        on_conflict="user_id,session_id,nudge_channel",
+    )
+
+    assert created == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert len(sent) == 3
+    assert sent[0]["headers"]["prefer"] == (
+        "resolution=ignore-duplicates,return=representation"
+    )
+    assert sent[0]["params"] == {"on_conflict": "user_id,session_id,nudge_channel"}
+    assert await sb.insert_many("recovery_nudges", bearer_token="t", rows=[]) == []
+    assert len(sent) == 3
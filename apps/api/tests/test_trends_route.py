@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from datetime import date, timedelta
+from unittest.mock import ANY
 
 import pytest
 from fastapi.testclient import TestClient
 
 import app.routes.trends as trends_route
+from app.core import metrics
+from app.services import schema_capabilities
+from app.services.profile import clear_profile_cache
 
 
 def _iso(days_ago: int) -> str:
@@ -23,6 +27,12 @@ def _force_control_threshold_policy(monkeypatch: pytest.MonkeyPatch) -> None:
     )
 
 
+@pytest.fixture(autouse=True)
+def _raw_log_rates() -> None:
+    # Most tests feed raw activity_logs rows; the rollup RPC path opts back in.
+    schema_capabilities.mark(schema_capabilities.ACTIVITY_DAILY_METRICS, False)
+
+
 def _opted_in_profile(**overrides) -> dict:
     base = {
         "age_group": "25_34",
@@ -269,6 +279,84 @@ def test_trends_cohort_uses_profile_filters_in_rpc_call(
     assert rpc_params["p_compare_by"] == ["age_group", "job_family"]
 
 
+def test_trends_cohort_summary_is_shared_by_users_with_the_same_filters(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    supabase_mock["select"].side_effect = [
+        [_opted_in_profile(gender="female")],
+        [],
+        [_opted_in_profile(gender="male")],
+        [],
+    ]
+    supabase_mock["rpc"].return_value = [_cohort_rpc_row(60)]
+
+    first = authenticated_client.get("/api/trends/cohort")
+    # gender is not compared, so the second profile maps to the same cohort.
+    clear_profile_cache()
+    second = authenticated_client.get("/api/trends/cohort")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json()["cohort_size"] == 60
+    assert supabase_mock["rpc"].await_count == 1
+    assert metrics.counter_value("cohort_cache_total", result="fresh") == 1
+
+
+def test_trends_cohort_my_rates_come_from_daily_metrics_rpc(
+    authenticated_client: TestClient, supabase_mock
+) -> None:
+    schema_capabilities.mark(schema_capabilities.ACTIVITY_DAILY_METRICS, True)
+    supabase_mock["select"].side_effect = [[_opted_in_profile()]]
+    day = {
+        "entry_count": 4,
+        "focus_window_num": 1,
+        "focus_window_den": 3,
+        "rebound_num": 1,
+        "rebound_den": 1,
+        "recovery_day": True,
+    }
+
+    async def _rpc(*, fn_name: str, bearer_token: str, params: dict | None):
+        if fn_name == "activity_daily_metrics":
+            assert params == {"p_user_id": ANY, "p_since": _iso(13)}
+            return [
+                {**day, "date": _iso(8), "focus_window_num": 0},
+                {**day, "date": _iso(2)},
+                {**day, "date": _iso(1), "entry_count": 0, "recovery_day": False},
+            ]
+        return [_cohort_rpc_row(60)]
+
+    supabase_mock["rpc"].side_effect = _rpc
+
+    response = authenticated_client.get("/api/trends/cohort")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["my_focus_rate"] == 33.33
+    assert body["my_rebound_rate"] == 100.0
+    assert body["my_recovery_rate"] == 100.0
+    assert body["my_focus_delta_7d"] == 33.33
+    # Only the profile was selected; no raw entries were read.
+    assert supabase_mock["select"].await_count == 1
+
+
+def test_daily_metrics_rates_match_raw_entry_rates() -> None:
+    rows = [_my_log_row(_iso(1)), _my_log_row(_iso(2))]
+    # Counters activity_log_day_metrics() stores for _my_log_row's entries.
+    day = {
+        "entry_count": 4,
+        "focus_window_num": 2,
+        "focus_window_den": 3,
+        "rebound_num": 1,
+        "rebound_den": 2,
+        "recovery_day": True,
+    }
+
+    assert trends_route._rates_from_daily_metrics(
+        [{**day, "date": _iso(1)}, {**day, "date": _iso(2)}]
+    ) == trends_route._compute_my_rates(rows)
+
+
 def test_trends_cohort_candidate_variant_policy_is_applied(
     authenticated_client: TestClient, supabase_mock, monkeypatch: pytest.MonkeyPatch
 ) -> None:
@@ -6,10 +6,13 @@ import pytest
 from unittest.mock import AsyncMock
 
 from app.services.supabase_rest import SupabaseRest, SupabaseRestError
+from app.services import schema_capabilities
 from app.services.usage import (
+    build_usage_event_row,
     count_daily_analyze_calls,
     estimate_cost_usd,
     insert_usage_event,
+    insert_usage_events,
 )
 
 
@@ -72,3 +75,45 @@ async def test_insert_usage_event_fallbacks_when_service_conflict(
     # service upsert fails, then user-scoped upsert also attempts, then fallback insert.
     assert upsert_mock.await_count >= 2
     assert insert_mock.await_count >= 1
+
+
+@pytest.mark.asyncio
+async def test_insert_usage_events_dedupes_and_falls_back_without_request_id(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    upsert_mock = AsyncMock(
+        side_effect=SupabaseRestError(
+            status_code=400,
+            code="42P10",
+            message="there is no unique or exclusion constraint matching",
+        )
+    )
+    insert_mock = AsyncMock(return_value=[])
+    monkeypatch.setattr(SupabaseRest, "upsert_many", upsert_mock)
+    monkeypatch.setattr(SupabaseRest, "insert_many", insert_mock)
+
+    def _row(request_id: str | None, tokens: int) -> dict:
+        return build_usage_event_row(
+            user_id="user-1",
+            event_date=date(2026, 2, 15),
+            event_type="nudge_sent_count",
+            model="recovery-metrics",
+            tokens_prompt=None,
+            tokens_completion=None,
+            tokens_total=tokens,
+            cost_usd=None,
+            request_id=request_id,
+        )
+
+    await insert_usage_events(
+        [_row("req-000001", 1), _row("req-000001", 2), _row(None, 3)]
+    )
+
+    upserted = upsert_mock.await_args.kwargs["rows"]
+    assert [r["tokens_total"] for r in upserted] == [2, 3]
+    inserted = insert_mock.await_args.kwargs["rows"]
+    assert [r["tokens_total"] for r in inserted] == [1, 2, 3]
+    assert all("request_id" not in r for r in inserted)
+    assert schema_capabilities.is_known_missing(
+        schema_capabilities.USAGE_EVENTS_REQUEST_ID
+    )
@@ -15,6 +15,14 @@ select
   to_regclass('public.user_recovery_state_auto_lapse_candidate_idx') as user_recovery_state_auto_lapse_candidate_idx,
   to_regclass('public.recovery_nudges_user_status_created_idx') as recovery_nudges_user_status_created_idx;
 
+\echo '== Optional RPCs (null = API uses the slower fallback) =='
+select
+  to_regprocedure('public.upsert_user_recovery_state_batch(jsonb)') as upsert_user_recovery_state_batch,
+  to_regprocedure('public.auto_lapse_candidates(timestamptz,timestamptz,timestamptz,uuid,integer)') as auto_lapse_candidates,
+  to_regprocedure('public.try_acquire_cron_lease(text,text,integer)') as try_acquire_cron_lease,
+  to_regprocedure('public.recovery_nudge_candidates(jsonb,jsonb,integer,integer,integer)') as recovery_nudge_candidates,
+  to_regprocedure('public.recovery_summary(uuid,timestamptz)') as recovery_summary;
+
 \echo '== detection_source constraint =='
 select
   conname,
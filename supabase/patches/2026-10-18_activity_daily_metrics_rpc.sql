@@ -0,0 +1,46 @@
+-- Per-day trend counters for one user's logs, for the "my rates" part of
+-- /api/trends/cohort. Reads activity_log_daily_metrics
+-- (2026-10-18_activity_log_daily_metrics.sql, apply that first) and computes
+-- days the backfill has not reached yet on the fly, so results are complete
+-- while the backfill runs. security invoker: RLS limits end users to their
+-- own logs whatever p_user_id they pass.
+
+create or replace function public.activity_daily_metrics(
+  p_user_id uuid,
+  p_since date
+)
+returns table (
+  date date,
+  entry_count int,
+  focus_window_num int,
+  focus_window_den int,
+  rebound_num int,
+  rebound_den int,
+  recovery_day boolean
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+select
+  l.date,
+  coalesce(m.entry_count, c.entry_count),
+  coalesce(m.focus_window_num, c.focus_window_num),
+  coalesce(m.focus_window_den, c.focus_window_den),
+  coalesce(m.rebound_num, c.rebound_num),
+  coalesce(m.rebound_den, c.rebound_den),
+  coalesce(m.recovery_day, c.recovery_day)
+from public.activity_logs l
+left join public.activity_log_daily_metrics m
+  on m.user_id = l.user_id and m.date = l.date
+-- Only evaluated for days without a rollup row.
+left join lateral (
+  select *
+  from public.activity_log_day_metrics(l.entries)
+  where m.user_id is null
+) c on true
+where l.user_id = p_user_id
+  and l.date >= p_since
+order by l.date;
+$$;
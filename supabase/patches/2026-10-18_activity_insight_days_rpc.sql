@@ -0,0 +1,88 @@
+-- Per-day insight values for one user's logs, for /api/insights/rollup.
+-- Returns one small row per logged day (blocks, minutes matching the goal
+-- keyword) instead of shipping every day's entries to the API, so a
+-- 366-day range is one call of a few KB. Bucketing into weeks, months and
+-- quarters happens in the API.
+--
+-- Semantics match _coerce_entries/_deep_minutes in
+-- apps/api/app/routes/insights.py: blocks counts object entries; deep minutes
+-- sum valid HH:MM start < end spans whose activity or tags contain the
+-- keyword (case-insensitive substring). security invoker: RLS limits end
+-- users to their own logs whatever p_user_id they pass.
+
+create or replace function public.activity_insight_days(
+  p_user_id uuid,
+  p_from date,
+  p_to date,
+  p_goal_keyword text default null
+)
+returns table (
+  date date,
+  blocks int,
+  deep_minutes int
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+with kw as (
+  select nullif(lower(btrim(coalesce(p_goal_keyword, ''))), '') as keyword
+),
+items as (
+  select
+    l.date,
+    e.value as entry
+  from public.activity_logs l
+  cross join lateral jsonb_array_elements(
+    case when jsonb_typeof(l.entries) = 'array' then l.entries else '[]'::jsonb end
+  ) e(value)
+  where l.user_id = p_user_id
+    and l.date between p_from and p_to
+    and jsonb_typeof(e.value) = 'object'
+),
+scored as (
+  select
+    i.date,
+    case
+      when kw.keyword is not null
+        and i.entry->>'start' ~ '^([01][0-9]|2[0-3]):[0-5][0-9]$'
+        and i.entry->>'end' ~ '^([01][0-9]|2[0-3]):[0-5][0-9]$'
+        and strpos(
+          lower(
+            coalesce(i.entry->>'activity', '')
+            || case
+              when jsonb_typeof(i.entry->'tags') = 'array' then
+                ' ' || coalesce(
+                  (select string_agg(t.value, ' ') from jsonb_array_elements_text(i.entry->'tags') t),
+                  ''
+                )
+              else ''
+            end
+          ),
+          kw.keyword
+        ) > 0
+      then greatest(
+        (split_part(i.entry->>'end', ':', 1)::int * 60 + split_part(i.entry->>'end', ':', 2)::int)
+        - (split_part(i.entry->>'start', ':', 1)::int * 60 + split_part(i.entry->>'start', ':', 2)::int),
+        0
+      )
+      else 0
+    end as deep_minutes
+  from items i
+  cross join kw
+)
+select
+  l.date,
+  coalesce(s.blocks, 0),
+  coalesce(s.deep_minutes, 0)
+from public.activity_logs l
+left join (
+  select sc.date, count(*)::int as blocks, sum(sc.deep_minutes)::int as deep_minutes
+  from scored sc
+  group by sc.date
+) s on s.date = l.date
+where l.user_id = p_user_id
+  and l.date between p_from and p_to
+order by l.date;
+$$;
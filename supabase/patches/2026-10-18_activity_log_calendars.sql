@@ -0,0 +1,174 @@
+-- Per-user bitmap of logged dates.
+-- Bit n of activity_log_calendars.bits marks first_date + n days, in set_bit
+-- order (least significant bit of byte n / 8 first); a year of history is 46
+-- bytes. Triggers keep it in step with activity_logs on every write path, so
+-- streaks and "days logged" counts in the API are bit operations on one row
+-- instead of a scan of the user's log dates
+-- (apps/api/app/services/log_calendar.py).
+--
+-- Rollout: the patch backfills existing users at the end. The API falls back
+-- to reading activity_logs while the table does not exist.
+
+create table if not exists public.activity_log_calendars (
+  user_id uuid primary key references public.profiles(id) on delete cascade,
+  first_date date not null,
+  bits bytea not null,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.activity_log_calendars enable row level security;
+
+drop policy if exists activity_log_calendars_select_own on public.activity_log_calendars;
+create policy activity_log_calendars_select_own
+on public.activity_log_calendars
+for select
+using (user_id = auth.uid());
+
+-- Rows are written only by the triggers and the rebuild.
+revoke insert, update, delete on public.activity_log_calendars from anon, authenticated;
+
+-- Recomputes one user's calendar from activity_logs; drops it when the user
+-- has no logs left.
+create or replace function public.rebuild_activity_log_calendar(p_user_id uuid)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_first date;
+  v_last date;
+  v_bits bytea;
+  r record;
+begin
+  select min(l.date), max(l.date)
+  into v_first, v_last
+  from public.activity_logs l
+  where l.user_id = p_user_id;
+
+  if v_first is null then
+    delete from public.activity_log_calendars where user_id = p_user_id;
+    return;
+  end if;
+
+  v_bits := decode(repeat('00', (v_last - v_first) / 8 + 1), 'hex');
+  for r in
+    select l.date from public.activity_logs l where l.user_id = p_user_id
+  loop
+    v_bits := set_bit(v_bits, r.date - v_first, 1);
+  end loop;
+
+  insert into public.activity_log_calendars as t (user_id, first_date, bits, updated_at)
+  values (p_user_id, v_first, v_bits, now())
+  on conflict (user_id) do update set
+    first_date = excluded.first_date,
+    bits = excluded.bits,
+    updated_at = excluded.updated_at;
+end;
+$$;
+
+-- Sets or clears one day. Days before first_date are rare (backdated logs)
+-- and go through a rebuild instead of shifting the whole bitmap.
+create or replace function public.activity_log_calendar_mark(
+  p_user_id uuid,
+  p_date date,
+  p_logged boolean
+)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_first date;
+  v_bits bytea;
+  v_idx int;
+  v_len int;
+begin
+  if p_user_id is null or p_date is null then
+    return;
+  end if;
+
+  select c.first_date, c.bits
+  into v_first, v_bits
+  from public.activity_log_calendars c
+  where c.user_id = p_user_id
+  for update;
+
+  if not found then
+    if not p_logged then
+      return;
+    end if;
+    -- A concurrent first save may have created the row; lock whichever won.
+    insert into public.activity_log_calendars (user_id, first_date, bits)
+    values (p_user_id, p_date, '\x00'::bytea)
+    on conflict (user_id) do nothing;
+
+    select c.first_date, c.bits
+    into v_first, v_bits
+    from public.activity_log_calendars c
+    where c.user_id = p_user_id
+    for update;
+  end if;
+
+  v_idx := p_date - v_first;
+  if v_idx < 0 then
+    if p_logged then
+      perform public.rebuild_activity_log_calendar(p_user_id);
+    end if;
+    return;
+  end if;
+
+  v_len := length(v_bits);
+  if v_idx / 8 >= v_len then
+    if not p_logged then
+      return;
+    end if;
+    v_bits := v_bits || decode(repeat('00', v_idx / 8 + 1 - v_len), 'hex');
+  end if;
+
+  update public.activity_log_calendars
+  set bits = set_bit(v_bits, v_idx, case when p_logged then 1 else 0 end),
+      updated_at = now()
+  where user_id = p_user_id;
+end;
+$$;
+
+revoke all on function public.activity_log_calendar_mark(uuid, date, boolean) from public, anon, authenticated;
+revoke all on function public.rebuild_activity_log_calendar(uuid) from public, anon, authenticated;
+grant execute on function public.rebuild_activity_log_calendar(uuid) to service_role;
+
+create or replace function public.sync_activity_log_calendar()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op in ('DELETE', 'UPDATE') then
+    perform public.activity_log_calendar_mark(old.user_id, old.date, false);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform public.activity_log_calendar_mark(new.user_id, new.date, true);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists activity_logs_sync_calendar on public.activity_logs;
+create trigger activity_logs_sync_calendar
+after insert or delete on public.activity_logs
+for each row execute procedure public.sync_activity_log_calendar();
+
+-- The API's PATCH sends user_id and date unchanged on every save; only real
+-- moves touch the calendar.
+drop trigger if exists activity_logs_sync_calendar_on_move on public.activity_logs;
+create trigger activity_logs_sync_calendar_on_move
+after update of user_id, date on public.activity_logs
+for each row
+when (old.user_id is distinct from new.user_id or old.date is distinct from new.date)
+execute procedure public.sync_activity_log_calendar();
+
+-- One-time backfill of users who logged before this patch.
+select public.rebuild_activity_log_calendar(u.user_id)
+from (select distinct l.user_id from public.activity_logs l) u;
@@ -0,0 +1,294 @@
+-- Per-user per-day rollup of the cohort trend counters.
+-- cohort_trend_summary used to explode every cohort member's activity_logs
+-- entries on each call. A trigger now keeps one small row per (user, date) in
+-- activity_log_daily_metrics, and cohort_trend_summary sums those rows, so
+-- its cost follows users x days instead of entries.
+--
+-- Counter definitions match _compute_my_rates in apps/api/app/routes/trends.py:
+-- only entries with valid HH:MM start < end count, rebound pairs are
+-- consecutive valid entries ordered by start time.
+--
+-- Rollout: apply, then run the backfill until it returns 0, e.g.
+--   select * from public.backfill_activity_log_daily_metrics(5000);
+-- (or enable ACTIVITY_METRICS_BACKFILL_ENABLED on the API scheduler).
+-- Until the backfill finishes, cohort metrics only cover logs saved after
+-- the patch.
+
+create table if not exists public.activity_log_daily_metrics (
+  user_id uuid not null references public.profiles(id) on delete cascade,
+  date date not null,
+  entry_count int not null default 0,
+  focus_window_num int not null default 0,
+  focus_window_den int not null default 0,
+  rebound_num int not null default 0,
+  rebound_den int not null default 0,
+  recovery_day boolean not null default false,
+  updated_at timestamptz not null default now(),
+  primary key (user_id, date)
+);
+
+create index if not exists activity_log_daily_metrics_date_idx
+on public.activity_log_daily_metrics (date);
+
+alter table public.activity_log_daily_metrics enable row level security;
+
+drop policy if exists activity_log_daily_metrics_select_own on public.activity_log_daily_metrics;
+create policy activity_log_daily_metrics_select_own
+on public.activity_log_daily_metrics
+for select
+using (user_id = auth.uid());
+
+-- Rows are written only by the trigger and the backfill.
+revoke insert, update, delete on public.activity_log_daily_metrics from anon, authenticated;
+
+-- Counters for one day's entries array. Never raises on malformed entries.
+create or replace function public.activity_log_day_metrics(p_entries jsonb)
+returns table (
+  entry_count int,
+  focus_window_num int,
+  focus_window_den int,
+  rebound_num int,
+  rebound_den int,
+  recovery_day boolean
+)
+language sql
+immutable
+set search_path = public
+as $$
+with items as (
+  select e.value as entry, e.ord
+  from jsonb_array_elements(
+    case when jsonb_typeof(p_entries) = 'array' then p_entries else '[]'::jsonb end
+  ) with ordinality e(value, ord)
+),
+parsed as (
+  select
+    i.ord,
+    case
+      when btrim(i.entry->>'start') ~ '^([01][0-9]|2[0-3]):[0-5][0-9]$'
+      then split_part(btrim(i.entry->>'start'), ':', 1)::int * 60
+        + split_part(btrim(i.entry->>'start'), ':', 2)::int
+    end as start_m,
+    case
+      when btrim(i.entry->>'end') ~ '^([01][0-9]|2[0-3]):[0-5][0-9]$'
+      then split_part(btrim(i.entry->>'end'), ':', 1)::int * 60
+        + split_part(btrim(i.entry->>'end'), ':', 2)::int
+    end as end_m,
+    case when btrim(i.entry->>'focus') ~ '^0*[1-5]$' then btrim(i.entry->>'focus')::int end as focus,
+    case when btrim(i.entry->>'energy') ~ '^0*[1-5]$' then btrim(i.entry->>'energy')::int end as energy,
+    lower(coalesce(i.entry->>'activity', '')) as activity
+  from items i
+),
+valid as (
+  select
+    p.*,
+    p.end_m - p.start_m as duration_min,
+    lead(p.ord) over w as next_ord,
+    lead(p.focus) over w as next_focus,
+    lead(p.start_m) over w as next_start_m
+  from parsed p
+  where p.start_m is not null
+    and p.end_m is not null
+    and p.end_m > p.start_m
+  window w as (order by p.start_m, p.ord)
+)
+select
+  count(*)::int as entry_count,
+  count(*) filter (where v.duration_min >= 45 and v.focus >= 4)::int as focus_window_num,
+  count(*) filter (where v.duration_min >= 30 and v.focus is not null)::int as focus_window_den,
+  count(*) filter (
+    where v.focus <= 2
+      and v.next_ord is not null
+      and v.next_focus >= 3
+      and v.next_start_m - v.end_m between 0 and 60
+  )::int as rebound_num,
+  count(*) filter (where v.focus <= 2 and v.next_ord is not null)::int as rebound_den,
+  coalesce(
+    bool_or(
+      v.activity like '%break%'
+      or v.activity like '%rest%'
+      or v.activity like '%walk%'
+      or v.activity like '%stretch%'
+      or v.activity like '%휴식%'
+      or v.activity like '%산책%'
+      or v.activity like '%스트레칭%'
+      or v.activity like '%休憩%'
+      or v.activity like '%拉伸%'
+      or v.activity like '%descanso%'
+      or (v.duration_min between 5 and 20 and (v.focus <= 2 or v.energy <= 2))
+    ),
+    false
+  ) as recovery_day
+from valid v;
+$$;
+
+create or replace function public.sync_activity_log_daily_metrics()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'DELETE' then
+    delete from public.activity_log_daily_metrics
+    where user_id = old.user_id and date = old.date;
+    return old;
+  end if;
+
+  if tg_op = 'UPDATE' and (old.user_id, old.date) is distinct from (new.user_id, new.date) then
+    delete from public.activity_log_daily_metrics
+    where user_id = old.user_id and date = old.date;
+  end if;
+
+  insert into public.activity_log_daily_metrics as t (
+    user_id, date, entry_count, focus_window_num, focus_window_den,
+    rebound_num, rebound_den, recovery_day, updated_at
+  )
+  select
+    new.user_id, new.date, m.entry_count, m.focus_window_num, m.focus_window_den,
+    m.rebound_num, m.rebound_den, m.recovery_day, now()
+  from public.activity_log_day_metrics(new.entries) m
+  on conflict (user_id, date) do update set
+    entry_count = excluded.entry_count,
+    focus_window_num = excluded.focus_window_num,
+    focus_window_den = excluded.focus_window_den,
+    rebound_num = excluded.rebound_num,
+    rebound_den = excluded.rebound_den,
+    recovery_day = excluded.recovery_day,
+    updated_at = excluded.updated_at;
+  return new;
+end;
+$$;
+
+drop trigger if exists activity_logs_sync_daily_metrics on public.activity_logs;
+create trigger activity_logs_sync_daily_metrics
+after insert or delete or update of user_id, date, entries on public.activity_logs
+for each row execute procedure public.sync_activity_log_daily_metrics();
+
+-- Rolls up to p_limit logs that have no metrics row yet, newest first, and
+-- returns how many were written. Call until it returns 0.
+create or replace function public.backfill_activity_log_daily_metrics(p_limit int default 1000)
+returns table (backfilled_count int)
+language plpgsql
+security invoker
+set search_path = public
+as $$
+begin
+  return query
+  with todo as (
+    select l.user_id, l.date, l.entries
+    from public.activity_logs l
+    where not exists (
+      select 1
+      from public.activity_log_daily_metrics m
+      where m.user_id = l.user_id and m.date = l.date
+    )
+    order by l.date desc
+    limit greatest(1, least(coalesce(p_limit, 1000), 10000))
+  ),
+  written as (
+    insert into public.activity_log_daily_metrics as t (
+      user_id, date, entry_count, focus_window_num, focus_window_den,
+      rebound_num, rebound_den, recovery_day, updated_at
+    )
+    select
+      td.user_id, td.date, m.entry_count, m.focus_window_num, m.focus_window_den,
+      m.rebound_num, m.rebound_den, m.recovery_day, now()
+    from todo td
+    cross join lateral public.activity_log_day_metrics(td.entries) m
+    -- A concurrent log save already wrote the row through the trigger.
+    on conflict (user_id, date) do nothing
+    returning t.user_id
+  )
+  select count(*)::int from written;
+end;
+$$;
+
+revoke all on function public.backfill_activity_log_daily_metrics(int) from public, anon, authenticated;
+grant execute on function public.backfill_activity_log_daily_metrics(int) to service_role;
+
+-- Same signature and result shape as before; sums the rollup instead of
+-- parsing entries.
+create or replace function public.cohort_trend_summary(
+  p_age_group text,
+  p_gender text,
+  p_job_family text,
+  p_work_mode text,
+  p_chronotype text,
+  p_compare_by text[] default array['age_group', 'job_family', 'work_mode'],
+  p_window_days int default 14
+)
+returns table (
+  cohort_size int,
+  active_users int,
+  focus_window_rate numeric(6,2),
+  rebound_rate numeric(6,2),
+  recovery_buffer_day_rate numeric(6,2),
+  focus_window_numerator int,
+  focus_window_denominator int,
+  rebound_numerator int,
+  rebound_denominator int,
+  recovery_day_numerator int,
+  recovery_day_denominator int
+)
+language sql
+security definer
+set search_path = public
+as $$
+with cohort as (
+  select p.id
+  from public.profiles p
+  where p.trend_opt_in = true
+    and (
+      not ('age_group' = any(coalesce(p_compare_by, array[]::text[])))
+      or p.age_group = coalesce(p_age_group, p.age_group)
+    )
+    and (
+      not ('gender' = any(coalesce(p_compare_by, array[]::text[])))
+      or p.gender = coalesce(p_gender, p.gender)
+    )
+    and (
+      not ('job_family' = any(coalesce(p_compare_by, array[]::text[])))
+      or p.job_family = coalesce(p_job_family, p.job_family)
+    )
+    and (
+      not ('work_mode' = any(coalesce(p_compare_by, array[]::text[])))
+      or p.work_mode = coalesce(p_work_mode, p.work_mode)
+    )
+    and (
+      not ('chronotype' = any(coalesce(p_compare_by, array[]::text[])))
+      or p.chronotype = coalesce(p_chronotype, p.chronotype)
+    )
+),
+days as (
+  select m.*
+  from public.activity_log_daily_metrics m
+  join cohort c on c.id = m.user_id
+  where m.date >= current_date - greatest(coalesce(p_window_days, 14) - 1, 0)
+    and m.entry_count > 0
+),
+totals as (
+  select
+    count(distinct d.user_id)::int as active_users,
+    coalesce(sum(d.focus_window_num), 0)::int as focus_num,
+    coalesce(sum(d.focus_window_den), 0)::int as focus_den,
+    coalesce(sum(d.rebound_num), 0)::int as rebound_num,
+    coalesce(sum(d.rebound_den), 0)::int as rebound_den,
+    (count(*) filter (where d.recovery_day))::int as recovery_num,
+    count(*)::int as recovery_den
+  from days d
+)
+select
+  (select count(*)::int from cohort) as cohort_size,
+  t.active_users,
+  case when t.focus_den = 0 then null else round((t.focus_num::numeric * 100.0) / t.focus_den, 2) end,
+  case when t.rebound_den = 0 then null else round((t.rebound_num::numeric * 100.0) / t.rebound_den, 2) end,
+  case when t.recovery_den = 0 then null else round((t.recovery_num::numeric * 100.0) / t.recovery_den, 2) end,
+  t.focus_num,
+  t.focus_den,
+  t.rebound_num,
+  t.rebound_den,
+  t.recovery_num,
+  t.recovery_den
+from totals t;
+$$;
@@ -0,0 +1,64 @@
+-- When a log's analysis input (entries, note, meta) last changed.
+-- updated_at moves on every write, including re-saves of identical content
+-- and entry-level PATCHes that only persist entry ids, and /api/analyze used
+-- it to decide whether a cached report is stale. analysis_updated_at only
+-- moves when the content the report is built from differs; entry ids are
+-- ignored. The API falls back to updated_at until this patch is applied.
+
+alter table public.activity_logs
+  add column if not exists analysis_updated_at timestamptz;
+
+update public.activity_logs
+set analysis_updated_at = updated_at
+where analysis_updated_at is null;
+
+-- Entries without their "id" keys, plus note and meta. Reads the row through
+-- to_jsonb so databases without the meta column work too.
+create or replace function public.activity_log_analysis_content(p_row jsonb)
+returns jsonb
+language sql
+immutable
+set search_path = public
+as $$
+select jsonb_build_object(
+  'entries',
+  (
+    select coalesce(
+      jsonb_agg(
+        case when jsonb_typeof(e.value) = 'object' then e.value - 'id' else e.value end
+        order by e.ord
+      ),
+      '[]'::jsonb
+    )
+    from jsonb_array_elements(
+      case when jsonb_typeof(p_row->'entries') = 'array' then p_row->'entries' else '[]'::jsonb end
+    ) with ordinality e(value, ord)
+  ),
+  'note', p_row->'note',
+  'meta', p_row->'meta'
+);
+$$;
+
+create or replace function public.set_activity_log_analysis_updated_at()
+returns trigger
+language plpgsql
+set search_path = public
+as $$
+begin
+  if tg_op = 'INSERT'
+    or old.analysis_updated_at is null
+    or public.activity_log_analysis_content(to_jsonb(new))
+      is distinct from public.activity_log_analysis_content(to_jsonb(old))
+  then
+    new.analysis_updated_at := now();
+  else
+    new.analysis_updated_at := old.analysis_updated_at;
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists activity_logs_set_analysis_updated_at on public.activity_logs;
+create trigger activity_logs_set_analysis_updated_at
+before insert or update on public.activity_logs
+for each row execute procedure public.set_activity_log_analysis_updated_at();
@@ -0,0 +1,59 @@
+-- Auto-lapse candidate scan as a keyset-paginated anti-join.
+-- Returns only user_recovery_state rows that pass the cron's coarse filters
+-- and have no open recovery session, ordered by (last_engaged_at, user_id).
+-- Callers pass the last row of the previous page as the cursor, so every
+-- page is an index range scan regardless of how many sessions are open.
+
+create index if not exists user_recovery_state_keyset_idx
+  on public.user_recovery_state (last_engaged_at asc, user_id asc);
+
+create or replace function public.auto_lapse_candidates(
+  p_engaged_before timestamptz,
+  p_auto_lapse_before timestamptz,
+  p_after_engaged_at timestamptz default null,
+  p_after_user_id uuid default null,
+  p_limit int default 500
+)
+returns table (
+  user_id uuid,
+  last_engaged_at timestamptz,
+  lapse_threshold_hours int,
+  last_auto_lapse_at timestamptz,
+  last_nudge_at timestamptz,
+  locale text,
+  timezone text,
+  quiet_hours_start smallint,
+  quiet_hours_end smallint
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+select
+  s.user_id,
+  s.last_engaged_at,
+  s.lapse_threshold_hours,
+  s.last_auto_lapse_at,
+  s.last_nudge_at,
+  s.locale,
+  s.timezone,
+  s.quiet_hours_start,
+  s.quiet_hours_end
+from public.user_recovery_state s
+where s.last_engaged_at <= p_engaged_before
+  and (s.last_auto_lapse_at is null or s.last_auto_lapse_at <= p_auto_lapse_before)
+  and (
+    p_after_engaged_at is null
+    or (s.last_engaged_at, s.user_id) > (p_after_engaged_at, p_after_user_id)
+  )
+  -- Served by the recovery_sessions_one_open_per_user partial unique index.
+  and not exists (
+    select 1
+    from public.recovery_sessions rs
+    where rs.user_id = s.user_id
+      and rs.status = 'open'
+  )
+order by s.last_engaged_at asc, s.user_id asc
+limit greatest(1, least(coalesce(p_limit, 500), 2000));
+$$;
@@ -0,0 +1,97 @@
+-- Persisted cohort_trend_summary results (optional).
+-- /api/trends/cohort reads a snapshot before falling back to the live RPC when
+-- COHORT_SNAPSHOT_ENABLED=true; the API's embedded scheduler calls
+-- refresh_cohort_trend_snapshots() every COHORT_SNAPSHOT_REFRESH_INTERVAL_SECONDS.
+-- cache_key format (must match app/services/cohort_cache.py):
+--   'w=<window_days>' followed by '|<dim>=<value>' per compared dimension,
+--   dimensions sorted, unknown/prefer_not_to_say values left out.
+-- Only the service role may use these objects.
+
+create table if not exists public.cohort_trend_snapshots (
+  cache_key text primary key,
+  window_days int not null,
+  filters jsonb not null default '{}'::jsonb,
+  summary jsonb not null,
+  refreshed_at timestamptz not null default now()
+);
+
+alter table public.cohort_trend_snapshots enable row level security;
+-- No policies: anon/authenticated see nothing; the service role bypasses RLS.
+revoke all on public.cohort_trend_snapshots from anon, authenticated;
+
+-- Recomputes one snapshot per distinct cohort among opted-in users and
+-- returns how many were written.
+create or replace function public.refresh_cohort_trend_snapshots(
+  p_window_days int default 14
+)
+returns table (refreshed_count int)
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  v_window int := greatest(coalesce(p_window_days, 14), 7);
+begin
+  -- Cohorts no opted-in user belongs to any more stop being refreshed.
+  delete from public.cohort_trend_snapshots
+  where refreshed_at < now() - interval '1 day';
+
+  return query
+  with cohorts as (
+    select distinct coalesce(f.filters, '{}'::jsonb) as filters
+    from public.profiles p
+    cross join lateral (
+      select jsonb_object_agg(v.dim, v.val) as filters
+      from (
+        select distinct
+          d.dim,
+          case d.dim
+            when 'age_group' then coalesce(p.age_group, 'unknown')
+            when 'gender' then coalesce(p.gender, 'unknown')
+            when 'job_family' then coalesce(p.job_family, 'unknown')
+            else coalesce(p.work_mode, 'unknown')
+          end as val
+        from unnest(coalesce(p.trend_compare_by, array[]::text[])) d(dim)
+        where d.dim in ('age_group', 'gender', 'job_family', 'work_mode')
+      ) v
+      where v.val not in ('unknown', 'prefer_not_to_say')
+    ) f
+    where p.trend_opt_in = true
+  ),
+  computed as (
+    select
+      concat_ws('|', 'w=' || v_window, k.parts) as cache_key,
+      c.filters,
+      to_jsonb(s) as summary
+    from cohorts c
+    cross join lateral (
+      select string_agg(e.key || '=' || e.value, '|' order by e.key) as parts
+      from jsonb_each_text(c.filters) e
+    ) k
+    cross join lateral public.cohort_trend_summary(
+      coalesce(c.filters ->> 'age_group', 'unknown'),
+      coalesce(c.filters ->> 'gender', 'unknown'),
+      coalesce(c.filters ->> 'job_family', 'unknown'),
+      coalesce(c.filters ->> 'work_mode', 'unknown'),
+      'unknown',
+      array(select jsonb_object_keys(c.filters)),
+      v_window
+    ) s
+  ),
+  written as (
+    insert into public.cohort_trend_snapshots as t
+      (cache_key, window_days, filters, summary, refreshed_at)
+    select cm.cache_key, v_window, cm.filters, cm.summary, now()
+    from computed cm
+    on conflict (cache_key) do update set
+      filters = excluded.filters,
+      summary = excluded.summary,
+      refreshed_at = excluded.refreshed_at
+    returning t.cache_key
+  )
+  select count(*)::int from written;
+end;
+$$;
+
+revoke all on function public.refresh_cohort_trend_snapshots(int) from public, anon, authenticated;
+grant execute on function public.refresh_cohort_trend_snapshots(int) to service_role;
@@ -0,0 +1,74 @@
+-- Fleet-wide leader lease for the API's embedded cron scheduler.
+-- PostgREST runs every call in its own transaction on a pooled connection, so
+-- a session-level advisory lock cannot be held between calls. Instead a
+-- transaction-scoped advisory lock serializes contenders while they take or
+-- renew a lease row that expires on its own if the holder dies.
+-- Only the service role may use these objects.
+
+create table if not exists public.cron_leases (
+  name text primary key,
+  holder text not null,
+  acquired_at timestamptz not null default now(),
+  expires_at timestamptz not null
+);
+
+alter table public.cron_leases enable row level security;
+-- No policies: anon/authenticated see nothing; the service role bypasses RLS.
+revoke all on public.cron_leases from anon, authenticated;
+
+-- Returns the lease row when p_holder now holds it, no rows otherwise.
+create or replace function public.try_acquire_cron_lease(
+  p_name text,
+  p_holder text,
+  p_ttl_seconds int
+)
+returns table (holder text, acquired_at timestamptz, expires_at timestamptz)
+language plpgsql
+security invoker
+set search_path = public
+as $$
+#variable_conflict use_column
+begin
+  perform pg_advisory_xact_lock(hashtextextended('cron_lease:' || p_name, 0));
+
+  return query
+  with taken as (
+    insert into public.cron_leases as l (name, holder, acquired_at, expires_at)
+    values (
+      p_name,
+      p_holder,
+      now(),
+      now() + make_interval(secs => greatest(coalesce(p_ttl_seconds, 0), 1))
+    )
+    on conflict (name) do update set
+      holder = excluded.holder,
+      -- A renewal keeps the original acquisition time.
+      acquired_at = case
+        when l.holder = excluded.holder then l.acquired_at
+        else excluded.acquired_at
+      end,
+      expires_at = excluded.expires_at
+    where l.holder = excluded.holder
+       or l.expires_at <= now()
+    returning l.holder, l.acquired_at, l.expires_at
+  )
+  select t.holder, t.acquired_at, t.expires_at from taken t;
+end;
+$$;
+
+create or replace function public.release_cron_lease(p_name text, p_holder text)
+returns setof public.cron_leases
+language sql
+security invoker
+set search_path = public
+as $$
+  delete from public.cron_leases
+  where name = p_name
+    and holder = p_holder
+  returning *;
+$$;
+
+revoke all on function public.try_acquire_cron_lease(text, text, int) from public, anon, authenticated;
+revoke all on function public.release_cron_lease(text, text) from public, anon, authenticated;
+grant execute on function public.try_acquire_cron_lease(text, text, int) to service_role;
+grant execute on function public.release_cron_lease(text, text) to service_role;
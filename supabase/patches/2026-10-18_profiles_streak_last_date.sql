@@ -0,0 +1,37 @@
+-- Anchor for incremental streak updates on POST /api/logs.
+-- streak_last_date is the latest logged date and current_streak is the run
+-- ending there. The API advances both in O(1) when a later day is saved and
+-- recomputes from history when the anchor is null. Removing or moving a log
+-- can shorten a run, so those writes clear the anchor here.
+
+alter table public.profiles
+  add column if not exists streak_last_date date;
+
+create or replace function public.clear_profile_streak_anchor()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  update public.profiles
+  set streak_last_date = null
+  where id = old.user_id
+    and streak_last_date is not null;
+  return null;
+end;
+$$;
+
+drop trigger if exists activity_logs_clear_streak_anchor on public.activity_logs;
+create trigger activity_logs_clear_streak_anchor
+after delete on public.activity_logs
+for each row execute procedure public.clear_profile_streak_anchor();
+
+-- The API's PATCH sends user_id and date unchanged on every save; only real
+-- moves count.
+drop trigger if exists activity_logs_clear_streak_anchor_on_move on public.activity_logs;
+create trigger activity_logs_clear_streak_anchor_on_move
+after update of user_id, date on public.activity_logs
+for each row
+when (old.user_id is distinct from new.user_id or old.date is distinct from new.date)
+execute procedure public.clear_profile_streak_anchor();
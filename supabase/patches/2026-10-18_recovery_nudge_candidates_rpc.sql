@@ -0,0 +1,67 @@
+-- Nudge cron candidates with quiet hours applied in the database.
+-- Returns open recovery sessions joined with the user's recovery state,
+-- skipping users whose local time is inside their quiet hours. The API
+-- computes the current local hour once per timezone and passes the maps in:
+-- - p_zone_hours: {"Asia/Seoul": 21, ...} for every IANA zone
+-- - p_locale_hours: {"ko": 21, ..., "*": <UTC hour>} used when the user's
+--   timezone is empty or unknown
+-- Sessions without a state row are still returned (state = null) so the
+-- cron can report them.
+
+create or replace function public.recovery_nudge_candidates(
+  p_zone_hours jsonb,
+  p_locale_hours jsonb,
+  p_quiet_start int,
+  p_quiet_end int,
+  p_limit int default 500
+)
+returns table (
+  id uuid,
+  user_id uuid,
+  status text,
+  entry_surface text,
+  lapse_start_ts timestamptz,
+  detection_source text,
+  state jsonb
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+select
+  rs.id,
+  rs.user_id,
+  rs.status,
+  rs.entry_surface,
+  rs.lapse_start_ts,
+  rs.detection_source,
+  case when s.user_id is null then null else to_jsonb(s) end
+from public.recovery_sessions rs
+left join public.user_recovery_state s on s.user_id = rs.user_id
+cross join lateral (
+  select
+    coalesce(
+      (p_zone_hours ->> s.timezone)::int,
+      (p_locale_hours ->> coalesce(nullif(lower(btrim(s.locale)), ''), 'ko'))::int,
+      (p_locale_hours ->> '*')::int
+    ) as local_hour,
+    coalesce(s.quiet_hours_start::int, p_quiet_start) % 24 as quiet_start,
+    coalesce(s.quiet_hours_end::int, p_quiet_end) % 24 as quiet_end
+) q
+where rs.status = 'open'
+  and (
+    s.user_id is null
+    or q.local_hour is null
+    or q.quiet_start = q.quiet_end
+    or not (
+      case
+        when q.quiet_start < q.quiet_end
+          then q.local_hour >= q.quiet_start and q.local_hour < q.quiet_end
+        else q.local_hour >= q.quiet_start or q.local_hour < q.quiet_end
+      end
+    )
+  )
+order by rs.created_at desc
+limit greatest(1, least(coalesce(p_limit, 500), 2000));
+$$;
@@ -0,0 +1,28 @@
+-- Aggregate /api/recovery/summary in the database.
+-- One row regardless of session history; uses
+-- recovery_sessions_user_created_at_idx. security invoker: RLS still limits
+-- end users to their own sessions whatever p_user_id they pass.
+
+create or replace function public.recovery_summary(
+  p_user_id uuid,
+  p_since timestamptz
+)
+returns table (
+  started_count bigint,
+  completed_count bigint,
+  rt_p50_min double precision
+)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+select
+  count(*) as started_count,
+  count(*) filter (where rs.status = 'completed') as completed_count,
+  percentile_cont(0.5) within group (order by rs.rt_min)
+    filter (where rs.status = 'completed' and rs.rt_min >= 0) as rt_p50_min
+from public.recovery_sessions rs
+where rs.user_id = p_user_id
+  and rs.created_at >= p_since;
+$$;
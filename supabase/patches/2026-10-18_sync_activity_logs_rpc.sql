@@ -0,0 +1,224 @@
+-- Batched offline sync for /api/logs/sync.
+-- A client queues per-day mutations while offline and sends them in one call;
+-- sync_activity_logs applies the whole batch in one transaction. Each
+-- mutation carries the updated_at it was based on (its "version", null for a
+-- day the client created) and is applied only if the server row still has
+-- that version. Otherwise the day is reported as a conflict with the server
+-- row, unless the server already holds the same content (a retried request
+-- whose response was lost), which counts as applied without a write.
+--
+-- Deletes leave a row in activity_log_tombstones, so the "since" part of the
+-- response can tell other devices which days went away. Tombstones are keyed
+-- by (user_id, date), so they are bounded by the days a user has ever logged.
+--
+-- Requires the meta column (2026-02-15_activity_logs_meta.sql). The API
+-- answers 503 on /logs/sync until this patch is applied; clients keep using
+-- POST /logs.
+
+create table if not exists public.activity_log_tombstones (
+  user_id uuid not null references public.profiles(id) on delete cascade,
+  date date not null,
+  deleted_at timestamptz not null default now(),
+  primary key (user_id, date)
+);
+
+alter table public.activity_log_tombstones enable row level security;
+
+drop policy if exists activity_log_tombstones_select_own on public.activity_log_tombstones;
+create policy activity_log_tombstones_select_own
+on public.activity_log_tombstones
+for select
+using (user_id = auth.uid());
+
+-- Rows are written only by the trigger below.
+revoke insert, update, delete on public.activity_log_tombstones from anon, authenticated;
+
+create index if not exists activity_log_tombstones_user_deleted_idx
+on public.activity_log_tombstones (user_id, deleted_at);
+
+create index if not exists activity_logs_user_updated_idx
+on public.activity_logs (user_id, updated_at);
+
+create or replace function public.record_activity_log_tombstone()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  insert into public.activity_log_tombstones as t (user_id, date, deleted_at)
+  values (old.user_id, old.date, now())
+  on conflict (user_id, date) do update set deleted_at = excluded.deleted_at;
+  return null;
+end;
+$$;
+
+revoke all on function public.record_activity_log_tombstone() from public, anon, authenticated;
+
+drop trigger if exists activity_logs_record_tombstone on public.activity_logs;
+create trigger activity_logs_record_tombstone
+after delete on public.activity_logs
+for each row execute procedure public.record_activity_log_tombstone();
+
+drop trigger if exists activity_logs_record_tombstone_on_move on public.activity_logs;
+create trigger activity_logs_record_tombstone_on_move
+after update of user_id, date on public.activity_logs
+for each row
+when (old.user_id is distinct from new.user_id or old.date is distinct from new.date)
+execute procedure public.record_activity_log_tombstone();
+
+-- p_mutations: [{date, base_version, deleted, entries, note, meta}, ...] with
+-- unique dates (the API validates the batch).
+-- Returns {applied: [{date, version, deleted, written}],
+--          conflicts: [{date, server}], changes: [row], deleted: [date],
+--          cursor}.
+-- changes/deleted cover days outside the batch that changed after p_since;
+-- both are empty when p_since is null. The lookback overlaps the previous
+-- cursor by a few seconds, so rows committed by transactions that started
+-- before it are not missed; clients drop changes whose version they hold.
+-- security invoker: RLS limits end users to their own logs whatever
+-- p_user_id they pass.
+create or replace function public.sync_activity_logs(
+  p_user_id uuid,
+  p_mutations jsonb,
+  p_since timestamptz default null
+)
+returns jsonb
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+  m jsonb;
+  v_date date;
+  v_base timestamptz;
+  v_deleted boolean;
+  v_entries jsonb;
+  v_note text;
+  v_meta jsonb;
+  v_current public.activity_logs%rowtype;
+  v_found boolean;
+  v_row public.activity_logs%rowtype;
+  v_dates date[] := '{}';
+  v_applied jsonb := '[]'::jsonb;
+  v_conflicts jsonb := '[]'::jsonb;
+  v_changes jsonb := '[]'::jsonb;
+  v_gone jsonb := '[]'::jsonb;
+begin
+  for m in
+    select value
+    from jsonb_array_elements(
+      case when jsonb_typeof(p_mutations) = 'array' then p_mutations else '[]'::jsonb end
+    )
+  loop
+    v_date := (m->>'date')::date;
+    v_base := nullif(m->>'base_version', '')::timestamptz;
+    v_deleted := coalesce((m->>'deleted')::boolean, false);
+    v_entries := case when jsonb_typeof(m->'entries') = 'array' then m->'entries' else '[]'::jsonb end;
+    v_note := m->>'note';
+    v_meta := case when jsonb_typeof(m->'meta') = 'object' then m->'meta' else '{}'::jsonb end;
+    v_dates := v_dates || v_date;
+
+    select * into v_current
+    from public.activity_logs l
+    where l.user_id = p_user_id and l.date = v_date
+    for update;
+    v_found := found;
+
+    if v_deleted then
+      if not v_found then
+        -- Already gone: a retry, or deleted on another device too.
+        v_applied := v_applied || jsonb_build_object(
+          'date', v_date, 'version', null, 'deleted', true, 'written', false
+        );
+      elsif v_current.updated_at is distinct from v_base then
+        v_conflicts := v_conflicts || jsonb_build_object(
+          'date', v_date, 'server', to_jsonb(v_current)
+        );
+      else
+        delete from public.activity_logs l
+        where l.user_id = p_user_id and l.date = v_date;
+        v_applied := v_applied || jsonb_build_object(
+          'date', v_date, 'version', null, 'deleted', true, 'written', true
+        );
+      end if;
+      continue;
+    end if;
+
+    if v_found
+      and v_current.entries = v_entries
+      and v_current.note is not distinct from v_note
+      and coalesce(v_current.meta, '{}'::jsonb) = v_meta
+    then
+      v_applied := v_applied || jsonb_build_object(
+        'date', v_date, 'version', v_current.updated_at, 'deleted', false, 'written', false
+      );
+      continue;
+    end if;
+
+    if v_found then
+      if v_current.updated_at is distinct from v_base then
+        v_conflicts := v_conflicts || jsonb_build_object(
+          'date', v_date, 'server', to_jsonb(v_current)
+        );
+        continue;
+      end if;
+      update public.activity_logs l
+      set entries = v_entries, note = v_note, meta = v_meta
+      where l.user_id = p_user_id and l.date = v_date
+      returning * into v_row;
+    elsif v_base is not null then
+      -- Edited offline, deleted on the server meanwhile.
+      v_conflicts := v_conflicts || jsonb_build_object('date', v_date, 'server', null);
+      continue;
+    else
+      insert into public.activity_logs (user_id, date, entries, note, meta)
+      values (p_user_id, v_date, v_entries, v_note, v_meta)
+      on conflict (user_id, date) do nothing
+      returning * into v_row;
+      if not found then
+        -- Created concurrently by another request.
+        select * into v_current
+        from public.activity_logs l
+        where l.user_id = p_user_id and l.date = v_date;
+        v_conflicts := v_conflicts || jsonb_build_object(
+          'date', v_date, 'server', to_jsonb(v_current)
+        );
+        continue;
+      end if;
+    end if;
+
+    v_applied := v_applied || jsonb_build_object(
+      'date', v_date, 'version', v_row.updated_at, 'deleted', false, 'written', true
+    );
+  end loop;
+
+  if p_since is not null then
+    select coalesce(jsonb_agg(to_jsonb(l) order by l.date), '[]'::jsonb)
+    into v_changes
+    from public.activity_logs l
+    where l.user_id = p_user_id
+      and l.updated_at > p_since - interval '5 seconds'
+      and not (l.date = any(v_dates));
+
+    select coalesce(jsonb_agg(t.date order by t.date), '[]'::jsonb)
+    into v_gone
+    from public.activity_log_tombstones t
+    where t.user_id = p_user_id
+      and t.deleted_at > p_since - interval '5 seconds'
+      and not (t.date = any(v_dates))
+      and not exists (
+        select 1 from public.activity_logs l
+        where l.user_id = t.user_id and l.date = t.date
+      );
+  end if;
+
+  return jsonb_build_object(
+    'applied', v_applied,
+    'conflicts', v_conflicts,
+    'changes', v_changes,
+    'deleted', v_gone,
+    'cursor', now()
+  );
+end;
+$$;
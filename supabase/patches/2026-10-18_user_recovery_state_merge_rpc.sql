@@ -0,0 +1,81 @@
+-- Atomic, batched merge for user_recovery_state.
+-- Replaces the API's read-modify-write (select current row, merge in Python,
+-- upsert) with one statement per batch:
+-- - timestamps only move forward: greatest(current, incoming)
+-- - locale/timezone: incoming value when given, otherwise keep the current one
+-- - several rows for the same user in one batch collapse into one
+-- security invoker: RLS still limits end users to their own row; the service
+-- role (crons) can merge any user.
+
+create or replace function public.upsert_user_recovery_state_batch(p_rows jsonb)
+returns setof public.user_recovery_state
+language plpgsql
+security invoker
+set search_path = public
+as $$
+begin
+  -- Lock existing rows in a stable order so concurrent batches cannot
+  -- deadlock and the merge below reads the latest committed values.
+  perform 1
+  from public.user_recovery_state s
+  where s.user_id in (
+    select (e.value->>'user_id')::uuid
+    from jsonb_array_elements(coalesce(p_rows, '[]'::jsonb)) as e(value)
+    where nullif(e.value->>'user_id', '') is not null
+  )
+  order by s.user_id
+  for update;
+
+  return query
+  with raw as (
+    select
+      (e.value->>'user_id')::uuid as user_id,
+      nullif(btrim(e.value->>'locale'), '') as locale,
+      nullif(btrim(e.value->>'timezone'), '') as timezone,
+      (e.value->>'last_engaged_at')::timestamptz as last_engaged_at,
+      (e.value->>'last_auto_lapse_at')::timestamptz as last_auto_lapse_at,
+      (e.value->>'last_nudge_at')::timestamptz as last_nudge_at,
+      e.ord
+    from jsonb_array_elements(coalesce(p_rows, '[]'::jsonb)) with ordinality as e(value, ord)
+    where nullif(e.value->>'user_id', '') is not null
+  ),
+  merged as (
+    select
+      r.user_id,
+      (array_agg(r.locale order by r.ord desc) filter (where r.locale is not null))[1] as locale,
+      (array_agg(r.timezone order by r.ord desc) filter (where r.timezone is not null))[1] as timezone,
+      max(r.last_engaged_at) as last_engaged_at,
+      max(r.last_auto_lapse_at) as last_auto_lapse_at,
+      max(r.last_nudge_at) as last_nudge_at
+    from raw r
+    group by r.user_id
+  ),
+  upserted as (
+    insert into public.user_recovery_state as s (
+      user_id,
+      locale,
+      timezone,
+      last_engaged_at,
+      last_auto_lapse_at,
+      last_nudge_at
+    )
+    select
+      m.user_id,
+      coalesce(m.locale, cur.locale, 'ko'),
+      coalesce(m.timezone, cur.timezone),
+      coalesce(greatest(m.last_engaged_at, cur.last_engaged_at), now()),
+      greatest(m.last_auto_lapse_at, cur.last_auto_lapse_at),
+      greatest(m.last_nudge_at, cur.last_nudge_at)
+    from merged m
+    left join public.user_recovery_state cur on cur.user_id = m.user_id
+    on conflict (user_id) do update set
+      locale = excluded.locale,
+      timezone = excluded.timezone,
+      last_engaged_at = greatest(s.last_engaged_at, excluded.last_engaged_at),
+      last_auto_lapse_at = greatest(s.last_auto_lapse_at, excluded.last_auto_lapse_at),
+      last_nudge_at = greatest(s.last_nudge_at, excluded.last_nudge_at)
+    returning s.*
+  )
+  select * from upserted;
+end;
+$$;